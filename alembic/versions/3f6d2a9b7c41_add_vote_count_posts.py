@@ -0,0 +1,32 @@
+"""add vote_count to posts
+
+Revision ID: 3f6d2a9b7c41
+Revises: 1cc4e277c728
+Create Date: 2026-10-18 09:12:03.418211
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f6d2a9b7c41'
+down_revision = '1cc4e277c728'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('posts', sa.Column(
+        'vote_count', sa.Integer(), nullable=False, server_default='0'))
+    # Backfill the counter from the existing votes
+    op.execute("""
+        UPDATE posts
+        SET vote_count = counts.votes
+        FROM (SELECT post_id, COUNT(*) AS votes FROM votes GROUP BY post_id) AS counts
+        WHERE posts.id = counts.post_id
+    """)
+
+
+def downgrade():
+    op.drop_column('posts', 'vote_count')
@@ -0,0 +1,27 @@
+"""feed keyset indexes
+
+Revision ID: 8b1e4c0d5a27
+Revises: 3f6d2a9b7c41
+Create Date: 2026-10-18 10:41:27.902114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b1e4c0d5a27'
+down_revision = '3f6d2a9b7c41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Scanned backwards for `ORDER BY created_at DESC, id DESC` / `vote_count DESC, id DESC`
+    op.create_index('ix_posts_created_at_id', 'posts', ['created_at', 'id'])
+    op.create_index('ix_posts_vote_count_id', 'posts', ['vote_count', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_posts_vote_count_id', table_name='posts')
+    op.drop_index('ix_posts_created_at_id', table_name='posts')
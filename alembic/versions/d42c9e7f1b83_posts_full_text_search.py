@@ -0,0 +1,31 @@
+"""posts full text search
+
+Revision ID: d42c9e7f1b83
+Revises: 8b1e4c0d5a27
+Create Date: 2026-10-18 11:26:50.337468
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'd42c9e7f1b83'
+down_revision = '8b1e4c0d5a27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Generated (and therefore always up to date) search document; the
+    # expression must stay in sync with models.Post.search_vector
+    op.add_column('posts', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(
+        "to_tsvector('english', coalesce(title, '') || ' ' || coalesce(content, ''))",
+        persisted=True)))
+    op.create_index('ix_posts_search_vector', 'posts', ['search_vector'],
+                    postgresql_using='gin')
+
+
+def downgrade():
+    op.drop_index('ix_posts_search_vector', table_name='posts')
+    op.drop_column('posts', 'search_vector')
@@ -0,0 +1,41 @@
+"""posts hot score
+
+Revision ID: e5a3b9d27c10
+Revises: d42c9e7f1b83
+Create Date: 2026-10-18 15:02:44.517203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a3b9d27c10'
+down_revision = 'd42c9e7f1b83'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('posts', sa.Column(
+        'hot_score', sa.Float(), nullable=False, server_default='0'))
+    op.add_column('posts', sa.Column(
+        'scored_vote_count', sa.Integer(), nullable=False, server_default='-1'))
+    # Score the existing posts right away (same formula as app.hot_scores)
+    op.execute("""
+        UPDATE posts
+        SET hot_score = log(greatest(vote_count, 1))
+                        + (extract(epoch FROM created_at) - 1577836800) / 45000.0,
+            scored_vote_count = vote_count
+    """)
+    # Scanned backwards for `ORDER BY hot_score DESC, id DESC`
+    op.create_index('ix_posts_hot_score_id', 'posts', ['hot_score', 'id'])
+    op.create_index('ix_posts_hot_pending', 'posts', ['id'],
+                    postgresql_where=sa.text('vote_count <> scored_vote_count'))
+
+
+def downgrade():
+    op.drop_index('ix_posts_hot_pending', table_name='posts')
+    op.drop_index('ix_posts_hot_score_id', table_name='posts')
+    op.drop_column('posts', 'scored_vote_count')
+    op.drop_column('posts', 'hot_score')
@@ -0,0 +1,46 @@
+"""votes post_id and posts owner_id indexes
+
+Revision ID: f7c2d8e41a96
+Revises: e5a3b9d27c10
+Create Date: 2026-10-18 17:36:09.281530
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7c2d8e41a96'
+down_revision = 'e5a3b9d27c10'
+branch_labels = None
+depends_on = None
+
+
+def _owner_column():
+    # Databases built from these migrations call the column user_id (see
+    # 159ecf14a6c0); the models, and databases created from them, owner_id
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('posts')}
+    return 'owner_id' if 'owner_id' in columns else 'user_id'
+
+
+def upgrade():
+    # CONCURRENTLY does not block writes while the index builds, but cannot
+    # run inside a transaction, so a failure is not rolled back: a failed build
+    # leaves an INVALID index behind, and the first index stays when the second
+    # fails. Drop them before running the migration again.
+    with op.get_context().autocommit_block():
+        # votes' primary key starts with user_id: per-post lookups (counting a
+        # post's votes, the cascade when a post is deleted) need their own index
+        op.create_index('ix_votes_post_id', 'votes', ['post_id'],
+                        postgresql_concurrently=True)
+        # Posts of a user, scanned by the cascade when the user is deleted
+        op.create_index('ix_posts_owner_id', 'posts', [_owner_column()],
+                        postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_posts_owner_id', table_name='posts',
+                      postgresql_concurrently=True)
+        op.drop_index('ix_votes_post_id', table_name='votes',
+                      postgresql_concurrently=True)
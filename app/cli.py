@@ -0,0 +1,213 @@
+"""
+Command line maintenance tasks.
+
+Usage:
+    python -m app.cli reconcile-votes [--repair]
+    python -m app.cli calibrate-bcrypt [--target-ms 250]
+    python -m app.cli import-posts FILE --owner-email EMAIL [--chunk-size 1000]
+    python -m app.cli seed [--users 1000] [--posts 10000] [--votes 100000] [--skew 1.1]
+"""
+import argparse
+import statistics
+import time
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from . import models, post_import, seed, utils
+from .config import settings
+from .database import SessionLocal
+
+
+def _actual_vote_count():
+    """
+    Correlated subquery counting the rows in `votes` for the enclosing post.
+    """
+    return select(func.count(models.Vote.post_id)).where(
+        models.Vote.post_id == models.Post.id).scalar_subquery()
+
+
+def reconcile_vote_counts(db: Session, repair: bool = False) -> List[Tuple[int, int, int]]:
+    """
+    Detects (and optionally repairs) drift in `posts.vote_count`.
+
+    Drift can appear when votes are removed outside the vote router, for
+    example when a user is deleted and their votes cascade away.
+
+    Args:
+        db (Session): Database session.
+        repair (bool): Whether to overwrite drifted counters with the real count.
+
+    Returns:
+        List[Tuple[int, int, int]]: (post_id, stored_count, actual_count) for every drifted post.
+    """
+    actual = _actual_vote_count()
+    drifted = db.query(models.Post.id, models.Post.vote_count, actual.label("actual")).filter(
+        models.Post.vote_count != actual).order_by(models.Post.id).all()
+
+    if repair and drifted:
+        # Recompute in the UPDATE itself so votes cast since the scan are counted
+        db.query(models.Post).filter(models.Post.id.in_([row.id for row in drifted])).update(
+            {models.Post.vote_count: _actual_vote_count()}, synchronize_session=False)
+        db.commit()
+
+    return [(row.id, row.vote_count, row.actual) for row in drifted]
+
+
+def calibrate_bcrypt_rounds(target_seconds: float, min_rounds: int = 4, max_rounds: int = 20,
+                           samples: int = 3, timer=time.perf_counter) -> Tuple[int, List[Tuple[int, float]]]:
+    """
+    Finds the highest bcrypt cost whose verification stays within a target time.
+
+    The cost is a log2 work factor, so each extra round doubles the time;
+    rounds are measured upwards until the target is exceeded.
+
+    Args:
+        target_seconds (float): Longest acceptable time for one verification.
+        min_rounds (int): Lowest cost considered (bcrypt's minimum is 4).
+        max_rounds (int): Highest cost considered.
+        samples (int): Verifications timed per cost (the median is used).
+        timer: Clock used for the measurements.
+
+    Returns:
+        Tuple[int, List[Tuple[int, float]]]: The chosen rounds, and the
+        (rounds, median verify seconds) pairs that were measured.
+    """
+    measured = []
+    chosen = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        context = utils.make_context(["bcrypt"], rounds)
+        hashed = context.hash("calibration password")
+        timings = []
+        for _ in range(samples):
+            started = timer()
+            context.verify("calibration password", hashed)
+            timings.append(timer() - started)
+        seconds = statistics.median(timings)
+        measured.append((rounds, seconds))
+        if seconds > target_seconds:
+            break
+        chosen = rounds
+    return chosen, measured
+
+
+def positive_int(value: str) -> int:
+    """
+    argparse type accepting integers of at least 1.
+    """
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Entry point for `python -m app.cli`.
+
+    Args:
+        argv (List[str], optional): Command line arguments (defaults to sys.argv).
+
+    Returns:
+        int: Process exit code.
+    """
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    reconcile = commands.add_parser(
+        "reconcile-votes", help="Check posts.vote_count against the votes table")
+    reconcile.add_argument("--repair", action="store_true",
+                           help="Fix the drifted counters instead of only reporting them")
+
+    calibrate = commands.add_parser(
+        "calibrate-bcrypt", help="Pick the bcrypt cost that hits a target verify time on this machine")
+    calibrate.add_argument("--target-ms", type=float, default=250,
+                           help="Longest acceptable time for one password verification")
+
+    import_posts = commands.add_parser(
+        "import-posts", help="Bulk-insert posts from a JSON array or NDJSON file ('-' for stdin)")
+    import_posts.add_argument("file", type=argparse.FileType("rb"))
+    import_posts.add_argument("--owner-email", required=True, help="Email of the user owning the posts")
+    import_posts.add_argument("--chunk-size", type=positive_int, default=settings.post_import_chunk_size,
+                              help="Posts per INSERT statement")
+
+    seed_data = commands.add_parser(
+        "seed", help="Load synthetic users, posts and Zipf-skewed votes for load testing")
+    seed_data.add_argument("--users", type=int, default=1000)
+    seed_data.add_argument("--posts", type=int, default=10000)
+    seed_data.add_argument("--votes", type=int, default=100000)
+    seed_data.add_argument("--skew", type=float, default=1.1,
+                           help="Zipf exponent of post popularity (0 spreads votes evenly)")
+    seed_data.add_argument("--days", type=int, default=30, help="Period the posts are spread over")
+    seed_data.add_argument("--password", default="password123", help="Password of every seeded user")
+    seed_data.add_argument("--seed", type=int, default=0, help="Random seed")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "reconcile-votes":
+        db = SessionLocal()
+        try:
+            drifted = reconcile_vote_counts(db, repair=args.repair)
+        finally:
+            db.close()
+
+        for post_id, stored, actual in drifted:
+            print(f"post {post_id}: vote_count={stored} actual={actual}")
+        action = "repaired" if args.repair else "found"
+        print(f"{len(drifted)} drifted post(s) {action}")
+        # Non-zero exit when drift is left in place so cron/CI can alert on it
+        return 1 if drifted and not args.repair else 0
+
+    if args.command == "calibrate-bcrypt":
+        rounds, measured = calibrate_bcrypt_rounds(args.target_ms / 1000)
+        for measured_rounds, seconds in measured:
+            print(f"rounds={measured_rounds}: {seconds * 1000:.1f} ms")
+        print(f"BCRYPT_ROUNDS={rounds}")
+        return 0
+
+    if args.command == "import-posts":
+        db = SessionLocal()
+        try:
+            owner = db.query(models.Users).filter(models.Users.email == args.owner_email).first()
+            if owner is None:
+                print(f"no user with email {args.owner_email}")
+                return 1
+            # The file is read in 1 MiB pieces so NDJSON input is never loaded whole
+            pieces = iter(lambda: args.file.read(2 ** 20), b"")
+            try:
+                result = post_import.import_posts(db, owner.id, pieces, args.chunk_size)
+            except ValueError as error:
+                print(f"import failed, nothing was imported: {error}")
+                return 1
+        finally:
+            db.close()
+            args.file.close()
+
+        for number, chunk in enumerate(result["chunks"], start=1):
+            print(f"chunk {number}: {chunk['rows']} posts, ids {chunk['first_id']}-{chunk['last_id']}, "
+                  f"{chunk['rows_per_second']:.0f} posts/s")
+        print(f"{result['imported']} post(s) imported in {result['seconds']:.2f} s "
+              f"({result['rows_per_second']:.0f} posts/s)")
+        return 0
+
+    if args.command == "seed":
+        db = SessionLocal()
+        try:
+            result = seed.seed_dataset(db, args.users, args.posts, args.votes,
+                                       utils.pwd_context.hash(args.password),
+                                       skew=args.skew, days=args.days, seed=args.seed)
+        finally:
+            db.close()
+
+        print(f"{result['users']} user(s), {result['posts']} post(s) and {result['votes']} vote(s) "
+              f"seeded in {result['seconds']:.2f} s")
+        print(f"top 1% of the posts hold {result['top_1pct_vote_share']:.0%} of the votes; "
+              f"users log in as {seed.seed_email(0)} ... with password {args.password!r}")
+        return 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
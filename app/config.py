@@ -1,7 +1,9 @@
 """
 Application configuration settings using Pydantic.
 """
-from pydantic import BaseSettings
+from typing import List
+
+from pydantic import BaseSettings, validator
 
 class Settings(BaseSettings):
     """
@@ -15,7 +17,97 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     algorithm: str
     access_token_expire_minutes: int
-    
+    # Serve the API from the async routers (asyncpg + AsyncSession) instead of
+    # the sync ones running on the threadpool
+    database_async: bool = False
+    # Connection pool sizing (applied to both the sync and the async engine)
+    database_pool_size: int = 5
+    database_max_overflow: int = 10
+    database_pool_timeout: float = 30
+    database_pool_recycle: int = -1
+    database_pool_pre_ping: bool = False
+    # Read replicas (JSON list of postgresql:// URLs) serving the read-only
+    # endpoints, their health check interval and the largest replication lag
+    # they may have, and how long a client reads from the primary after a write
+    database_replica_urls: List[str] = []
+    replica_health_check_seconds: float = 5.0
+    replica_max_lag_seconds: float = 30.0
+    read_your_writes_seconds: float = 5.0
+    # Emails of the users allowed to call the /admin endpoints (JSON list);
+    # empty, the default, locks everyone out of them
+    admin_emails: List[str] = []
+    # Cache of verified access tokens and their users (0 disables it)
+    token_cache_size: int = 10000
+    token_cache_ttl_seconds: float = 60
+    # Write-behind vote buffer (see app/vote_buffer.py); votes are answered
+    # with 202 and written in batches when enabled
+    vote_buffer_enabled: bool = False
+    vote_buffer_batch_size: int = 500
+    vote_buffer_flush_interval_seconds: float = 0.5
+    vote_buffer_max_pending: int = 50000
+    # Largest number of votes accepted by POST /votes/batch
+    vote_batch_max_items: int = 500
+    # Password hashing (see app/utils.py): process pool size (0 hashes in the
+    # request thread), auth operations in flight per process, and how long a
+    # request waits for a free slot before getting a 503.
+    # Operations in flight beyond the pool size queue up in the pool, so size
+    # auth_max_concurrency as auth_pool_workers x the queue depth per worker
+    # you accept; a queued login waits about depth x one hash (~0.25 s at the
+    # default bcrypt cost). The defaults absorb a burst of 16 logins with at
+    # most ~2 s of queueing before later ones wait for a slot
+    auth_pool_workers: int = 2
+    auth_max_concurrency: int = 16
+    auth_wait_timeout_seconds: float = 2.0
+    # Read-through cache of GET /posts/{id} ("memory" or "redis"; size 0
+    # disables the memory store)
+    post_cache_backend: str = "memory"
+    post_cache_redis_url: str = "redis://localhost:6379/0"
+    post_cache_size: int = 10000
+    post_cache_ttl_seconds: float = 30
+    # In-memory snapshot of the first feed pages, refreshed in the background
+    # and never served older than the staleness bound
+    feed_snapshot_enabled: bool = False
+    feed_snapshot_size: int = 50
+    feed_snapshot_refresh_seconds: float = 1.0
+    feed_snapshot_max_staleness_seconds: float = 5.0
+    # orjson as the default response class, and feed responses built straight
+    # from the query rows without response_model validation
+    fast_json_responses: bool = False
+    # Feed listings select plain columns (no ORM entities) and stream the
+    # JSON response row by row
+    feed_projection: bool = False
+    # Posts per multi-row INSERT of POST /posts/bulk and `app.cli import-posts`
+    post_import_chunk_size: int = 1000
+    # Background rescoring of posts.hot_score for sort=hot (see app/hot_scores.py)
+    hot_score_refresh_enabled: bool = True
+    hot_score_refresh_seconds: float = 5.0
+    hot_score_batch_size: int = 1000
+    # Live vote count streams (see app/vote_stream.py): "local" for a single
+    # process, "postgres" to fan out across workers with LISTEN/NOTIFY
+    vote_stream_backend: str = "local"
+    vote_stream_channel: str = "post_votes"
+    vote_stream_tick_seconds: float = 0.25
+    vote_stream_keepalive_seconds: float = 15
+    vote_stream_max_seconds: float = 300
+    vote_stream_max_posts: int = 100
+    # Per-request query count / DB time (Server-Timing header and
+    # GET /admin/queries) and the slow-query log threshold (negative disables it)
+    sql_instrumentation: bool = True
+    slow_query_threshold_ms: float = 500
+    # Password hash schemes (JSON list); new hashes use the first one and the
+    # others are rehashed on login. bcrypt cost, see `python -m app.cli calibrate-bcrypt`
+    password_schemes: List[str] = ["bcrypt"]
+    bcrypt_rounds: int = 12
+
+    @validator("post_import_chunk_size")
+    def _positive(cls, value):
+        """
+        Rejects sizes that would never fill a chunk.
+        """
+        if value <= 0:
+            raise ValueError("must be a positive integer")
+        return value
+
     class Config:
         """
         Pydantic configuration.
@@ -2,27 +2,68 @@
 Database configuration and connection setup.
 """
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
+from .instrumentation import instrument_engine
+from .pool_metrics import TimedAsyncAdaptedQueuePool, TimedQueuePool, instrument
+from .replicas import ReplicaSet, WritePins, async_read_db_dependency, read_db_dependency
 
 # -----------------------------
 # Database Configuration
 # -----------------------------
 # Define the URL for the PostgreSQL database connection
 SQLALCHEMY_DATABASE_URL = f"postgresql://{settings.database_username}:{settings.database_password}@{settings.database_hostname}:{settings.database_port}/{settings.database_name}"
+# Same database through the asyncpg driver, used when `settings.database_async` is on
+SQLALCHEMY_ASYNC_DATABASE_URL = f"postgresql+asyncpg://{settings.database_username}:{settings.database_password}@{settings.database_hostname}:{settings.database_port}/{settings.database_name}"
 
 # -----------------------------
 # Engine Creation
 # -----------------------------
+# Pool sizing comes from the settings so it can be tuned per deployment
+POOL_OPTIONS = dict(
+    pool_size=settings.database_pool_size,
+    max_overflow=settings.database_max_overflow,
+    pool_timeout=settings.database_pool_timeout,
+    pool_recycle=settings.database_pool_recycle,
+    pool_pre_ping=settings.database_pool_pre_ping,
+)
+
 # The engine is the core interface to the database
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+engine = create_engine(SQLALCHEMY_DATABASE_URL, poolclass=TimedQueuePool, **POOL_OPTIONS)
+# Async engine; nothing connects until the async routers first use it
+async_engine = create_async_engine(SQLALCHEMY_ASYNC_DATABASE_URL,
+                                   poolclass=TimedAsyncAdaptedQueuePool, **POOL_OPTIONS)
+
+# Checkout waits, timeouts and connection churn for the admin endpoint
+pool_metrics = instrument(engine.pool)
+async_pool_metrics = instrument(async_engine.sync_engine.pool)
+
+# Per-request query counts and timings, and the slow-query log
+if settings.sql_instrumentation:
+    instrument_engine(engine)
+    instrument_engine(async_engine.sync_engine)
+
+# Read replicas for the read-only endpoints; empty unless configured
+replica_set = ReplicaSet(settings.database_replica_urls, POOL_OPTIONS,
+                         check_interval=settings.replica_health_check_seconds,
+                         max_lag_seconds=settings.replica_max_lag_seconds)
+if settings.sql_instrumentation:
+    for replica in replica_set.replicas:
+        instrument_engine(replica.engine)
+        instrument_engine(replica.async_engine.sync_engine)
+# Clients that wrote recently, read from the primary (read-your-writes)
+write_pins = WritePins(settings.read_your_writes_seconds)
 
 # -----------------------------
 # Session Configuration
 # -----------------------------
 # Create a session factory for managing database sessions
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Objects must stay usable after commit: lazy refreshes are not possible in async code
+AsyncSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=async_engine,
+                                 class_=AsyncSession, expire_on_commit=False)
 
 # -----------------------------
 # Base Class for ORM Models
@@ -41,4 +82,19 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    """
+    Dependency to get an async database session.
+
+    Yields:
+        AsyncSession: A SQLAlchemy asyncio database session.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Dependencies for read-only endpoints: a session on a healthy replica, or on
+# the primary for clients that just wrote and when no replica is available
+get_read_db = read_db_dependency(replica_set, write_pins, SessionLocal)
+get_async_read_db = async_read_db_dependency(replica_set, write_pins, AsyncSessionLocal)
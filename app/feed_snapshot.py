@@ -0,0 +1,179 @@
+"""
+Precomputed first pages of the post feed.
+
+Most feed requests are the default first page. When
+`settings.feed_snapshot_enabled` is on, a background thread re-reads the
+first `feed_snapshot_size` posts of every feed order every
+`feed_snapshot_refresh_seconds`, and `get_posts` serves unfiltered requests
+that fall inside that window from memory.
+
+The snapshot is never served when it is older than
+`feed_snapshot_max_staleness_seconds` (e.g. because refreshes are failing);
+those requests, searches, cursors and pages beyond the window all go to the
+live query.
+"""
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+from sqlalchemy.orm import joinedload
+
+from . import models, pagination, schemas
+from .config import settings
+from .database import SessionLocal
+from .post_cache import PostCache
+
+logger = logging.getLogger(__name__)
+
+# Feed orders kept in the snapshot; None is the plain (unsorted) listing
+FEED_ORDERS = (None, schemas.FeedSort.new, schemas.FeedSort.top, schemas.FeedSort.hot)
+
+
+class FeedSnapshot:
+    """
+    In-memory copy of the first posts of each feed order.
+
+    For every order the snapshot keeps the encoded `PostOut` rows and, for
+    the sorted feeds, the cursor following each row so that pages served
+    from memory carry the same `next_cursor` as the live query.
+    """
+
+    def __init__(self, session_factory, size: int, refresh_interval: float,
+                 max_staleness: float, clock=time.monotonic):
+        self.size = size
+        self.refresh_interval = refresh_interval
+        self.max_staleness = max_staleness
+        self._session_factory = session_factory
+        self._clock = clock
+        self._lock = threading.Lock()
+        # order -> (rows, cursor after each row, whether all posts fit)
+        self._feeds: Dict[Optional[schemas.FeedSort], Tuple[List[dict], List[str], bool]] = {}
+        self._taken_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.refreshes = 0
+        self.failures = 0
+        self.served = 0
+        self.fallbacks = 0
+
+    def page(self, sort: Optional[schemas.FeedSort], skip: int,
+             limit: int) -> Optional[Union[List[dict], dict]]:
+        """
+        Returns a feed page from the snapshot, or None to use the live query.
+
+        Args:
+            sort (schemas.FeedSort, optional): Feed order (None for the plain listing).
+            skip (int): Number of posts to skip.
+            limit (int): Number of posts to return.
+
+        Returns:
+            The list of posts (plain listing) or the `PostPage` payload
+            (sorted feed), or None when the request is outside the snapshot
+            or the snapshot is too old.
+        """
+        with self._lock:
+            fresh = self._taken_at is not None and self._clock() - self._taken_at <= self.max_staleness
+            feed = self._feeds.get(sort)
+            if not fresh or feed is None or skip < 0 or limit < 0:
+                self.fallbacks += 1
+                return None
+            rows, cursors, complete = feed
+            if skip + limit > len(rows) and not complete:
+                self.fallbacks += 1
+                return None
+            self.served += 1
+
+        items = rows[skip:skip + limit]
+        if sort is None:
+            return items
+        next_cursor = cursors[skip + limit - 1] if limit > 0 and len(items) == limit else None
+        return {"items": items, "next_cursor": next_cursor}
+
+    def refresh(self) -> None:
+        """
+        Re-reads the first `size` posts of every feed order.
+        """
+        # Age is counted from before the reads, so it never understates staleness
+        taken_at = self._clock()
+        db = self._session_factory()
+        try:
+            feeds = {}
+            for sort in FEED_ORDERS:
+                query = db.query(models.Post, models.Post.vote_count.label("votes")).options(
+                    joinedload(models.Post.owner))
+                if sort is not None:
+                    query, _ = pagination.apply_keyset(query, sort, None)
+                rows = query.limit(self.size).all()
+                cursors = [pagination.encode_cursor(sort, row.Post) for row in rows] if sort else []
+                feeds[sort] = ([PostCache.encode(row) for row in rows], cursors, len(rows) < self.size)
+        finally:
+            db.close()
+
+        with self._lock:
+            self._feeds = feeds
+            self._taken_at = taken_at
+            self.refreshes += 1
+
+    def start(self) -> None:
+        """
+        Takes a first snapshot and starts the background refresh thread.
+        """
+        if self._thread is not None:
+            return
+        self._refresh_logged()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="feed-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the background refresh thread.
+        """
+        thread, self._thread = self._thread, None
+        self._stop.set()
+        if thread is not None:
+            thread.join()
+
+    def clear(self) -> None:
+        """
+        Drops the snapshot; requests use the live query until the next refresh.
+        """
+        with self._lock:
+            self._feeds = {}
+            self._taken_at = None
+
+    def stats(self) -> dict:
+        """
+        Returns snapshot age and served / fallback counters as a dict.
+        """
+        with self._lock:
+            return {
+                "size": self.size,
+                "age_seconds": round(self._clock() - self._taken_at, 3) if self._taken_at is not None else None,
+                "refreshes": self.refreshes,
+                "failures": self.failures,
+                "served": self.served,
+                "fallbacks": self.fallbacks,
+            }
+
+    def _refresh_logged(self) -> None:
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception("Refreshing the feed snapshot failed")
+            with self._lock:
+                self.failures += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.refresh_interval):
+            self._refresh_logged()
+
+
+# Shared snapshot; only refreshed (and used by the routers) when enabled
+feed_snapshot = FeedSnapshot(
+    SessionLocal,
+    size=settings.feed_snapshot_size,
+    refresh_interval=settings.feed_snapshot_refresh_seconds,
+    max_staleness=settings.feed_snapshot_max_staleness_seconds,
+)
@@ -0,0 +1,151 @@
+"""
+Precomputed "hot" ranking of posts.
+
+The hot score of a post is
+
+    log10(max(votes, 1)) + (created_at - HOT_EPOCH) / HOT_DECAY_SECONDS
+
+so a post needs ten times the votes of one `HOT_DECAY_SECONDS` newer to rank
+level with it. Older posts decay because newer posts are born with higher
+scores, so a score never has to change while its vote count does not: it is
+stored in `posts.hot_score`, indexed with the id for `sort=hot`.
+
+Votes only update `posts.vote_count`. `posts.scored_vote_count` remembers the
+count the stored score was computed from, and a background thread rescores
+the posts where the two differ (new posts start at -1), found through a small
+partial index, every `hot_score_refresh_seconds`. Hot rankings therefore lag
+votes and new posts by up to one refresh interval, while vote writes avoid
+moving the post in the hot index on every single vote.
+"""
+import logging
+import threading
+from datetime import datetime, timezone
+
+from sqlalchemy import extract, func, select, update
+
+from . import models
+from .config import settings
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Scores count time from here; keeps the time term small
+HOT_EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+# Age after which a post needs ten times the votes to keep its rank
+HOT_DECAY_SECONDS = 45000
+
+
+def hot_score_expression():
+    """
+    SQL expression computing a post's hot score from its columns.
+    """
+    age = extract("epoch", models.Post.created_at) - HOT_EPOCH.timestamp()
+    return func.log(func.greatest(models.Post.vote_count, 1)) + age / float(HOT_DECAY_SECONDS)
+
+
+def pending_filter():
+    """
+    Filter matching the posts whose stored score is out of date; it is the
+    predicate of the `ix_posts_hot_pending` partial index.
+    """
+    return models.Post.vote_count != models.Post.scored_vote_count
+
+
+def rescore_statement(batch_size: int):
+    """
+    Builds the UPDATE rescoring up to `batch_size` out-of-date posts.
+
+    Rows locked by a concurrent vote are skipped and picked up next time.
+    """
+    pending = select(models.Post.id).where(pending_filter()).limit(batch_size).with_for_update(
+        skip_locked=True).scalar_subquery()
+    return update(models.Post).where(models.Post.id.in_(pending)).values(
+        hot_score=hot_score_expression(), scored_vote_count=models.Post.vote_count).execution_options(
+        synchronize_session=False)
+
+
+class HotScoreRefresher:
+    """
+    Background job keeping `posts.hot_score` up to date.
+    """
+
+    def __init__(self, session_factory, refresh_interval: float, batch_size: int):
+        self.refresh_interval = refresh_interval
+        self.batch_size = batch_size
+        self._session_factory = session_factory
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.runs = 0
+        self.failures = 0
+        self.rescored = 0
+
+    def refresh(self) -> int:
+        """
+        Rescores every out-of-date post, one committed batch at a time.
+
+        Returns:
+            int: Number of posts rescored.
+        """
+        rescored = 0
+        db = self._session_factory()
+        try:
+            while True:
+                count = db.execute(rescore_statement(self.batch_size)).rowcount
+                db.commit()
+                rescored += count
+                if count < self.batch_size:
+                    break
+        finally:
+            db.close()
+
+        with self._lock:
+            self.runs += 1
+            self.rescored += rescored
+        return rescored
+
+    def start(self) -> None:
+        """
+        Starts the background refresh thread.
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="hot-scores", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the background refresh thread.
+        """
+        thread, self._thread = self._thread, None
+        self._stop.set()
+        if thread is not None:
+            thread.join()
+
+    def stats(self) -> dict:
+        """
+        Returns refresh counters as a dict.
+        """
+        with self._lock:
+            return {"runs": self.runs, "failures": self.failures, "rescored": self.rescored}
+
+    def _run(self) -> None:
+        # The first run happens right away so new deployments are scored quickly
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Refreshing hot scores failed")
+                with self._lock:
+                    self.failures += 1
+            if self._stop.wait(self.refresh_interval):
+                return
+
+
+# Shared refresher; started by the application when enabled
+hot_score_refresher = HotScoreRefresher(
+    SessionLocal,
+    refresh_interval=settings.hot_score_refresh_seconds,
+    batch_size=settings.hot_score_batch_size,
+)
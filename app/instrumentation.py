@@ -0,0 +1,239 @@
+"""
+Per-request SQL instrumentation.
+
+Cursor execution events on the engines time every statement. While a request
+is handled by `QueryStatsMiddleware`, the statements are added up in a
+`RequestStats` held in a context variable (which follows the request into the
+threadpool and into SQLAlchemy's async greenlets). The middleware then:
+
+* reports the request's query count, total database time and slowest
+  statement in a `Server-Timing` response header;
+* adds them to per-endpoint histograms, served by `GET /admin/queries`.
+
+Statements slower than `settings.slow_query_threshold_ms` are written to the
+`app.slow_queries` logger as one JSON object per line, whether or not they
+run inside a request (e.g. from the vote buffer or the feed snapshot).
+
+Headers are sent before a streamed body is written, so for streaming
+endpoints the header only covers the statements run before the first byte;
+the histograms cover the whole request.
+"""
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence
+
+from sqlalchemy import event
+
+from .config import settings
+
+slow_query_logger = logging.getLogger("app.slow_queries")
+
+# Upper bounds of the histogram buckets (the last bucket is unbounded)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+DB_TIME_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# Longest statement text kept for the slowest query and the slow-query log
+STATEMENT_MAX_LENGTH = 1000
+
+
+class RequestStats:
+    """
+    Statements executed while handling one request.
+    """
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.queries += 1
+        self.db_seconds += seconds
+        if seconds >= self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+    def server_timing(self) -> str:
+        """
+        Formats the stats as a `Server-Timing` header value.
+        """
+        return (f'db;desc="{self.queries} queries";dur={self.db_seconds * 1000:.3f}, '
+                f'db-slowest;dur={self.slowest_seconds * 1000:.3f}')
+
+
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram (per-bucket, not cumulative, counts).
+    """
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> dict:
+        labels = [f"le_{bound:g}" for bound in self.bounds] + ["inf"]
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 3),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class QueryStats:
+    """
+    Thread-safe per-endpoint aggregate of the request stats.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, dict] = {}
+
+    def record(self, endpoint: str, request: RequestStats) -> None:
+        """
+        Adds a finished request to the endpoint's histograms.
+
+        Args:
+            endpoint (str): Endpoint label, e.g. "GET /posts/{id}".
+            request (RequestStats): Statements of the request.
+        """
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = {
+                    "requests": 0,
+                    "queries": Histogram(QUERY_COUNT_BUCKETS),
+                    "db_time_ms": Histogram(DB_TIME_BUCKETS_MS),
+                    "slowest_ms": 0.0,
+                    "slowest_statement": None,
+                }
+            stats["requests"] += 1
+            stats["queries"].observe(request.queries)
+            stats["db_time_ms"].observe(request.db_seconds * 1000)
+            if request.slowest_seconds * 1000 > stats["slowest_ms"]:
+                stats["slowest_ms"] = request.slowest_seconds * 1000
+                stats["slowest_statement"] = request.slowest_statement
+
+    def snapshot(self) -> dict:
+        """
+        Returns the histograms of every endpoint as a dict.
+        """
+        with self._lock:
+            return {
+                endpoint: {
+                    "requests": stats["requests"],
+                    "queries": stats["queries"].snapshot(),
+                    "db_time_ms": stats["db_time_ms"].snapshot(),
+                    "slowest_ms": round(stats["slowest_ms"], 3),
+                    "slowest_statement": stats["slowest_statement"],
+                }
+                for endpoint, stats in sorted(self._endpoints.items())
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._endpoints = {}
+
+
+# Aggregated stats of this process, served by GET /admin/queries
+query_stats = QueryStats()
+
+
+def _record_statement(statement: str, seconds: float) -> None:
+    request = _current_request.get()
+    slow = 0 <= settings.slow_query_threshold_ms <= seconds * 1000
+    if request is None and not slow:
+        return
+    statement = " ".join(statement.split())[:STATEMENT_MAX_LENGTH]
+    if request is not None:
+        request.record(statement, seconds)
+    if slow:
+        slow_query_logger.warning(json.dumps({
+            "event": "slow_query",
+            "duration_ms": round(seconds * 1000, 3),
+            "threshold_ms": settings.slow_query_threshold_ms,
+            "request": request.label if request is not None else None,
+            "statement": statement,
+        }))
+
+
+def instrument_engine(engine) -> None:
+    """
+    Times the statements executed on an engine.
+
+    Args:
+        engine: A sync `Engine` (for an `AsyncEngine`, its `sync_engine`).
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        _record_statement(statement, time.perf_counter() - conn.info["query_started"].pop())
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        # Failed statements never reach after_cursor_execute
+        started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+        if started:
+            _record_statement(exception_context.statement or "", time.perf_counter() - started.pop())
+
+
+def _endpoint_label(scope) -> str:
+    """
+    Labels a request by its route template ("GET /posts/{id}") rather than
+    the concrete path, so that histograms stay per endpoint.
+    """
+    endpoint = scope.get("endpoint")
+    app = scope.get("app")
+    if endpoint is not None and app is not None:
+        for route in getattr(app, "routes", ()):
+            if getattr(route, "endpoint", None) is endpoint:
+                return f"{scope['method']} {route.path}"
+    return f"{scope['method']} {scope['path'] if endpoint is not None else '<unmatched>'}"
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware collecting the SQL statements of each HTTP request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = RequestStats(f"{scope['method']} {scope['path']}")
+        token = _current_request.set(request)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", request.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_request.reset(token)
+            query_stats.record(_endpoint_label(scope), request)
@@ -2,12 +2,24 @@
 Main application entry point.
 """
 
-from fastapi import FastAPI
+from fastapi import FastAPI, APIRouter
 from fastapi.middleware.cors import CORSMiddleware
-from .routers import post, user, auth, vote
+from fastapi.responses import JSONResponse, ORJSONResponse
+from .config import settings
+from .routers import post, user, auth, vote, admin
+from .routers.aio import post as aio_post, user as aio_user, auth as aio_auth, vote as aio_vote
+from . import utils
+from .database import replica_set, write_pins
+from .feed_snapshot import feed_snapshot
+from .hot_scores import hot_score_refresher
+from .instrumentation import QueryStatsMiddleware
+from .replicas import ReadYourWritesMiddleware
+from .vote_buffer import vote_buffer
+from .vote_stream import vote_hub
 
 
-app = FastAPI(title="FastAPI Posts API", version="1.0")
+app = FastAPI(title="FastAPI Posts API", version="1.0",
+              default_response_class=ORJSONResponse if settings.fast_json_responses else JSONResponse)
 
 origins = ["*"]
 
@@ -19,10 +31,128 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.include_router(post.router)
-app.include_router(user.router)
-app.include_router(auth.router)
-app.include_router(vote.router)
+if settings.sql_instrumentation:
+    app.add_middleware(QueryStatsMiddleware)
+
+if replica_set.replicas:
+    app.add_middleware(ReadYourWritesMiddleware, pins=write_pins)
+
+
+def _include_routers(app: FastAPI, routers) -> None:
+    """
+    Includes routers in order, skipping any route whose path and methods are
+    already served by a router included earlier.
+
+    This lets the async routers take over the endpoints they implement while
+    endpoints that only exist in the sync routers keep being served.
+    """
+    taken = set()
+    for router in routers:
+        remaining = APIRouter()
+        for route in router.routes:
+            key = (route.path, frozenset(getattr(route, "methods", None) or ()))
+            if key not in taken:
+                taken.add(key)
+                remaining.routes.append(route)
+        app.include_router(remaining)
+
+
+sync_routers = [post.router, user.router, auth.router, vote.router, admin.router]
+async_routers = [aio_post.router, aio_user.router, aio_auth.router, aio_vote.router]
+
+_include_routers(app, async_routers + sync_routers if settings.database_async else sync_routers)
+
+
+@app.on_event("startup")
+def start_vote_buffer():
+    """
+    Starts flushing buffered votes when the vote buffer is enabled.
+    """
+    if settings.vote_buffer_enabled:
+        vote_buffer.start()
+
+
+@app.on_event("shutdown")
+def stop_vote_buffer():
+    """
+    Writes out the votes still buffered before the process exits.
+    """
+    if settings.vote_buffer_enabled:
+        vote_buffer.stop()
+
+
+@app.on_event("startup")
+def start_feed_snapshot():
+    """
+    Starts refreshing the feed snapshot when it is enabled.
+    """
+    if settings.feed_snapshot_enabled:
+        feed_snapshot.start()
+
+
+@app.on_event("shutdown")
+def stop_feed_snapshot():
+    """
+    Stops the feed snapshot refresher.
+    """
+    feed_snapshot.stop()
+
+
+@app.on_event("startup")
+def start_hot_score_refresher():
+    """
+    Starts rescoring posts for the hot feed when enabled.
+    """
+    if settings.hot_score_refresh_enabled:
+        hot_score_refresher.start()
+
+
+@app.on_event("shutdown")
+def stop_hot_score_refresher():
+    """
+    Stops the hot score refresher.
+    """
+    hot_score_refresher.stop()
+
+
+@app.on_event("startup")
+def start_vote_hub():
+    """
+    Starts broadcasting vote counts to the live vote streams.
+    """
+    vote_hub.start()
+
+
+@app.on_event("shutdown")
+def stop_vote_hub():
+    """
+    Stops the vote count broadcaster.
+    """
+    vote_hub.stop()
+
+
+@app.on_event("startup")
+def start_replica_checks():
+    """
+    Starts the health checks of the read replicas, if any are configured.
+    """
+    replica_set.start()
+
+
+@app.on_event("shutdown")
+def stop_replica_checks():
+    """
+    Stops the read replica health checks.
+    """
+    replica_set.stop()
+
+
+@app.on_event("shutdown")
+def stop_auth_pool():
+    """
+    Stops the password hashing worker processes.
+    """
+    utils.shutdown_pool()
 
 
 @app.get("/")
@@ -1,8 +1,9 @@
 """
 SQLAlchemy database models.
 """
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Computed, Float, Integer, String, Boolean, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql.expression import text
 from sqlalchemy.sql.sqltypes import TIMESTAMP
 
@@ -23,9 +24,34 @@ class Post(Base):
                         nullable=False, server_default=text('now()'))
     owner_id = Column(Integer, ForeignKey(
         "users.id", ondelete="CASCADE"), nullable=False)
+    # Denormalized number of rows in `votes` for this post. Maintained by the
+    # vote router in the same transaction as the vote itself.
+    vote_count = Column(Integer, server_default='0', nullable=False)
+    # Precomputed "hot" ranking score (see app/hot_scores.py) and the vote
+    # count it was computed from; rows where the two counts differ (new posts
+    # start at -1) are rescored by the background refresher.
+    hot_score = Column(Float, server_default='0', nullable=False)
+    scored_vote_count = Column(Integer, server_default='-1', nullable=False)
+    # Full-text search document, generated by PostgreSQL from title and content.
+    # Deferred so that regular post queries do not load it.
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        "to_tsvector('english', coalesce(title, '') || ' ' || coalesce(content, ''))",
+        persisted=True)))
 
     owner = relationship("Users")
 
+    __table_args__ = (
+        # Keyset pagination of the feed (see app/pagination.py)
+        Index("ix_posts_created_at_id", "created_at", "id"),
+        Index("ix_posts_vote_count_id", "vote_count", "id"),
+        Index("ix_posts_hot_score_id", "hot_score", "id"),
+        # Small partial index of the posts waiting to be rescored
+        Index("ix_posts_hot_pending", "id", postgresql_where=text("vote_count <> scored_vote_count")),
+        Index("ix_posts_search_vector", "search_vector", postgresql_using="gin"),
+        # Posts of a user, for the cascade when the user is deleted
+        Index("ix_posts_owner_id", "owner_id"),
+    )
+
 
 class Users(Base):
     """
@@ -47,4 +73,10 @@ class Vote(Base):
     user_id = Column(Integer, ForeignKey(
         "users.id", ondelete="CASCADE"), primary_key=True)
     post_id = Column(Integer, ForeignKey(
-        "posts.id", ondelete="CASCADE"), primary_key=True)
\ No newline at end of file
+        "posts.id", ondelete="CASCADE"), primary_key=True)
+
+    __table_args__ = (
+        # The primary key starts with user_id; per-post lookups (vote counts,
+        # the cascade when a post is deleted) need their own index
+        Index("ix_votes_post_id", "post_id"),
+    )
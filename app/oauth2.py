@@ -1,12 +1,18 @@
 """
 OAuth2 authentication and token management.
 """
+import threading
+import time
 from datetime import datetime, timedelta
+from typing import Dict, Optional
 from jose import JWTError, jwt
 from fastapi import Depends, status, HTTPException
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from . import schemas, database, models
+from .cache import TTLCache
 from .config import settings
 
 SECRET_KEY = settings.SECRET_KEY
@@ -15,6 +21,14 @@ ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+# Verified token -> (TokenData, user snapshot, user generation). Saves the
+# JWT decode and the users lookup for repeated requests with the same token.
+token_cache = TTLCache(maxsize=settings.token_cache_size, ttl=settings.token_cache_ttl_seconds)
+
+# Bumped by `invalidate_user`; cached entries from an older generation are stale
+_user_generations: Dict[int, int] = {}
+_user_generations_lock = threading.Lock()
+
 def create_access_token(data: dict) -> str:
     """
     Creates a new access token.
@@ -63,7 +77,55 @@ def verify_access_token(token: str, credentials_exception: HTTPException) -> sch
 
     return token_data
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)) -> models.Users:
+def _credentials_exception() -> HTTPException:
+    """
+    Builds the 401 raised for any invalid or missing credentials.
+    """
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def invalidate_user(user_id: int) -> None:
+    """
+    Invalidates every cached authentication of a user.
+
+    Called automatically when a user row is deleted or its email/password is
+    changed through the ORM; call it directly after bulk updates or deletes.
+    Other worker processes keep their entries until the cache TTL expires.
+
+    Args:
+        user_id (int): ID of the user whose tokens must be re-validated.
+    """
+    with _user_generations_lock:
+        _user_generations[user_id] = _user_generations.get(user_id, 0) + 1
+
+def _get_cached_user(token: str) -> Optional[schemas.UserOut]:
+    """
+    Returns the cached user snapshot for a token, if still valid.
+    """
+    entry = token_cache.get(token)
+    if entry is None:
+        return None
+    _, user, generation = entry
+    if _user_generations.get(user.id, 0) != generation:
+        token_cache.delete(token)
+        return None
+    return user
+
+def _cache_user(token: str, token_data: schemas.TokenData, user: models.Users) -> schemas.UserOut:
+    """
+    Caches a verified token with a snapshot of its user, never past the token's `exp`.
+    """
+    snapshot = schemas.UserOut.from_orm(user)
+    expires_at = jwt.get_unverified_claims(token).get("exp")
+    if expires_at is not None:
+        token_cache.set(token, (token_data, snapshot, _user_generations.get(user.id, 0)),
+                        ttl=expires_at - time.time())
+    return snapshot
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)) -> schemas.UserOut:
     """
     Dependency to get the current authenticated user.
 
@@ -72,20 +134,78 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         db (Session): The database session.
 
     Returns:
-        models.Users: The authenticated user object.
+        schemas.UserOut: Snapshot of the authenticated user.
 
     Raises:
         HTTPException: If credentials are invalid.
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    cached = _get_cached_user(token)
+    if cached is not None:
+        return cached
+
+    credentials_exception = _credentials_exception()
 
     # Verify the token and get the user ID
     token_data = verify_access_token(token, credentials_exception)
     
     # Query the database for the user
     user = db.query(models.Users).filter(models.Users.id == token_data.id).first()
-    return user
\ No newline at end of file
+    if user is None:
+        raise credentials_exception
+    return _cache_user(token, token_data, user)
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(database.get_async_db)) -> schemas.UserOut:
+    """
+    Async variant of `get_current_user` used by the async routers.
+
+    Args:
+        token (str): The JWT token.
+        db (AsyncSession): The async database session.
+
+    Returns:
+        schemas.UserOut: Snapshot of the authenticated user.
+
+    Raises:
+        HTTPException: If credentials are invalid.
+    """
+    cached = _get_cached_user(token)
+    if cached is not None:
+        return cached
+
+    credentials_exception = _credentials_exception()
+    token_data = verify_access_token(token, credentials_exception)
+
+    # asyncpg does not coerce the string id from the token the way psycopg2 does
+    result = await db.execute(select(models.Users).filter(models.Users.id == int(token_data.id)))
+    user = result.scalars().first()
+    if user is None:
+        raise credentials_exception
+    return _cache_user(token, token_data, user)
+
+def get_current_admin(current_user: schemas.UserOut = Depends(get_current_user)) -> schemas.UserOut:
+    """
+    Dependency restricting an endpoint to the users listed in `settings.admin_emails`.
+
+    Args:
+        current_user (schemas.UserOut): Authenticated user.
+
+    Returns:
+        schemas.UserOut: Snapshot of the authenticated admin user.
+
+    Raises:
+        HTTPException: 401 if credentials are invalid, 403 if the user is not an admin.
+    """
+    if current_user.email.lower() not in {email.lower() for email in settings.admin_emails}:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="Not authorized to perform requested action")
+    return current_user
+
+@event.listens_for(models.Users, "after_delete")
+def _invalidate_deleted_user(mapper, connection, target):
+    invalidate_user(target.id)
+
+@event.listens_for(models.Users, "after_update")
+def _invalidate_changed_credentials(mapper, connection, target):
+    state = inspect(target)
+    if state.attrs.password.history.has_changes() or state.attrs.email.history.has_changes():
+        invalidate_user(target.id)
@@ -0,0 +1,116 @@
+"""
+Keyset (cursor) pagination for the post feed.
+
+A cursor is an opaque, URL-safe token holding the sort order and the sort key
+of the last post on the previous page. The next page is then fetched with a
+row comparison such as `(created_at, id) < (:created_at, :id)`, which walks an
+index from that point instead of scanning and discarding `skip` rows.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import tuple_
+
+from . import models
+from .schemas import FeedSort
+
+# Sort order -> (leading sort column, parser for its value in a cursor).
+# `posts.id` is always appended as a tie-breaker so the key is unique.
+SORT_KEYS = {
+    FeedSort.new: (models.Post.created_at, datetime.fromisoformat),
+    FeedSort.top: (models.Post.vote_count, int),
+    FeedSort.hot: (models.Post.hot_score, float),
+}
+
+
+def encode_cursor(sort: FeedSort, post: models.Post) -> str:
+    """
+    Builds the cursor pointing just after `post` in the given sort order.
+
+    Args:
+        sort (FeedSort): The feed's sort order.
+        post (models.Post): Last post of the current page.
+
+    Returns:
+        str: Opaque cursor for the next page.
+    """
+    column, _ = SORT_KEYS[sort]
+    value = getattr(post, column.key)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort.value, value, post.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[FeedSort, tuple]:
+    """
+    Parses a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor (str): Opaque cursor.
+
+    Returns:
+        Tuple[FeedSort, tuple]: Sort order and the (sort value, post id) key.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort, value, post_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        sort = FeedSort(sort)
+        _, parse = SORT_KEYS[sort]
+        return sort, (parse(value), int(post_id))
+    except (TypeError, KeyError, ValueError) as error:
+        raise ValueError(f"invalid cursor: {cursor!r}") from error
+
+
+def apply_keyset(query, sort: Optional[FeedSort], cursor: Optional[str]):
+    """
+    Orders a feed query by the sort key and, when a cursor is given, restricts
+    it to the posts after that cursor.
+
+    Works for both `Session.query()` objects and `select()` statements.
+
+    Args:
+        query: Query or select over `models.Post`.
+        sort (FeedSort, optional): Requested order; defaults to the cursor's order.
+        cursor (str, optional): Cursor returned with the previous page.
+
+    Returns:
+        Tuple: The restricted query and the effective sort order.
+
+    Raises:
+        ValueError: If the cursor is malformed or belongs to a different sort order.
+    """
+    key = None
+    if cursor:
+        cursor_sort, key = decode_cursor(cursor)
+        if sort is not None and sort != cursor_sort:
+            raise ValueError("cursor was issued for a different sort order")
+        sort = cursor_sort
+    sort = sort or FeedSort.new
+
+    column, _ = SORT_KEYS[sort]
+    if key is not None:
+        query = query.filter(tuple_(column, models.Post.id) < tuple_(*key))
+    return query.order_by(column.desc(), models.Post.id.desc()), sort
+
+
+def next_cursor(rows, sort: FeedSort, limit: int) -> Optional[str]:
+    """
+    Cursor for the page after `rows`, or None when this was the last page.
+
+    Args:
+        rows: Feed rows (each with a `Post` attribute) of the current page.
+        sort (FeedSort): Sort order of the page.
+        limit (int): Requested page size.
+
+    Returns:
+        Optional[str]: Cursor for the next page.
+    """
+    if limit <= 0 or len(rows) < limit:
+        return None
+    return encode_cursor(sort, rows[-1].Post)
@@ -0,0 +1,147 @@
+"""
+Connection pool instrumentation.
+
+Live occupancy (checked out / idle / overflow) is read straight from the pool,
+while checkout wait times, timeouts and connection churn are collected from
+pool events and a timed `connect()`.
+"""
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolMetrics:
+    """
+    Thread-safe counters for one connection pool.
+    """
+
+    def __init__(self, recent_waits: int = 1000):
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=recent_waits)
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+
+    def record_wait(self, seconds: float) -> None:
+        """
+        Records how long a checkout waited before it got a connection.
+        """
+        with self._lock:
+            self._waits.append(seconds)
+            self.wait_count += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def record_timeout(self) -> None:
+        """
+        Records a checkout that gave up after `pool_timeout`.
+        """
+        with self._lock:
+            self.timeouts += 1
+
+    def record_connect(self) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidation(self) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self, pool) -> dict:
+        """
+        Combines the collected counters with the pool's live occupancy.
+
+        Args:
+            pool: The pool these metrics belong to.
+
+        Returns:
+            dict: JSON-serializable metrics.
+        """
+        with self._lock:
+            recent = sorted(self._waits)
+            waits = {
+                "count": self.wait_count,
+                "avg_ms": round(self.wait_total / self.wait_count * 1000, 3) if self.wait_count else 0.0,
+                "max_ms": round(self.wait_max * 1000, 3),
+                "p95_recent_ms": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))] * 1000, 3) if recent else 0.0,
+                "timeouts": self.timeouts,
+            }
+            connects, invalidations = self.connects, self.invalidations
+
+        return {
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            # QueuePool reports overflow relative to pool_size, so it is
+            # negative until the pool is full; only report real overflow
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "connects": connects,
+            "invalidations": invalidations,
+            "checkout_wait": waits,
+        }
+
+
+class _TimedPoolMixin:
+    """
+    Times every checkout so that waits for a free connection are visible.
+    """
+    metrics: PoolMetrics = None
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_wait(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a new pool instance; keep counting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    """
+    `QueuePool` for the sync engine that records checkout waits.
+    """
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    """
+    `AsyncAdaptedQueuePool` for the async engine that records checkout waits.
+    """
+
+
+def instrument(pool) -> PoolMetrics:
+    """
+    Attaches a `PoolMetrics` to a pool created with one of the timed pool classes.
+
+    Args:
+        pool: `engine.pool` (or `async_engine.sync_engine.pool`).
+
+    Returns:
+        PoolMetrics: The metrics collected for that pool.
+    """
+    metrics = PoolMetrics()
+    pool.metrics = metrics
+
+    @event.listens_for(pool, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        metrics.record_connect()
+
+    @event.listens_for(pool, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.record_invalidation()
+
+    return metrics
@@ -0,0 +1,312 @@
+"""
+Read-through cache of single posts (`GET /posts/{id}`).
+
+Entries are the JSON-ready `schemas.PostOut` of a post. They are dropped
+after every committed change of the post: update, delete and vote. Votes
+drop the entry rather than patch in their count, as concurrent votes may
+reach the cache in another order than they committed in. A cache miss is loaded once per post and process (single flight),
+and with an external store a short lock key keeps the other processes from
+loading the same post at the same time.
+
+The store is the in-process `TTLCache` by default, or any Redis-compatible
+client (`get`, `set(..., ex=, nx=)`, `delete`) with
+`settings.post_cache_backend = "redis"`. The calls to such a store are
+blocking network round trips: the async entry points run them in the
+threadpool, and no lock of the cache is held while one is in progress.
+"""
+import asyncio
+import json
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Iterable, Optional
+
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+
+from . import schemas
+from .cache import TTLCache
+from .config import settings
+
+
+class MemoryBackend:
+    """
+    Stores entries in an in-process `TTLCache`.
+    """
+    blocking = False
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key: str) -> Optional[dict]:
+        return self.cache.get(key)
+
+    def set(self, key: str, value: dict) -> None:
+        self.cache.set(key, value)
+
+    def delete(self, key: str) -> None:
+        self.cache.delete(key)
+
+    def lock(self, key: str, ttl: float) -> bool:
+        # Loads are already single-flight within the process
+        return True
+
+    def unlock(self, key: str) -> None:
+        pass
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+    def stats(self) -> dict:
+        stats = self.cache.stats()
+        return {"backend": "memory", "size": stats["size"], "maxsize": stats["maxsize"],
+                "evictions": stats["evictions"]}
+
+
+class ExternalBackend:
+    """
+    Stores JSON-encoded entries in a Redis-compatible key-value store shared
+    by all server processes.
+    """
+    blocking = True
+
+    def __init__(self, client, ttl: float, prefix: str = "post:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[dict]:
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: dict) -> None:
+        self.client.set(self.prefix + key, json.dumps(value), ex=max(1, int(self.ttl)))
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+    def lock(self, key: str, ttl: float) -> bool:
+        return bool(self.client.set(self.prefix + key + ":lock", "1", nx=True, ex=max(1, int(ttl))))
+
+    def unlock(self, key: str) -> None:
+        self.client.delete(self.prefix + key + ":lock")
+
+    def clear(self) -> None:
+        # Entries of a shared store expire on their own
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": "external"}
+
+
+class PostCache:
+    """
+    Read-through cache with single-flight loading and per-post generations.
+
+    Every invalidation bumps the post's generation; a load that started
+    before the bump does not store its (possibly stale) result.
+    """
+
+    def __init__(self, backend, lock_timeout: float = 2.0):
+        self.backend = backend
+        self.lock_timeout = lock_timeout
+        self._lock = threading.Lock()
+        self._inflight: Dict[int, threading.Event] = {}
+        self._inflight_async: Dict[int, asyncio.Future] = {}
+        self._generations: Dict[int, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def encode(row) -> dict:
+        """
+        Converts a `(Post, votes)` row into the cached `PostOut` payload.
+        """
+        return jsonable_encoder(schemas.PostOut.parse_obj({"Post": row[0], "votes": row[1]}))
+
+    def get_or_load(self, post_id: int, loader: Callable[[], Optional[dict]],
+                    store: bool = True) -> Optional[dict]:
+        """
+        Returns the cached post, calling `loader` (once per process) on a miss.
+
+        Args:
+            post_id (int): ID of the post.
+            loader (Callable): Returns the encoded post, or None if it does not exist.
+            store (bool): Whether the loaded post may be cached; False for
+                loads that may be stale, e.g. from a read replica.
+
+        Returns:
+            Optional[dict]: The encoded post, or None if it does not exist.
+        """
+        value = self._lookup(post_id)
+        if value is not None:
+            return value
+        if not store:
+            return loader()
+
+        with self._lock:
+            event = self._inflight.get(post_id)
+            leader = event is None
+            if leader:
+                event = self._inflight[post_id] = threading.Event()
+                generation = self._generations.get(post_id, 0)
+            else:
+                self.coalesced += 1
+        if not leader:
+            event.wait(self.lock_timeout)
+            return self._peek(post_id) or loader()
+
+        locked = False
+        try:
+            locked = self.backend.lock(str(post_id), self.lock_timeout)
+            if not locked:
+                value = self._wait_for_other_process(post_id)
+                if value is not None:
+                    return value
+            return self._load(post_id, loader(), generation)
+        finally:
+            if locked:
+                self.backend.unlock(str(post_id))
+            with self._lock:
+                del self._inflight[post_id]
+            event.set()
+
+    async def get_or_load_async(self, post_id: int, loader: Callable[[], Awaitable[Optional[dict]]],
+                                store: bool = True) -> Optional[dict]:
+        """
+        Async variant of `get_or_load` for the async routers.
+        """
+        value = await self._call(self._lookup, post_id)
+        if value is not None:
+            return value
+        if not store:
+            return await loader()
+
+        with self._lock:
+            pending = self._inflight_async.get(post_id)
+            if pending is None:
+                pending = self._inflight_async[post_id] = asyncio.get_running_loop().create_future()
+                generation = self._generations.get(post_id, 0)
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+        if not leader:
+            return await asyncio.shield(pending)
+
+        locked = False
+        try:
+            locked = await self._call(self.backend.lock, str(post_id), self.lock_timeout)
+            if not locked:
+                deadline = time.monotonic() + self.lock_timeout
+                while value is None and time.monotonic() < deadline:
+                    await asyncio.sleep(0.01)
+                    value = await self._call(self._peek, post_id)
+            if value is None:
+                value = await self._call(self._load, post_id, await loader(), generation)
+            pending.set_result(value)
+            return value
+        except BaseException as error:
+            pending.set_exception(error)
+            # Nobody may be waiting; do not warn about an unretrieved exception
+            pending.exception()
+            raise
+        finally:
+            with self._lock:
+                del self._inflight_async[post_id]
+            if locked:
+                await self._call(self.backend.unlock, str(post_id))
+
+    def invalidate(self, post_ids: Iterable[int]) -> None:
+        """
+        Drops the cached entries of `post_ids` (after their change is committed).
+        """
+        for post_id in post_ids:
+            self._bump(post_id)
+            self.backend.delete(str(post_id))
+
+    async def invalidate_async(self, post_ids: Iterable[int]) -> None:
+        """
+        Async variant of `invalidate` for the async routers.
+        """
+        await self._call(self.invalidate, list(post_ids))
+
+    def clear(self) -> None:
+        """
+        Drops every entry of the in-process store.
+        """
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters, single-flight savings and store details.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                **self.backend.stats(),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "loads": self.loads,
+                "coalesced": self.coalesced,
+            }
+
+    async def _call(self, function: Callable, *args):
+        # Calls into a network store would block the event loop
+        if self.backend.blocking:
+            return await run_in_threadpool(function, *args)
+        return function(*args)
+
+    def _bump(self, post_id: int) -> int:
+        with self._lock:
+            generation = self._generations[post_id] = self._generations.get(post_id, 0) + 1
+        return generation
+
+    def _is_current(self, post_id: int, generation: int) -> bool:
+        with self._lock:
+            return self._generations.get(post_id, 0) == generation
+
+    def _lookup(self, post_id: int) -> Optional[dict]:
+        value = self.backend.get(str(post_id))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def _peek(self, post_id: int) -> Optional[dict]:
+        return self.backend.get(str(post_id))
+
+    def _wait_for_other_process(self, post_id: int) -> Optional[dict]:
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.01)
+            value = self._peek(post_id)
+            if value is not None:
+                return value
+        return None
+
+    def _load(self, post_id: int, value: Optional[dict], generation: int) -> Optional[dict]:
+        with self._lock:
+            self.loads += 1
+        if value is not None and self._is_current(post_id, generation):
+            self.backend.set(str(post_id), value)
+            # Invalidated while being stored
+            if not self._is_current(post_id, generation):
+                self.backend.delete(str(post_id))
+        return value
+
+
+def _make_backend():
+    if settings.post_cache_backend == "redis":
+        # Optional dependency, only needed for the shared store
+        import redis
+        return ExternalBackend(redis.Redis.from_url(settings.post_cache_redis_url),
+                               ttl=settings.post_cache_ttl_seconds)
+    return MemoryBackend(maxsize=settings.post_cache_size, ttl=settings.post_cache_ttl_seconds)
+
+
+post_cache = PostCache(_make_backend())
@@ -0,0 +1,108 @@
+"""
+Post update / delete statements shared by the sync and async post routers.
+
+Each write is a single statement. A CTE looks the post up, a second
+data-modifying CTE updates or deletes it only if it belongs to the current
+user, and the outer select joins both:
+
+    WITH target AS (SELECT owner_id FROM posts WHERE id = :id),
+         changed AS (UPDATE posts SET ... WHERE id = :id AND owner_id = :uid RETURNING ...)
+    SELECT target.owner_id, changed.* FROM target LEFT OUTER JOIN changed ON true
+
+No row means the post does not exist; a row without the changed columns
+means it belongs to someone else.
+"""
+from fastapi import HTTPException, status
+from sqlalchemy import delete, select, true, update
+
+from . import models
+
+# Columns returned by an update, i.e. `schemas.Post` without the owner
+POST_COLUMNS = (
+    models.Post.id,
+    models.Post.title,
+    models.Post.content,
+    models.Post.published,
+    models.Post.created_at,
+    models.Post.owner_id,
+)
+
+
+def _outcome(post_id: int, changed):
+    target = select(models.Post.owner_id.label("target_owner_id")).where(
+        models.Post.id == post_id).cte("target")
+    changed = changed.cte("changed")
+    return select(target.c.target_owner_id, changed).select_from(target.outerjoin(changed, true()))
+
+
+def update_statement(post_id: int, user_id: int, values: dict):
+    """
+    Builds the single statement updating a post owned by `user_id`.
+
+    Args:
+        post_id (int): ID of the post.
+        user_id (int): ID of the current user.
+        values (dict): New column values.
+
+    Returns:
+        Select: Returns the target's owner and the updated post columns.
+    """
+    return _outcome(post_id, update(models.Post).where(
+        models.Post.id == post_id, models.Post.owner_id == user_id).values(**values).returning(*POST_COLUMNS))
+
+
+def delete_statement(post_id: int, user_id: int):
+    """
+    Builds the single statement deleting a post owned by `user_id`.
+
+    Args:
+        post_id (int): ID of the post.
+        user_id (int): ID of the current user.
+
+    Returns:
+        Select: Returns the target's owner and the deleted post's id.
+    """
+    return _outcome(post_id, delete(models.Post).where(
+        models.Post.id == post_id, models.Post.owner_id == user_id).returning(models.Post.id))
+
+
+def check_outcome(row, post_id: int):
+    """
+    Turns the result row of an update / delete statement into an error.
+
+    Args:
+        row: Row returned by the statement, or None.
+        post_id (int): ID of the post.
+
+    Returns:
+        The row, when the write happened.
+
+    Raises:
+        HTTPException: 404 if the post does not exist, 403 if it belongs to another user.
+    """
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f"post with id: {post_id} does not exist")
+    if row.id is None:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="Not authorized to perform requested action")
+    return row
+
+
+def post_out(row, owner) -> dict:
+    """
+    Builds the `schemas.Post` payload of an updated post.
+
+    Args:
+        row: Row returned by `update_statement`.
+        owner (schemas.UserOut): The post's owner (the current user).
+    """
+    return {
+        "title": row.title,
+        "content": row.content,
+        "published": row.published,
+        "id": row.id,
+        "created_at": row.created_at,
+        "owner_id": row.owner_id,
+        "owner": owner,
+    }
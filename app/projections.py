@@ -0,0 +1,168 @@
+"""
+Read-only column projection of the post feed.
+
+With `settings.feed_projection` on, list endpoints select just the columns
+`schemas.PostOut` needs as plain Core rows, so no `Post` / `Users` entities
+are built or tracked in the session's identity map, and the rows are
+streamed into the response one by one as JSON instead of being collected,
+validated and encoded as a whole.
+
+`GET /posts/export` uses the same approach to stream the whole posts table
+as newline-delimited JSON.
+"""
+from typing import AsyncIterator, Iterable, Iterator, Optional
+
+import orjson
+from sqlalchemy import select
+
+from . import models, pagination
+from .schemas import FeedSort
+
+# Rows fetched from the database per round trip while streaming
+STREAM_BATCH_SIZE = 500
+
+
+def feed_statement():
+    """
+    Select of the feed columns, joined with the owner.
+
+    The post columns keep their names (`id`, `created_at`, `vote_count`,
+    `hot_score`), so the rows can be passed to `pagination.encode_cursor`
+    like a `Post`.
+    """
+    return select(
+        models.Post.id,
+        models.Post.title,
+        models.Post.content,
+        models.Post.published,
+        models.Post.created_at,
+        models.Post.owner_id,
+        models.Post.vote_count,
+        models.Post.hot_score,
+        models.Users.email.label("owner_email"),
+        models.Users.created_at.label("owner_created_at"),
+    ).join(models.Users, models.Users.id == models.Post.owner_id)
+
+
+def export_statement(sort: Optional[FeedSort] = None):
+    """
+    Select of the exported post columns, in primary key order or in the
+    given feed order.
+    """
+    statement = select(
+        models.Post.id,
+        models.Post.title,
+        models.Post.content,
+        models.Post.published,
+        models.Post.created_at,
+        models.Post.owner_id,
+        models.Post.vote_count,
+    )
+    if sort is None:
+        return statement.order_by(models.Post.id)
+    statement, _ = pagination.apply_keyset(statement, sort, None)
+    return statement
+
+
+def export_row(row) -> bytes:
+    """
+    Serializes an `export_statement` row as one NDJSON line.
+    """
+    return orjson.dumps({
+        "id": row.id,
+        "title": row.title,
+        "content": row.content,
+        "published": row.published,
+        "created_at": row.created_at,
+        "owner_id": row.owner_id,
+        "votes": row.vote_count,
+    }, option=orjson.OPT_APPEND_NEWLINE)
+
+
+def row_out(row) -> dict:
+    """
+    Serializes a `feed_statement` row like `schemas.PostOut`.
+    """
+    return {
+        "Post": {
+            "title": row.title,
+            "content": row.content,
+            "published": row.published,
+            "id": row.id,
+            "created_at": row.created_at,
+            "owner_id": row.owner_id,
+            "owner": {"id": row.owner_id, "email": row.owner_email, "created_at": row.owner_created_at},
+        },
+        "votes": row.vote_count,
+    }
+
+
+class _FeedWriter:
+    """
+    Emits the JSON of a feed response piece by piece: a bare list, or a
+    `PostPage` whose `next_cursor` is derived from the last row seen.
+    """
+
+    def __init__(self, sort: Optional[FeedSort], limit: int):
+        self.sort = sort
+        self.limit = limit
+        self.count = 0
+        self.last = None
+
+    def start(self) -> bytes:
+        return b"[" if self.sort is None else b'{"items":['
+
+    def item(self, row) -> bytes:
+        chunk = orjson.dumps(row_out(row))
+        if self.count:
+            chunk = b"," + chunk
+        self.count += 1
+        self.last = row
+        return chunk
+
+    def end(self) -> bytes:
+        if self.sort is None:
+            return b"]"
+        next_cursor = None
+        if self.limit > 0 and self.count >= self.limit:
+            next_cursor = pagination.encode_cursor(self.sort, self.last)
+        return b'],"next_cursor":' + orjson.dumps(next_cursor) + b"}"
+
+
+def stream_feed(rows: Iterable, sort: Optional[FeedSort], limit: int) -> Iterator[bytes]:
+    """
+    Streams feed rows as the JSON of the plain listing (`sort` None) or of a
+    `PostPage`.
+    """
+    writer = _FeedWriter(sort, limit)
+    yield writer.start()
+    for row in rows:
+        yield writer.item(row)
+    yield writer.end()
+
+
+async def stream_feed_async(rows: AsyncIterator, sort: Optional[FeedSort], limit: int) -> AsyncIterator[bytes]:
+    """
+    Async variant of `stream_feed` for rows from `AsyncSession.stream`.
+    """
+    writer = _FeedWriter(sort, limit)
+    yield writer.start()
+    async for row in rows:
+        yield writer.item(row)
+    yield writer.end()
+
+
+def stream_export(rows: Iterable) -> Iterator[bytes]:
+    """
+    Streams export rows as NDJSON, one post per line.
+    """
+    for row in rows:
+        yield export_row(row)
+
+
+async def stream_export_async(rows: AsyncIterator) -> AsyncIterator[bytes]:
+    """
+    Async variant of `stream_export` for rows from `AsyncSession.stream`.
+    """
+    async for row in rows:
+        yield export_row(row)
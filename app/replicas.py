@@ -0,0 +1,263 @@
+"""
+Read-replica routing.
+
+With `settings.database_replica_urls` set, read-only endpoints take their
+session from `database.get_read_db` / `get_async_read_db`, which hand out
+sessions on the healthy replicas in round-robin order and fall back to the
+primary when none is healthy.
+
+Health: a background thread runs `SELECT 1` (and, on a streaming replica,
+measures replay lag) on every replica every `replica_health_check_seconds`;
+a replica that fails, lags more than `replica_max_lag_seconds`, or loses a
+connection while serving a request is skipped until a later check passes.
+
+Read-your-writes: after a successful write (any non-GET request) a client,
+identified by its `Authorization` header, reads from the primary for
+`read_your_writes_seconds`, so it always sees its own changes. The pins are
+kept per process; with several workers behind a load balancer this needs
+sticky sessions or a window longer than the replication lag. Shared caches
+must only be filled from the primary (see `is_replica_session`), or a
+replica's stale row could be served to a pinned client from the cache.
+"""
+import logging
+import threading
+import time
+from typing import Callable, List, Optional
+
+from fastapi import Request
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from .cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Methods that never count as writes for read-your-writes
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Replication lag of a streaming replica; NULL (no lag) on a primary
+LAG_QUERY = text("""
+    SELECT CASE WHEN pg_is_in_recovery()
+                THEN coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+                ELSE 0 END
+""")
+
+
+class Replica:
+    """
+    One read replica: its engines, session factories and health.
+    """
+
+    def __init__(self, url: str, engine_options: dict):
+        self.url = make_url(url)
+        self.engine = create_engine(self.url, **engine_options)
+        self.async_engine = create_async_engine(self.url.set(drivername="postgresql+asyncpg"), **engine_options)
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.async_session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.async_engine,
+                                                  class_=AsyncSession, expire_on_commit=False)
+        self.healthy = True
+        self.lag_seconds: Optional[float] = None
+        self.failures = 0
+        self.reads = 0
+
+        # A dropped connection takes the replica out until the next passing check
+        for sync_engine in (self.engine, self.async_engine.sync_engine):
+            event.listen(sync_engine, "handle_error", self._on_error)
+
+    def _on_error(self, exception_context) -> None:
+        if exception_context.is_disconnect:
+            self.healthy = False
+
+    def stats(self) -> dict:
+        return {
+            "url": self.url.render_as_string(hide_password=True),
+            "healthy": self.healthy,
+            "lag_seconds": self.lag_seconds,
+            "failures": self.failures,
+            "reads": self.reads,
+        }
+
+
+class ReplicaSet:
+    """
+    The configured replicas, chosen round-robin among the healthy ones.
+    """
+
+    def __init__(self, urls: List[str], engine_options: dict, check_interval: float, max_lag_seconds: float):
+        self.replicas = [Replica(url, engine_options) for url in urls]
+        self.check_interval = check_interval
+        self.max_lag_seconds = max_lag_seconds
+        self._lock = threading.Lock()
+        self._next = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self.primary_fallbacks = 0
+
+    def choose(self) -> Optional[Replica]:
+        """
+        Picks the next healthy replica.
+
+        Returns:
+            Optional[Replica]: The replica, or None when none is healthy (or
+            none is configured) and the primary must be used.
+        """
+        if not self.replicas:
+            return None
+        with self._lock:
+            for offset in range(len(self.replicas)):
+                index = (self._next + offset) % len(self.replicas)
+                replica = self.replicas[index]
+                if replica.healthy:
+                    # Continue after the chosen one so unhealthy replicas do not skew the rotation
+                    self._next = index + 1
+                    replica.reads += 1
+                    return replica
+            self.primary_fallbacks += 1
+        return None
+
+    def check(self) -> None:
+        """
+        Probes every replica and updates its health and replication lag.
+        """
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as connection:
+                    lag = float(connection.execute(LAG_QUERY).scalar() or 0)
+            except Exception as error:
+                if replica.healthy:
+                    logger.warning("Replica %s failed its health check: %s",
+                                   replica.url.render_as_string(hide_password=True), error)
+                replica.healthy = False
+                replica.lag_seconds = None
+                replica.failures += 1
+                continue
+            replica.lag_seconds = round(lag, 3)
+            replica.healthy = lag <= self.max_lag_seconds
+
+    def start(self) -> None:
+        """
+        Starts the background health checks (when replicas are configured).
+        """
+        if self._thread is not None or not self.replicas:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="replica-health", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the background health checks.
+        """
+        thread, self._thread = self._thread, None
+        self._stop.set()
+        if thread is not None:
+            thread.join()
+
+    def stats(self) -> dict:
+        """
+        Returns per-replica health and read counters as a dict.
+        """
+        with self._lock:
+            return {
+                "replicas": [replica.stats() for replica in self.replicas],
+                "primary_fallbacks": self.primary_fallbacks,
+            }
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Checking the replicas failed")
+            if self._stop.wait(self.check_interval):
+                return
+
+
+class WritePins:
+    """
+    Clients that wrote recently and must read from the primary.
+    """
+
+    def __init__(self, window_seconds: float, maxsize: int = 100000, clock=time.monotonic):
+        self.cache = TTLCache(maxsize=maxsize, ttl=window_seconds, clock=clock)
+
+    def record(self, client: Optional[str]) -> None:
+        if client:
+            self.cache.set(client, True)
+
+    def pinned(self, client: Optional[str]) -> bool:
+        return bool(client) and self.cache.get(client, False)
+
+
+class ReadYourWritesMiddleware:
+    """
+    ASGI middleware pinning clients to the primary after a successful write.
+
+    The pin is recorded when the response starts, before the client can
+    send its next request.
+    """
+
+    def __init__(self, app, pins: WritePins):
+        self.app = app
+        self.pins = pins
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        client = dict(scope["headers"]).get(b"authorization")
+
+        async def send_and_pin(message):
+            if message["type"] == "http.response.start" and message["status"] < 400 and client:
+                self.pins.record(client.decode("latin-1"))
+            await send(message)
+
+        await self.app(scope, receive, send_and_pin)
+
+
+def is_replica_session(db) -> bool:
+    """
+    Whether a session handed out by the read dependencies is on a replica,
+    so what it reads may lag behind the primary.
+    """
+    return bool(getattr(db, "sync_session", db).info.get("replica"))
+
+
+def _on_replica(db):
+    getattr(db, "sync_session", db).info["replica"] = True
+    return db
+
+
+def read_db_dependency(replica_set: ReplicaSet, pins: WritePins, primary_factory: Callable):
+    """
+    Builds the `get_read_db` dependency: a sync session on a replica, or on
+    the primary for pinned clients and when no replica is healthy.
+    """
+    def get_read_db(request: Request):
+        replica = None if pins.pinned(request.headers.get("authorization")) else replica_set.choose()
+        db = _on_replica(replica.session_factory()) if replica is not None else primary_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    return get_read_db
+
+
+def async_read_db_dependency(replica_set: ReplicaSet, pins: WritePins, primary_factory: Callable):
+    """
+    Async variant of `read_db_dependency` for the async routers.
+    """
+    async def get_async_read_db(request: Request):
+        replica = None if pins.pinned(request.headers.get("authorization")) else replica_set.choose()
+        if replica is None:
+            async with primary_factory() as db:
+                yield db
+        else:
+            async with replica.async_session_factory() as db:
+                yield _on_replica(db)
+
+    return get_async_read_db
@@ -0,0 +1,122 @@
+"""
+API Router for operational metrics, restricted to `settings.admin_emails`.
+"""
+from fastapi import Depends, APIRouter
+from .. import oauth2, schemas, database
+from ..feed_snapshot import feed_snapshot
+from ..hot_scores import hot_score_refresher
+from ..instrumentation import query_stats
+from ..post_cache import post_cache
+from ..vote_buffer import vote_buffer
+from ..vote_stream import vote_hub
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"]
+)
+
+
+@router.get("/pool")
+def get_pool_metrics(current_user: schemas.UserOut = Depends(oauth2.get_current_admin)):
+    """
+    Report live connection pool occupancy and checkout wait statistics.
+
+    Args:
+        current_user (schemas.UserOut): Authenticated admin user.
+
+    Returns:
+        dict: Metrics for the sync and the async engine pools.
+    """
+    return {
+        "sync": database.pool_metrics.snapshot(database.engine.pool),
+        "async": database.async_pool_metrics.snapshot(database.async_engine.sync_engine.pool),
+    }
+
+
+@router.get("/caches")
+def get_cache_metrics(current_user: schemas.UserOut = Depends(oauth2.get_current_admin)):
+    """
+    Report size and hit/miss counters of the in-process caches.
+
+    Args:
+        current_user (schemas.UserOut): Authenticated admin user.
+
+    Returns:
+        dict: Statistics per cache.
+    """
+    return {
+        "auth_tokens": oauth2.token_cache.stats(),
+        "posts": post_cache.stats(),
+        "feed_snapshot": feed_snapshot.stats(),
+    }
+
+
+@router.get("/vote-buffer")
+def get_vote_buffer_metrics(current_user: schemas.UserOut = Depends(oauth2.get_current_admin)):
+    """
+    Report depth, throughput and flush lag of the write-behind vote buffer.
+
+    Args:
+        current_user (schemas.UserOut): Authenticated admin user.
+
+    Returns:
+        dict: Vote buffer statistics.
+    """
+    return vote_buffer.stats()
+
+
+@router.get("/vote-stream")
+def get_vote_stream_metrics(current_user: schemas.UserOut = Depends(oauth2.get_current_admin)):
+    """
+    Report subscriptions and fan-out counters of the live vote streams.
+
+    Args:
+        current_user (schemas.UserOut): Authenticated admin user.
+
+    Returns:
+        dict: Vote hub statistics.
+    """
+    return vote_hub.stats()
+
+
+@router.get("/hot-scores")
+def get_hot_score_metrics(current_user: schemas.UserOut = Depends(oauth2.get_current_admin)):
+    """
+    Report runs, failures and rescored posts of the hot score refresher.
+
+    Args:
+        current_user (schemas.UserOut): Authenticated admin user.
+
+    Returns:
+        dict: Hot score refresher statistics.
+    """
+    return hot_score_refresher.stats()
+
+
+@router.get("/queries")
+def get_query_metrics(current_user: schemas.UserOut = Depends(oauth2.get_current_admin)):
+    """
+    Report per-endpoint histograms of query counts and database time.
+
+    Args:
+        current_user (schemas.UserOut): Authenticated admin user.
+
+    Returns:
+        dict: Request count, query count and DB time histograms, and the
+        slowest statement seen, per endpoint.
+    """
+    return query_stats.snapshot()
+
+
+@router.get("/replicas")
+def get_replica_metrics(current_user: schemas.UserOut = Depends(oauth2.get_current_admin)):
+    """
+    Report health, replication lag and read counts of the read replicas.
+
+    Args:
+        current_user (schemas.UserOut): Authenticated admin user.
+
+    Returns:
+        dict: Per-replica statistics and the reads that fell back to the primary.
+    """
+    return database.replica_set.stats()
@@ -0,0 +1,52 @@
+"""
+Async API Router for authentication.
+
+Mirrors `app.routers.auth` on top of an `AsyncSession`; enabled with
+`settings.database_async`.
+"""
+from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import schemas
+from ... import models, utils, database, oauth2
+
+router = APIRouter(tags=["Authentication"])
+
+@router.post("/login", response_model=schemas.Token)
+async def login(
+    user_credentials: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(database.get_async_db)
+):
+    """
+    Authenticate a user and return an access token.
+
+    Args:
+        user_credentials (OAuth2PasswordRequestForm): Login credentials (username/email and password).
+        db (AsyncSession): Async database session.
+
+    Returns:
+        dict: Access token and token type.
+
+    Raises:
+        HTTPException: If credentials are invalid.
+    """
+    result = await db.execute(
+        select(models.Users).filter(models.Users.email == user_credentials.username))
+    user = result.scalars().first()
+
+    if not user:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid Credentials")
+
+    verified, new_hash = await utils.verify_and_update_async(user_credentials.password, user.password)
+    if not verified:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid Credentials")
+
+    # The hash uses a deprecated scheme or cost: store the upgraded one
+    if new_hash:
+        user.password = new_hash
+        await db.commit()
+
+    token = oauth2.create_access_token(data={"user_id": user.id})
+
+    return {"access_token": token, "token_type": "bearer"}
@@ -0,0 +1,369 @@
+"""
+Async API Router for managing posts.
+
+Mirrors `app.routers.post` on top of an `AsyncSession`; enabled with
+`settings.database_async`.
+"""
+from fastapi import Request, Response, status, HTTPException, Depends, APIRouter, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from typing import List, Optional, Union
+
+from ... import models, schemas, oauth2, pagination, search as post_search, serializers, projections, post_import, post_writes, vote_stream
+from ...database import get_async_db, get_async_read_db
+from ...config import settings
+from ...feed_snapshot import feed_snapshot
+from ...post_cache import post_cache
+from ...replicas import is_replica_session
+from ...vote_stream import vote_hub
+
+
+router = APIRouter(
+    prefix="/posts",
+    tags=['Posts']
+)
+
+
+def _post_with_owner(id: int):
+    """
+    Select statement for a single post with its owner loaded eagerly.
+
+    Lazy loading is not available on an `AsyncSession`, so every post that is
+    serialized (and therefore touches `post.owner`) must come from here.
+    """
+    return select(models.Post).options(joinedload(models.Post.owner)).filter(models.Post.id == id)
+
+
+async def _stream_feed(db: AsyncSession, statement, sort: Optional[schemas.FeedSort],
+                       limit: int) -> StreamingResponse:
+    """
+    Streams the rows of a projected feed statement as the JSON response.
+    """
+    result = await db.stream(statement.execution_options(yield_per=projections.STREAM_BATCH_SIZE))
+    return StreamingResponse(projections.stream_feed_async(result, sort, limit),
+                             media_type="application/json")
+
+
+async def _stream_votes(request: Request, db: AsyncSession, ids: List[int],
+                        not_found: str = "no post to stream was found") -> StreamingResponse:
+    """
+    Subscribes to the vote hub, reads the current vote counts and opens the
+    event stream.
+
+    Subscribing first means a vote committed while the counts are read is
+    still delivered to the stream.
+    """
+    subscription = vote_hub.subscribe(ids)
+    try:
+        try:
+            counts = dict((await db.execute(vote_stream.counts_statement(ids))).all())
+        finally:
+            await db.close()
+        if not counts:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found)
+    except BaseException:
+        vote_hub.unsubscribe(subscription)
+        raise
+    return StreamingResponse(vote_stream.event_stream(request, vote_hub, subscription, counts),
+                             media_type="text/event-stream", headers=vote_stream.SSE_HEADERS)
+
+
+@router.get("/", response_model=Union[List[schemas.PostOut], schemas.PostPage])
+async def get_posts(
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: int = Depends(oauth2.get_current_user_async),
+    limit: int = 10,
+    skip: int = 0,
+    search: Optional[str] = "",
+    sort: Optional[schemas.FeedSort] = None,
+    cursor: Optional[str] = None
+):
+    """
+    Retrieve all posts with vote counts.
+
+    Args:
+        db (AsyncSession): Async database session.
+        current_user (int): Authenticated user.
+        limit (int): Number of posts to return.
+        skip (int): Number of posts to skip.
+        search (str): Full-text search terms matched against title and content.
+        sort (schemas.FeedSort, optional): Order of the cursor-paginated feed.
+        cursor (str, optional): Cursor returned with the previous page.
+
+    Returns:
+        Union[List[schemas.PostOut], schemas.PostPage]: Posts with vote counts.
+
+    Raises:
+        HTTPException: If the cursor is invalid.
+    """
+    if settings.feed_snapshot_enabled and not search and cursor is None:
+        page = feed_snapshot.page(sort, skip, limit)
+        if page is not None:
+            return ORJSONResponse(page) if settings.fast_json_responses else page
+
+    if settings.feed_projection:
+        query = projections.feed_statement()
+    else:
+        query = select(models.Post, models.Post.vote_count.label("votes")).options(
+            joinedload(models.Post.owner))
+    query = post_search.apply_search(query, search, db.bind.dialect.name,
+                                     ranked=sort is None and cursor is None)
+
+    if sort is None and cursor is None:
+        if settings.feed_projection:
+            return await _stream_feed(db, query.limit(limit).offset(skip), None, limit)
+        result = await db.execute(query.limit(limit).offset(skip))
+        posts = result.all()
+        return serializers.feed_response(posts) if settings.fast_json_responses else posts
+
+    try:
+        query, sort = pagination.apply_keyset(query, sort, cursor)
+    except ValueError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
+
+    if settings.feed_projection:
+        return await _stream_feed(db, query.limit(limit).offset(skip), sort, limit)
+    result = await db.execute(query.limit(limit).offset(skip))
+    posts = result.all()
+    next_cursor = pagination.next_cursor(posts, sort, limit)
+    if settings.fast_json_responses:
+        return serializers.feed_page_response(posts, next_cursor)
+    return {"items": posts, "next_cursor": next_cursor}
+
+
+@router.get("/export")
+async def export_posts(
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: int = Depends(oauth2.get_current_user_async),
+    search: Optional[str] = "",
+    sort: Optional[schemas.FeedSort] = None,
+    limit: Optional[int] = None
+):
+    """
+    Stream all posts with vote counts as newline-delimited JSON.
+
+    Args:
+        db (AsyncSession): Async database session.
+        current_user (int): Authenticated user.
+        search (str): Full-text search terms matched against title and content.
+        sort (schemas.FeedSort, optional): Feed order; posts are exported by id when omitted.
+        limit (int, optional): Largest number of posts to export.
+
+    Returns:
+        StreamingResponse: One JSON post per line (`application/x-ndjson`).
+    """
+    statement = post_search.apply_search(projections.export_statement(sort), search,
+                                         db.bind.dialect.name, ranked=False)
+    if limit is not None:
+        statement = statement.limit(limit)
+    result = await db.stream(statement.execution_options(yield_per=projections.STREAM_BATCH_SIZE))
+    return StreamingResponse(projections.stream_export_async(result), media_type="application/x-ndjson")
+
+
+@router.post("/", status_code=status.HTTP_201_CREATED, response_model=schemas.Post)
+async def create_posts(
+    post: schemas.PostCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: int = Depends(oauth2.get_current_user_async)
+):
+    """
+    Create a new post.
+
+    Args:
+        post (schemas.PostCreate): Post data.
+        db (AsyncSession): Async database session.
+        current_user (int): Authenticated user.
+
+    Returns:
+        models.Post: The created post.
+    """
+    new_post = models.Post(owner_id=current_user.id, **post.dict())
+    db.add(new_post)
+    await db.commit()
+
+    # Stands in for `db.refresh` so the owner comes back loaded as well
+    result = await db.execute(_post_with_owner(new_post.id).execution_options(populate_existing=True))
+    return result.scalars().first()
+
+
+@router.post("/bulk", status_code=status.HTTP_201_CREATED, response_model=schemas.PostImportResult)
+async def bulk_create_posts(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: int = Depends(oauth2.get_current_user_async)
+):
+    """
+    Bulk-create posts from a JSON array or NDJSON body.
+
+    Items are validated and inserted in multi-row `INSERT ... RETURNING`
+    chunks of `settings.post_import_chunk_size` posts and committed
+    together; an invalid item rejects the whole import.
+
+    Args:
+        request (Request): Request whose body holds the posts.
+        db (AsyncSession): Async database session.
+        current_user (int): Authenticated user, owner of the imported posts.
+
+    Returns:
+        schemas.PostImportResult: Imported count and per-chunk throughput.
+
+    Raises:
+        HTTPException: If the body or one of its items is invalid.
+    """
+    report = post_import.ImportReport()
+    try:
+        async for chunk in post_import.read_chunks_async(request.stream(), settings.post_import_chunk_size):
+            await post_import.insert_chunk_async(db, current_user.id, chunk, report)
+    except ValueError as error:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(error))
+    await db.commit()
+
+    return report.result()
+
+
+@router.get("/stream")
+async def stream_votes(
+    request: Request,
+    ids: List[int] = Query(...),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: int = Depends(oauth2.get_current_user_async)
+):
+    """
+    Stream live vote counts of several posts as Server-Sent Events.
+
+    Args:
+        request (Request): The streaming request.
+        ids (List[int]): Posts to watch (`?ids=1&ids=2`); unknown ids are ignored.
+        db (AsyncSession): Async database session, released once the current counts are read.
+        current_user (int): Authenticated user.
+
+    Returns:
+        StreamingResponse: `votes` events with `[{"post_id", "votes"}]` data.
+
+    Raises:
+        HTTPException: If too many posts are requested or none of them exists.
+    """
+    if len(set(ids)) > settings.vote_stream_max_posts:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"at most {settings.vote_stream_max_posts} posts can be streamed")
+    return await _stream_votes(request, db, ids)
+
+
+@router.get("/{id}", response_model=schemas.PostOut)
+async def get_post(
+    id: int,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: int = Depends(oauth2.get_current_user_async)
+):
+    """
+    Retrieve a specific post by ID.
+
+    Args:
+        id (int): Post ID.
+        db (AsyncSession): Async database session.
+        current_user (int): Authenticated user.
+
+    Returns:
+        schemas.PostOut: The requested post with vote count.
+
+    Raises:
+        HTTPException: If the post is not found.
+    """
+    async def load():
+        result = await db.execute(
+            select(models.Post, models.Post.vote_count.label("votes")).options(
+                joinedload(models.Post.owner)).filter(models.Post.id == id))
+        row = result.first()
+        return post_cache.encode(row) if row else None
+
+    # Rows read from a replica may be stale, so only rows from the primary are cached
+    post = await post_cache.get_or_load_async(id, load, store=not is_replica_session(db))
+
+    if not post:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f"post with id: {id} was not found")
+
+    return post
+
+
+@router.get("/{id}/stream")
+async def stream_post_votes(
+    id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: int = Depends(oauth2.get_current_user_async)
+):
+    """
+    Stream the live vote count of a post as Server-Sent Events.
+
+    Args:
+        id (int): Post ID.
+        request (Request): The streaming request.
+        db (AsyncSession): Async database session, released once the current count is read.
+        current_user (int): Authenticated user.
+
+    Returns:
+        StreamingResponse: `votes` events with `[{"post_id", "votes"}]` data.
+
+    Raises:
+        HTTPException: If the post is not found.
+    """
+    return await _stream_votes(request, db, [id], f"post with id: {id} was not found")
+
+
+@router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_post(
+    id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: int = Depends(oauth2.get_current_user_async)
+):
+    """
+    Delete a post.
+
+    Args:
+        id (int): Post ID.
+        db (AsyncSession): Async database session.
+        current_user (int): Authenticated user.
+
+    Raises:
+        HTTPException: If post not found or user not authorized.
+    """
+    row = (await db.execute(post_writes.delete_statement(id, current_user.id))).first()
+    post_writes.check_outcome(row, id)
+    await db.commit()
+    await post_cache.invalidate_async([id])
+
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.put("/{id}", response_model=schemas.Post)
+async def update_post(
+    id: int,
+    updated_post: schemas.PostCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: int = Depends(oauth2.get_current_user_async)
+):
+    """
+    Update a post.
+
+    Args:
+        id (int): Post ID.
+        updated_post (schemas.PostCreate): New post data.
+        db (AsyncSession): Async database session.
+        current_user (int): Authenticated user.
+
+    Returns:
+        schemas.Post: The updated post.
+
+    Raises:
+        HTTPException: If post not found or user not authorized.
+    """
+    row = (await db.execute(post_writes.update_statement(id, current_user.id, updated_post.dict()))).first()
+    post_writes.check_outcome(row, id)
+    await db.commit()
+    await post_cache.invalidate_async([id])
+
+    return post_writes.post_out(row, current_user)
@@ -0,0 +1,62 @@
+"""
+Async API Router for managing users.
+
+Mirrors `app.routers.user` on top of an `AsyncSession`; enabled with
+`settings.database_async`.
+"""
+from fastapi import status, HTTPException, Depends, APIRouter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ... import models, schemas, utils
+from ...database import get_async_db, get_async_read_db
+
+router = APIRouter(
+    prefix="/users",
+    tags=['Users']
+)
+
+
+@router.post("/", status_code=status.HTTP_201_CREATED, response_model=schemas.UserOut)
+async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    """
+    Create a new user.
+
+    Args:
+        user (schemas.UserCreate): User registration data.
+        db (AsyncSession): Async database session.
+
+    Returns:
+        models.Users: The created user.
+    """
+    user.password = await utils.hash_async(user.password)
+
+    new_user = models.Users(**user.dict())
+    db.add(new_user)
+    await db.commit()
+    await db.refresh(new_user)
+
+    return new_user
+
+
+@router.get('/{id}', response_model=schemas.UserOut)
+async def get_user(id: int, db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Retrieve a user by ID.
+
+    Args:
+        id (int): User ID.
+        db (AsyncSession): Async database session.
+
+    Returns:
+        models.Users: The requested user.
+
+    Raises:
+        HTTPException: If user not found.
+    """
+    result = await db.execute(select(models.Users).filter(models.Users.id == id))
+    user = result.scalars().first()
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f"User with id: {id} does not exist")
+
+    return user
@@ -0,0 +1,145 @@
+"""
+Async API Router for voting on posts.
+
+Mirrors `app.routers.vote` on top of an `AsyncSession`; enabled with
+`settings.database_async`.
+"""
+from fastapi import Response, status, HTTPException, Depends, APIRouter
+from typing import List
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from ... import schemas, oauth2, database, votes
+from ...config import settings
+from ...post_cache import post_cache
+from ...vote_buffer import BufferFull, vote_buffer
+from ...vote_stream import vote_hub
+
+router = APIRouter(
+    prefix="/votes",
+    tags=["Votes"]
+)
+
+
+@router.post("/", status_code=status.HTTP_201_CREATED)
+async def vote(
+    vote: schemas.Vote,
+    response: Response,
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: schemas.UserOut = Depends(oauth2.get_current_user_async)
+):
+    """
+    Vote on a post (upvote or remove vote).
+
+    Args:
+        vote (schemas.Vote): Vote data (post_id and direction).
+        response (Response): Outgoing response (202 when the vote is buffered).
+        db (AsyncSession): Async database session.
+        current_user (schemas.UserOut): Authenticated user.
+
+    Returns:
+        dict: Success message.
+
+    Raises:
+        HTTPException: If the post does not exist, on vote conflict (already voted) or vote not found (when removing),
+            or 503 when the vote buffer is full.
+    """
+    if settings.vote_buffer_enabled:
+        # Conflicts and unknown posts are resolved (silently) at flush time
+        try:
+            vote_buffer.add(current_user.id, vote.post_id, vote.dir)
+        except BufferFull:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many pending votes, retry later",
+                headers={"Retry-After": "1"},
+            )
+        response.status_code = status.HTTP_202_ACCEPTED
+        return {"message": "vote accepted"}
+
+    try:
+        result = await db.execute(votes.vote_statement(vote.post_id, current_user.id, vote.dir))
+        row = result.first()
+    except IntegrityError as error:
+        await db.rollback()
+        if not votes.is_foreign_key_violation(error):
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Post with id {vote.post_id} does not exist"
+        )
+    if row is None:
+        # No target row: the post does not exist
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Post with id {vote.post_id} does not exist"
+        )
+    new_count = row.vote_count
+    await db.commit()
+    if new_count is not None:
+        await post_cache.invalidate_async([vote.post_id])
+        vote_hub.publish(vote.post_id)
+
+    if new_count is None:
+        if vote.dir == 1:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"user {current_user.id} has already voted on post {vote.post_id}",
+            )
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Vote does not exist",
+        )
+
+    return {"message": "successfully added vote" if vote.dir == 1 else "successfully deleted vote"}
+
+
+@router.post("/batch", response_model=List[schemas.VoteResult])
+async def vote_batch(
+    batch: List[schemas.Vote],
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: schemas.UserOut = Depends(oauth2.get_current_user_async)
+):
+    """
+    Apply many votes of the current user in one request and one transaction.
+
+    Args:
+        batch (List[schemas.Vote]): Votes to apply, in order.
+        db (AsyncSession): Async database session.
+        current_user (schemas.UserOut): Authenticated user.
+
+    Returns:
+        List[schemas.VoteResult]: One result per item, in request order.
+
+    Raises:
+        HTTPException: If the batch has more than `settings.vote_batch_max_items` items.
+    """
+    if len(batch) > settings.vote_batch_max_items:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"A batch accepts at most {settings.vote_batch_max_items} votes",
+        )
+    if not batch:
+        return []
+
+    rows = (await db.execute(votes.batch_state_statement((item.post_id for item in batch), current_user.id))).all()
+    existing_posts = {post_id for post_id, _ in rows}
+    voted = {voted_id for _, voted_id in rows if voted_id is not None}
+
+    results, to_insert, to_delete = votes.plan_vote_batch(batch, current_user.id, existing_posts, voted)
+
+    inserted = deleted = []
+    if to_insert:
+        inserted = (await db.execute(votes.insert_votes_statement(
+            [(post_id, current_user.id) for post_id in to_insert]))).scalars().all()
+    if to_delete:
+        deleted = (await db.execute(votes.delete_votes_statement(
+            [(post_id, current_user.id) for post_id in to_delete]))).scalars().all()
+    deltas = votes.vote_count_deltas(inserted, deleted)
+    counts = []
+    if deltas:
+        counts = (await db.execute(votes.adjust_vote_counts_statement(deltas))).all()
+    await db.commit()
+    await post_cache.invalidate_async(post_id for post_id, _ in deltas)
+    vote_hub.publish_many(post_id for post_id, _ in counts)
+
+    return results
@@ -34,9 +34,15 @@ def login(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid Credentials")
     
     # Verify the password
-    if not utils.verify(user_credentials.password, user.password):
+    verified, new_hash = utils.verify_and_update(user_credentials.password, user.password)
+    if not verified:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid Credentials")
-    
+
+    # The hash uses a deprecated scheme or cost: store the upgraded one
+    if new_hash:
+        user.password = new_hash
+        db.commit()
+
     # Create an access token
     token = oauth2.create_access_token(data={"user_id": user.id})
     
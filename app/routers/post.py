@@ -1,13 +1,19 @@
 """
 API Router for managing posts.
 """
-from fastapi import FastAPI, Response, status, HTTPException, Depends, APIRouter
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import FastAPI, Request, Response, status, HTTPException, Depends, APIRouter, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy.orm import Session, joinedload
+from typing import List, Optional, Union
 
-from sqlalchemy import func
-from .. import models, schemas, oauth2
-from ..database import get_db
+from .. import models, schemas, oauth2, pagination, search as post_search, serializers, projections, post_import, post_writes, vote_stream
+from ..config import settings
+from ..feed_snapshot import feed_snapshot
+from ..post_cache import post_cache
+from ..replicas import is_replica_session
+from ..vote_stream import vote_hub
+from ..database import get_db, get_read_db
 
 
 router = APIRouter(
@@ -16,30 +22,149 @@ router = APIRouter(
 )
 
 
-@router.get("/", response_model=List[schemas.PostOut])
+def _stream_feed(db: Session, statement, sort: Optional[schemas.FeedSort], limit: int) -> StreamingResponse:
+    """
+    Streams the rows of a projected feed statement as the JSON response.
+
+    The session stays open until the response is sent, so the rows are
+    fetched from a server-side cursor while the body is written.
+    """
+    rows = db.execute(statement.execution_options(stream_results=True)).yield_per(
+        projections.STREAM_BATCH_SIZE)
+    return StreamingResponse(projections.stream_feed(rows, sort, limit), media_type="application/json")
+
+
+async def _stream_votes(request: Request, db: Session, ids: List[int],
+                        not_found: str = "no post to stream was found") -> StreamingResponse:
+    """
+    Subscribes to the vote hub, reads the current vote counts and opens the
+    event stream.
+
+    Subscribing first means a vote committed while the counts are read is
+    still delivered to the stream. The session is closed before streaming
+    so the stream does not hold a pooled connection.
+    """
+    def read_counts():
+        try:
+            return dict(db.execute(vote_stream.counts_statement(ids)).all())
+        finally:
+            db.close()
+
+    subscription = vote_hub.subscribe(ids)
+    try:
+        counts = await run_in_threadpool(read_counts)
+        if not counts:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found)
+    except BaseException:
+        vote_hub.unsubscribe(subscription)
+        raise
+    return StreamingResponse(vote_stream.event_stream(request, vote_hub, subscription, counts),
+                             media_type="text/event-stream", headers=vote_stream.SSE_HEADERS)
+
+
+@router.get("/", response_model=Union[List[schemas.PostOut], schemas.PostPage])
 def get_posts(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: int = Depends(oauth2.get_current_user),
     limit: int = 10,
     skip: int = 0,
-    search: Optional[str] = ""
+    search: Optional[str] = "",
+    sort: Optional[schemas.FeedSort] = None,
+    cursor: Optional[str] = None
 ):
     """
     Retrieve all posts with vote counts.
 
+    Without `sort` or `cursor` this is the original offset-paginated list.
+    With either of them the feed is ordered and keyset-paginated, and the
+    response is a page carrying the `next_cursor` to pass back in.
+    Unfiltered first pages are served from the feed snapshot when enabled.
+
     Args:
         db (Session): Database session.
         current_user (int): Authenticated user.
         limit (int): Number of posts to return.
         skip (int): Number of posts to skip.
-        search (str): Search term for post titles.
+        search (str): Full-text search terms matched against title and content.
+        sort (schemas.FeedSort, optional): Order of the cursor-paginated feed.
+        cursor (str, optional): Cursor returned with the previous page.
 
     Returns:
-        List[schemas.PostOut]: List of posts with vote counts.
+        Union[List[schemas.PostOut], schemas.PostPage]: Posts with vote counts.
+
+    Raises:
+        HTTPException: If the cursor is invalid.
+    """
+    # Unfiltered first pages come from the in-memory feed snapshot
+    if settings.feed_snapshot_enabled and not search and cursor is None:
+        page = feed_snapshot.page(sort, skip, limit)
+        if page is not None:
+            return ORJSONResponse(page) if settings.fast_json_responses else page
+
+    # The vote count is read from the denormalized `posts.vote_count` column,
+    # so the feed is a single-table scan instead of a join + GROUP BY on votes.
+    if settings.feed_projection:
+        query = projections.feed_statement()
+    else:
+        # Owners are joined in: `PostOut` serializes `post.owner` for every row
+        query = db.query(models.Post, models.Post.vote_count.label("votes")).options(
+            joinedload(models.Post.owner))
+    # Plain listings are ranked by relevance; sorted feeds keep their order
+    query = post_search.apply_search(query, search, db.get_bind().dialect.name,
+                                     ranked=sort is None and cursor is None)
+
+    if sort is None and cursor is None:
+        if settings.feed_projection:
+            return _stream_feed(db, query.limit(limit).offset(skip), None, limit)
+        posts = query.limit(limit).offset(skip).all()
+        # Build the JSON straight from the rows instead of validating them
+        return serializers.feed_response(posts) if settings.fast_json_responses else posts
+
+    try:
+        query, sort = pagination.apply_keyset(query, sort, cursor)
+    except ValueError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
+
+    if settings.feed_projection:
+        return _stream_feed(db, query.limit(limit).offset(skip), sort, limit)
+    posts = query.limit(limit).offset(skip).all()
+    next_cursor = pagination.next_cursor(posts, sort, limit)
+    if settings.fast_json_responses:
+        return serializers.feed_page_response(posts, next_cursor)
+    return {"items": posts, "next_cursor": next_cursor}
+
+
+@router.get("/export")
+def export_posts(
+    db: Session = Depends(get_read_db),
+    current_user: int = Depends(oauth2.get_current_user),
+    search: Optional[str] = "",
+    sort: Optional[schemas.FeedSort] = None,
+    limit: Optional[int] = None
+):
     """
-    posts = db.query(models.Post, func.count(models.Vote.post_id).label("votes")).join(
-        models.Vote, models.Vote.post_id == models.Post.id, isouter=True).group_by(models.Post.id).filter(models.Post.title.contains(search)).limit(limit).offset(skip).all()
-    return posts
+    Stream all posts with vote counts as newline-delimited JSON.
+
+    Rows are read from a server-side cursor in batches while the response
+    is written, so memory use does not grow with the size of the table.
+
+    Args:
+        db (Session): Database session.
+        current_user (int): Authenticated user.
+        search (str): Full-text search terms matched against title and content.
+        sort (schemas.FeedSort, optional): Feed order; posts are exported by id when omitted.
+        limit (int, optional): Largest number of posts to export.
+
+    Returns:
+        StreamingResponse: One JSON post per line (`application/x-ndjson`).
+    """
+    statement = post_search.apply_search(projections.export_statement(sort), search,
+                                         db.get_bind().dialect.name, ranked=False)
+    if limit is not None:
+        statement = statement.limit(limit)
+    rows = db.execute(statement.execution_options(stream_results=True)).yield_per(
+        projections.STREAM_BATCH_SIZE)
+    return StreamingResponse(projections.stream_export(rows), media_type="application/x-ndjson")
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=schemas.Post)
@@ -67,10 +192,75 @@ def create_posts(
     return new_post
 
 
+@router.post("/bulk", status_code=status.HTTP_201_CREATED, response_model=schemas.PostImportResult)
+async def bulk_create_posts(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: int = Depends(oauth2.get_current_user)
+):
+    """
+    Bulk-create posts from a JSON array or NDJSON body.
+
+    Items are validated and inserted in multi-row `INSERT ... RETURNING`
+    chunks of `settings.post_import_chunk_size` posts and committed
+    together; an invalid item rejects the whole import.
+
+    Args:
+        request (Request): Request whose body holds the posts.
+        db (Session): Database session.
+        current_user (int): Authenticated user, owner of the imported posts.
+
+    Returns:
+        schemas.PostImportResult: Imported count and per-chunk throughput.
+
+    Raises:
+        HTTPException: If the body or one of its items is invalid.
+    """
+    # The body is read on the event loop; the sync session runs in the threadpool
+    report = post_import.ImportReport()
+    try:
+        async for chunk in post_import.read_chunks_async(request.stream(), settings.post_import_chunk_size):
+            await run_in_threadpool(post_import.insert_chunk, db, current_user.id, chunk, report)
+    except ValueError as error:
+        await run_in_threadpool(db.rollback)
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(error))
+    await run_in_threadpool(db.commit)
+
+    return report.result()
+
+
+@router.get("/stream")
+async def stream_votes(
+    request: Request,
+    ids: List[int] = Query(...),
+    db: Session = Depends(get_read_db),
+    current_user: int = Depends(oauth2.get_current_user)
+):
+    """
+    Stream live vote counts of several posts as Server-Sent Events.
+
+    Args:
+        request (Request): The streaming request.
+        ids (List[int]): Posts to watch (`?ids=1&ids=2`); unknown ids are ignored.
+        db (Session): Database session, released once the current counts are read.
+        current_user (int): Authenticated user.
+
+    Returns:
+        StreamingResponse: `votes` events with `[{"post_id", "votes"}]` data.
+
+    Raises:
+        HTTPException: If too many posts are requested or none of them exists.
+    """
+    if len(set(ids)) > settings.vote_stream_max_posts:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"at most {settings.vote_stream_max_posts} posts can be streamed")
+    return await _stream_votes(request, db, ids)
+
+
 @router.get("/{id}", response_model=schemas.PostOut)
 def get_post(
     id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: int = Depends(oauth2.get_current_user)
 ):
     """
@@ -87,8 +277,14 @@ def get_post(
     Raises:
         HTTPException: If the post is not found.
     """
-    post = db.query(models.Post, func.count(models.Vote.post_id).label("votes")).join(
-        models.Vote, models.Vote.post_id == models.Post.id, isouter=True).group_by(models.Post.id).filter(models.Post.id == id).first()
+    def load():
+        row = db.query(models.Post, models.Post.vote_count.label("votes")).options(
+            joinedload(models.Post.owner)).filter(models.Post.id == id).first()
+        return post_cache.encode(row) if row else None
+
+    # Hot posts are served from the read-through cache; rows read from a
+    # replica may be stale, so only rows from the primary are cached
+    post = post_cache.get_or_load(id, load, store=not is_replica_session(db))
 
     if not post:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
@@ -97,6 +293,31 @@ def get_post(
     return post
 
 
+@router.get("/{id}/stream")
+async def stream_post_votes(
+    id: int,
+    request: Request,
+    db: Session = Depends(get_read_db),
+    current_user: int = Depends(oauth2.get_current_user)
+):
+    """
+    Stream the live vote count of a post as Server-Sent Events.
+
+    Args:
+        id (int): Post ID.
+        request (Request): The streaming request.
+        db (Session): Database session, released once the current count is read.
+        current_user (int): Authenticated user.
+
+    Returns:
+        StreamingResponse: `votes` events with `[{"post_id", "votes"}]` data.
+
+    Raises:
+        HTTPException: If the post is not found.
+    """
+    return await _stream_votes(request, db, [id], f"post with id: {id} was not found")
+
+
 @router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_post(
     id: int,
@@ -114,20 +335,11 @@ def delete_post(
     Raises:
         HTTPException: If post not found or user not authorized.
     """
-    post_query = db.query(models.Post).filter(models.Post.id == id)
-
-    post = post_query.first()
-
-    if post == None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
-                            detail=f"post with id: {id} does not exist")
-
-    if post.owner_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
-                            detail="Not authorized to perform requested action")
-
-    post_query.delete(synchronize_session=False)
+    # One statement tells a missing post (404) from someone else's (403)
+    row = db.execute(post_writes.delete_statement(id, current_user.id)).first()
+    post_writes.check_outcome(row, id)
     db.commit()
+    post_cache.invalidate([id])
 
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
@@ -149,25 +361,14 @@ def update_post(
         current_user (int): Authenticated user.
 
     Returns:
-        models.Post: The updated post.
+        schemas.Post: The updated post.
 
     Raises:
         HTTPException: If post not found or user not authorized.
     """
-    post_query = db.query(models.Post).filter(models.Post.id == id)
-
-    post = post_query.first()
-
-    if post == None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
-                            detail=f"post with id: {id} does not exist")
-
-    if post.owner_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
-                            detail="Not authorized to perform requested action")
-
-    post_query.update(updated_post.dict(), synchronize_session=False)
-
+    row = db.execute(post_writes.update_statement(id, current_user.id, updated_post.dict())).first()
+    post_writes.check_outcome(row, id)
     db.commit()
+    post_cache.invalidate([id])
 
-    return post_query.first()
\ No newline at end of file
+    return post_writes.post_out(row, current_user)
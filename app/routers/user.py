@@ -4,7 +4,7 @@ API Router for managing users.
 from fastapi import FastAPI, Response, status, HTTPException, Depends, APIRouter
 from sqlalchemy.orm import Session
 from .. import models, schemas, utils
-from ..database import get_db
+from ..database import get_db, get_read_db
 
 router = APIRouter(
     prefix="/users",
@@ -37,7 +37,7 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
 
 
 @router.get('/{id}', response_model=schemas.UserOut)
-def get_user(id: int, db: Session = Depends(get_db)):
+def get_user(id: int, db: Session = Depends(get_read_db)):
     """
     Retrieve a user by ID.
 
@@ -1,9 +1,15 @@
 """
 API Router for voting on posts.
 """
-from fastapi import status, HTTPException, Depends, APIRouter
+from fastapi import Response, status, HTTPException, Depends, APIRouter
+from typing import List
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from .. import models, schemas, oauth2, database
+from .. import schemas, oauth2, database, votes
+from ..config import settings
+from ..post_cache import post_cache
+from ..vote_buffer import BufferFull, vote_buffer
+from ..vote_stream import vote_hub
 
 router = APIRouter(
     prefix="/votes",
@@ -13,56 +19,135 @@ router = APIRouter(
 @router.post("/", status_code=status.HTTP_201_CREATED)
 def vote(
     vote: schemas.Vote,
+    response: Response,
     db: Session = Depends(database.get_db),
-    current_user: models.Users = Depends(oauth2.get_current_user)
+    current_user: schemas.UserOut = Depends(oauth2.get_current_user)
 ):
     """
     Vote on a post (upvote or remove vote).
 
+    The vote and the post's vote counter are written by one statement (see
+    `votes.vote_statement`), so there is no window between checking for an
+    existing vote and writing it.
+
     Args:
         vote (schemas.Vote): Vote data (post_id and direction).
+        response (Response): Outgoing response (202 when the vote is buffered).
         db (Session): Database session.
-        current_user (models.Users): Authenticated user.
+        current_user (schemas.UserOut): Authenticated user.
 
     Returns:
         dict: Success message.
 
     Raises:
-        HTTPException: If vote conflict (already voted) or vote not found (when removing).
+        HTTPException: If the post does not exist, on vote conflict (already voted) or vote not found (when removing),
+            or 503 when the vote buffer is full.
     """
-    # Check if the post exists
-    post = db.query(models.Post).filter(models.Post.id == vote.post_id).first()
-    if not post:
+    if settings.vote_buffer_enabled:
+        # Conflicts and unknown posts are resolved (silently) at flush time
+        try:
+            vote_buffer.add(current_user.id, vote.post_id, vote.dir)
+        except BufferFull:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many pending votes, retry later",
+                headers={"Retry-After": "1"},
+            )
+        response.status_code = status.HTTP_202_ACCEPTED
+        return {"message": "vote accepted"}
+
+    try:
+        row = db.execute(votes.vote_statement(vote.post_id, current_user.id, vote.dir)).first()
+    except IntegrityError as error:
+        db.rollback()
+        if not votes.is_foreign_key_violation(error):
+            raise
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Post with id {vote.post_id} does not exist"
         )
-
-    # Check if the user has already voted on this post
-    vote_query = db.query(models.Vote).filter(
-        models.Vote.post_id == vote.post_id,
-        models.Vote.user_id == current_user.id
-    )
-    found_vote = vote_query.first()
+    if row is None:
+        # No target row: the post does not exist
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Post with id {vote.post_id} does not exist"
+        )
+    new_count = row.vote_count
+    db.commit()
+    if new_count is not None:
+        post_cache.invalidate([vote.post_id])
+        vote_hub.publish(vote.post_id)
 
     if vote.dir == 1:
-        # Logic for adding a vote (upvote)
-        if found_vote:
+        # No count back: the vote was already there
+        if new_count is None:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail=f"user {current_user.id} has already voted on post {vote.post_id}",
             )
-        new_vote = models.Vote(post_id=vote.post_id, user_id=current_user.id)
-        db.add(new_vote)
-        db.commit()
         return {"message": "successfully added vote"}
     else:
-        # Logic for removing a vote (downvote/unvote)
-        if not found_vote:
+        # No count back: there was no vote to remove
+        if new_count is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Vote does not exist",
             )
-        vote_query.delete(synchronize_session=False)
-        db.commit()
-        return {"message": "successfully deleted vote"}
\ No newline at end of file
+        return {"message": "successfully deleted vote"}
+
+
+@router.post("/batch", response_model=List[schemas.VoteResult])
+def vote_batch(
+    batch: List[schemas.Vote],
+    db: Session = Depends(database.get_db),
+    current_user: schemas.UserOut = Depends(oauth2.get_current_user)
+):
+    """
+    Apply many votes of the current user in one request and one transaction.
+
+    Items are applied in order with the same outcomes as `POST /votes/`; an
+    item that would fail there is reported in its result and skipped. The
+    batch is always written directly, also when the vote buffer is enabled.
+
+    Args:
+        batch (List[schemas.Vote]): Votes to apply, in order.
+        db (Session): Database session.
+        current_user (schemas.UserOut): Authenticated user.
+
+    Returns:
+        List[schemas.VoteResult]: One result per item, in request order.
+
+    Raises:
+        HTTPException: If the batch has more than `settings.vote_batch_max_items` items.
+    """
+    if len(batch) > settings.vote_batch_max_items:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"A batch accepts at most {settings.vote_batch_max_items} votes",
+        )
+    if not batch:
+        return []
+
+    # Existing posts and the user's current votes on them, in one query
+    rows = db.execute(votes.batch_state_statement((item.post_id for item in batch), current_user.id)).all()
+    existing_posts = {post_id for post_id, _ in rows}
+    voted = {voted_id for _, voted_id in rows if voted_id is not None}
+
+    results, to_insert, to_delete = votes.plan_vote_batch(batch, current_user.id, existing_posts, voted)
+
+    inserted = deleted = []
+    if to_insert:
+        inserted = db.execute(votes.insert_votes_statement(
+            [(post_id, current_user.id) for post_id in to_insert])).scalars().all()
+    if to_delete:
+        deleted = db.execute(votes.delete_votes_statement(
+            [(post_id, current_user.id) for post_id in to_delete])).scalars().all()
+    deltas = votes.vote_count_deltas(inserted, deleted)
+    counts = []
+    if deltas:
+        counts = db.execute(votes.adjust_vote_counts_statement(deltas)).all()
+    db.commit()
+    post_cache.invalidate(post_id for post_id, _ in deltas)
+    vote_hub.publish_many(post_id for post_id, _ in counts)
+
+    return results
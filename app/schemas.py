@@ -2,7 +2,8 @@
 Pydantic schemas for data validation and serialization.
 """
 from datetime import datetime
-from typing import Optional
+from enum import Enum
+from typing import List, Optional
 from pydantic import BaseModel, EmailStr, conint
 
 class UserCreate(BaseModel):
@@ -79,9 +80,53 @@ class PostOut(BaseModel):
     class Config:
         orm_mode = True
 
+class FeedSort(str, Enum):
+    """
+    Sort orders for the cursor-paginated post feed.
+    """
+    new = "new"
+    top = "top"
+    hot = "hot"
+
+class PostPage(BaseModel):
+    """
+    Schema for one page of the cursor-paginated post feed.
+    """
+    items: List[PostOut]
+    next_cursor: Optional[str] = None
+
+class PostImportChunk(BaseModel):
+    """
+    Schema for one inserted chunk of a bulk post import.
+    """
+    rows: int
+    first_id: int
+    last_id: int
+    seconds: float
+    rows_per_second: float
+
+class PostImportResult(BaseModel):
+    """
+    Schema for the summary of a bulk post import.
+    """
+    imported: int
+    seconds: float
+    rows_per_second: float
+    chunks: List[PostImportChunk]
+
 class Vote(BaseModel):
     """
     Schema for voting on a post.
     """
     post_id: int
-    dir: conint(le=1)
\ No newline at end of file
+    dir: conint(le=1)
+
+
+class VoteResult(BaseModel):
+    """
+    Schema for the outcome of one vote of a batch.
+    """
+    post_id: int
+    dir: int
+    status_code: int
+    detail: str
@@ -0,0 +1,49 @@
+"""
+Post search.
+
+On PostgreSQL the search runs against `posts.search_vector`, a generated
+`tsvector` over title and content backed by a GIN index, and results are
+ranked with `ts_rank_cd`. Other databases (SQLite in local experiments) fall
+back to a case-insensitive substring match on title and content, ranking
+title matches first.
+"""
+from sqlalchemy import case, func, or_
+
+from . import models
+
+# Text search configuration used both here and in the generated column
+SEARCH_CONFIG = "english"
+
+
+def apply_search(query, search: str, dialect_name: str, ranked: bool = True):
+    """
+    Restricts a feed query to posts matching `search`.
+
+    Works for both `Session.query()` objects and `select()` statements.
+
+    Args:
+        query: Query or select over `models.Post`.
+        search (str): Free-text search terms (web search syntax on PostgreSQL).
+        dialect_name (str): Name of the database dialect, e.g. "postgresql".
+        ranked (bool): Whether to order the results by relevance.
+
+    Returns:
+        The restricted (and possibly ordered) query.
+    """
+    if not search:
+        return query
+
+    if dialect_name == "postgresql":
+        tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, search)
+        query = query.filter(models.Post.search_vector.op("@@")(tsquery))
+        if ranked:
+            query = query.order_by(
+                func.ts_rank_cd(models.Post.search_vector, tsquery).desc(), models.Post.id.desc())
+        return query
+
+    pattern = f"%{search}%"
+    query = query.filter(or_(models.Post.title.ilike(pattern), models.Post.content.ilike(pattern)))
+    if ranked:
+        query = query.order_by(
+            case((models.Post.title.ilike(pattern), 1), else_=0).desc(), models.Post.id.desc())
+    return query
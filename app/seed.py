@@ -0,0 +1,173 @@
+"""
+Synthetic dataset generator for load tests.
+
+`python -m app.cli seed` loads users, posts and votes with PostgreSQL `COPY`,
+in `COPY_BATCH_ROWS` pieces so memory use stays flat. Users are named
+`seed-user-<n>@example.com` (numbering continues across runs) and share one
+password, hashed once, so a load test can log in as any of them.
+
+Post popularity follows a Zipf distribution: the post of popularity rank r
+receives votes in proportion to 1 / r ** skew, with ranks shuffled so that
+popularity does not follow post ids. Voters are drawn uniformly and a user
+votes on a post at most once. Posts are spread over the last `days` days and
+stored with their final `vote_count`; their hot scores are filled in by the
+hot score refresher.
+
+Generation is driven by `random.Random(seed)`, so the same arguments produce
+the same dataset. New rows are matched to their ids by insertion order, so
+nothing else may insert users or posts while seeding runs.
+"""
+import csv
+import io
+import itertools
+import random
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Sequence
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from . import models
+
+SEED_EMAIL_PREFIX = "seed-user-"
+SEED_EMAIL_DOMAIN = "@example.com"
+# Rows per COPY statement
+COPY_BATCH_ROWS = 50000
+# Rounds of redrawing votes that landed on an already voted (user, post) pair
+MAX_VOTE_ROUNDS = 20
+
+WORDS = ("fast", "api", "post", "vote", "python", "postgres", "cache", "index", "query", "latency",
+         "async", "server", "client", "stream", "feed", "search", "replica", "pool", "batch", "hot")
+
+
+def seed_email(number: int) -> str:
+    """
+    Email of the `number`-th seeded user.
+    """
+    return f"{SEED_EMAIL_PREFIX}{number}{SEED_EMAIL_DOMAIN}"
+
+
+def zipf_cum_weights(count: int, skew: float) -> List[float]:
+    """
+    Cumulative Zipf weights of `count` ranks (rank 1 first), for `random.choices`.
+    """
+    return list(itertools.accumulate(1 / rank ** skew for rank in range(1, count + 1)))
+
+
+def draw_votes(rng: random.Random, users: int, posts: int, votes: int, skew: float) -> List[tuple]:
+    """
+    Draws distinct (user index, post index) pairs with Zipf-skewed posts.
+
+    Draws landing on a pair that already voted are redrawn, up to
+    `MAX_VOTE_ROUNDS` rounds; the most popular posts can run out of voters,
+    in which case fewer than `votes` pairs are returned.
+    """
+    votes = min(votes, users * posts)
+    if not votes:
+        return []
+    ranked_posts = list(range(posts))
+    rng.shuffle(ranked_posts)
+    cum_weights = zipf_cum_weights(posts, skew)
+
+    pairs = set()
+    for _ in range(MAX_VOTE_ROUNDS):
+        missing = votes - len(pairs)
+        if not missing:
+            break
+        drawn = rng.choices(ranked_posts, cum_weights=cum_weights, k=missing)
+        pairs.update((rng.randrange(users), post) for post in drawn)
+    # Set order is arbitrary; sort so that the inserted rows do not depend on it
+    return sorted(pairs)
+
+
+def _copy(db: Session, table: str, columns: Sequence[str], rows: Iterable[tuple]) -> None:
+    """
+    Streams rows into `table` with `COPY ... FROM STDIN`, in batches.
+    """
+    cursor = db.connection().connection.cursor()
+    statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, COPY_BATCH_ROWS))
+        if not batch:
+            break
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(batch)
+        buffer.seek(0)
+        cursor.copy_expert(statement, buffer)
+
+
+def _new_ids(db: Session, model, after: int) -> List[int]:
+    """
+    Ids of the rows inserted above `after`, in insertion order.
+    """
+    return [row.id for row in db.query(model.id).filter(model.id > after).order_by(model.id)]
+
+
+def seed_dataset(db: Session, users: int, posts: int, votes: int, password_hash: str,
+                 skew: float = 1.1, days: int = 30, seed: int = 0) -> dict:
+    """
+    Loads a synthetic dataset and commits it.
+
+    Args:
+        db (Session): Database session.
+        users (int): Users to create.
+        posts (int): Posts to create, owned by random new users.
+        votes (int): Votes to cast by the new users on the new posts.
+        password_hash (str): Password hash shared by the new users.
+        skew (float): Zipf exponent of post popularity (0 is uniform).
+        days (int): Period the posts' creation times are spread over.
+        seed (int): Random seed.
+
+    Returns:
+        dict: Rows created per table, the share of votes on the top 1% of
+        posts, and the time taken.
+
+    Raises:
+        ValueError: If posts are requested without users.
+    """
+    if posts and not users:
+        raise ValueError("posts need at least one user to own them")
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+
+    first_number = db.query(func.count(models.Users.id)).filter(
+        models.Users.email.like(f"{SEED_EMAIL_PREFIX}%")).scalar()
+    last_user_id = db.query(func.coalesce(func.max(models.Users.id), 0)).scalar()
+    _copy(db, "users", ("email", "password", "created_at"), (
+        (seed_email(first_number + number), password_hash, now - timedelta(days=days))
+        for number in range(users)))
+    user_ids = _new_ids(db, models.Users, last_user_id)
+
+    # Votes are drawn first so posts are inserted with their final vote count
+    pairs = draw_votes(rng, users, posts, votes, skew)
+    vote_counts = Counter(post for _, post in pairs)
+
+    last_post_id = db.query(func.coalesce(func.max(models.Post.id), 0)).scalar()
+    _copy(db, "posts", ("title", "content", "owner_id", "created_at", "vote_count"), (
+        (" ".join(rng.choices(WORDS, k=4)), " ".join(rng.choices(WORDS, k=30)),
+         user_ids[rng.randrange(users)], now - timedelta(seconds=rng.uniform(0, days * 86400)),
+         vote_counts[post])
+        for post in range(posts)))
+    post_ids = _new_ids(db, models.Post, last_post_id)
+
+    _copy(db, "votes", ("user_id", "post_id"), (
+        (user_ids[user], post_ids[post]) for user, post in pairs))
+    db.commit()
+    # What autovacuum would do eventually: fresh statistics, the visibility map
+    # for index-only scans, and the GIN pending list of the search index
+    # flushed; until then the planner avoids the indexes on the new rows
+    with db.get_bind().connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("VACUUM ANALYZE users, posts, votes"))
+
+    top = sum(count for _, count in vote_counts.most_common(max(1, posts // 100)))
+    return {
+        "users": len(user_ids),
+        "posts": len(post_ids),
+        "votes": len(pairs),
+        "top_1pct_vote_share": round(top / len(pairs), 3) if pairs else 0.0,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
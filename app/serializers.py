@@ -0,0 +1,52 @@
+"""
+Hand-written serializers for the hot read paths.
+
+With `settings.fast_json_responses` on, the feed skips the `response_model`
+round trip (pydantic validation of every ORM object, `jsonable_encoder`,
+stdlib `json`) and builds the response straight from the query rows, which
+`ORJSONResponse` then encodes. The output matches the `schemas.PostOut`
+serialization key for key; keep both in sync when the schema changes.
+"""
+from typing import Iterable, List, Optional
+
+from fastapi.responses import ORJSONResponse
+
+
+def user_out(user) -> dict:
+    """
+    Serializes a `models.Users` like `schemas.UserOut`.
+    """
+    return {"id": user.id, "email": user.email, "created_at": user.created_at}
+
+
+def post_out(row) -> dict:
+    """
+    Serializes a `(Post, votes)` feed row like `schemas.PostOut`.
+    """
+    post, votes = row[0], row[1]
+    return {
+        "Post": {
+            "title": post.title,
+            "content": post.content,
+            "published": post.published,
+            "id": post.id,
+            "created_at": post.created_at,
+            "owner_id": post.owner_id,
+            "owner": user_out(post.owner),
+        },
+        "votes": votes,
+    }
+
+
+def feed_response(rows: Iterable) -> ORJSONResponse:
+    """
+    Builds the plain feed listing response.
+    """
+    return ORJSONResponse([post_out(row) for row in rows])
+
+
+def feed_page_response(rows: List, next_cursor: Optional[str]) -> ORJSONResponse:
+    """
+    Builds a cursor-paginated feed page response (`schemas.PostPage`).
+    """
+    return ORJSONResponse({"items": [post_out(row) for row in rows], "next_cursor": next_cursor})
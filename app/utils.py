@@ -1,22 +1,134 @@
 """
 Utility functions for password hashing and verification.
+
+bcrypt is deliberately slow, so hashing and verification run in a small
+process pool (`settings.auth_pool_workers`, 0 runs them in the calling
+thread) instead of holding a request thread and the GIL. At most
+`settings.auth_max_concurrency` auth operations are in flight per process;
+requests that cannot get a slot within `settings.auth_wait_timeout_seconds`
+are answered with 503 so that a login storm cannot tie up every worker.
 """
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+
+from .config import settings
+
+
+def make_context(schemes: List[str], bcrypt_rounds: int) -> CryptContext:
+    """
+    Builds the password context. New hashes use the first scheme; hashes of
+    the other schemes, or with a different bcrypt cost, still verify but are
+    reported by `needs_update` so they get rehashed on the next login.
+    """
+    return CryptContext(schemes=schemes, deprecated="auto", bcrypt__rounds=bcrypt_rounds)
+
+
+pwd_context = make_context(settings.password_schemes, settings.bcrypt_rounds)
+
+# Slots for auth work shared by the sync and the async routers
+_auth_slots = threading.BoundedSemaphore(max(1, settings.auth_max_concurrency))
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Returns the auth process pool, starting it on first use (None if disabled).
+    """
+    global _pool
+    if settings.auth_pool_workers <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a process that runs threads and holds DB
+            # connections is not safe
+            _pool = ProcessPoolExecutor(settings.auth_pool_workers,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """
+    Stops the auth process pool (it is restarted on the next use).
+    """
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many concurrent authentication requests, retry later",
+        headers={"Retry-After": "1"},
+    )
+
+
+def _run(fn, *args):
+    if not _auth_slots.acquire(timeout=settings.auth_wait_timeout_seconds):
+        raise _busy()
+    try:
+        pool = _get_pool()
+        if pool is None:
+            return fn(*args)
+        return pool.submit(fn, *args).result()
+    finally:
+        _auth_slots.release()
+
+
+async def _run_async(fn, *args):
+    # The slots are shared with the sync routers' threads, so they are a
+    # threading semaphore; poll it rather than blocking the event loop.
+    deadline = time.monotonic() + settings.auth_wait_timeout_seconds
+    while not _auth_slots.acquire(blocking=False):
+        if time.monotonic() >= deadline:
+            raise _busy()
+        await asyncio.sleep(0.005)
+    try:
+        pool = _get_pool()
+        if pool is None:
+            return await run_in_threadpool(fn, *args)
+        return await asyncio.wrap_future(pool.submit(fn, *args))
+    finally:
+        _auth_slots.release()
 
-# Initialize the password context with bcrypt scheme
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def hash(password: str) -> str:
     """
-    Hashes a plain text password using bcrypt.
+    Hashes a plain text password with the preferred scheme.
 
     Args:
         password (str): The plain text password to hash.
 
     Returns:
         str: The hashed password.
+
+    Raises:
+        HTTPException: 503 if no auth slot frees up in time.
     """
-    return pwd_context.hash(password)
+    return _run(_hash, password)
 
 def verify(plain_password: str, hashed_password: str) -> bool:
     """
@@ -28,5 +140,47 @@ def verify(plain_password: str, hashed_password: str) -> bool:
 
     Returns:
         bool: True if the passwords match, False otherwise.
+
+    Raises:
+        HTTPException: 503 if no auth slot frees up in time.
+    """
+    return _run(_verify, plain_password, hashed_password)
+
+
+def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verifies a password and rehashes it if its hash is outdated.
+
+    Args:
+        plain_password (str): The plain text password to verify.
+        hashed_password (str): The stored hash.
+
+    Returns:
+        Tuple[bool, Optional[str]]: Whether the password matches, and the new
+        hash to store if the old one uses a deprecated scheme or cost.
+
+    Raises:
+        HTTPException: 503 if no auth slot frees up in time.
+    """
+    return _run(_verify_and_update, plain_password, hashed_password)
+
+
+async def hash_async(password: str) -> str:
+    """
+    Async variant of `hash` that does not block the event loop.
+    """
+    return await _run_async(_hash, password)
+
+
+async def verify_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Async variant of `verify` that does not block the event loop.
+    """
+    return await _run_async(_verify, plain_password, hashed_password)
+
+
+async def verify_and_update_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Async variant of `verify_and_update` that does not block the event loop.
     """
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return await _run_async(_verify_and_update, plain_password, hashed_password)
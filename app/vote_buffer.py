@@ -0,0 +1,210 @@
+"""
+Write-behind buffer for votes.
+
+When `settings.vote_buffer_enabled` is on, the vote routers only record the
+requested vote here and answer 202; a background thread writes the pending
+votes to the database in batches.
+
+Durability: votes live in process memory until flushed. A graceful shutdown
+flushes everything that is pending, a crash loses at most the votes accepted
+since the last flush (bounded by `vote_buffer_flush_interval_seconds` and
+`vote_buffer_max_pending`). A batch that fails to commit is put back and
+retried on the next flush.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+from . import votes
+from .config import settings
+from .database import SessionLocal
+from .post_cache import post_cache
+from .vote_stream import vote_hub
+
+logger = logging.getLogger(__name__)
+
+
+class BufferFull(Exception):
+    """
+    Raised when a vote is offered while the buffer holds `max_pending` votes.
+    """
+
+
+class VoteBuffer:
+    """
+    Deduplicating queue of pending votes, flushed on a size or time trigger.
+
+    Pending votes are keyed by (user_id, post_id) and only the latest
+    direction is kept, so a user toggling a vote before the flush costs one
+    write (or none). Flushing applies the wanted state idempotently: upvotes
+    are inserted with `ON CONFLICT DO NOTHING`, removals deleted, and each
+    post's `vote_count` is adjusted by the rows that actually changed.
+    """
+
+    def __init__(self, session_factory, batch_size: int, flush_interval: float,
+                 max_pending: int, clock=time.monotonic):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._session_factory = session_factory
+        self._clock = clock
+        self._cond = threading.Condition()
+        # (user_id, post_id) -> (dir, time the key was first queued)
+        self._pending: "OrderedDict[Tuple[int, int], Tuple[int, float]]" = OrderedDict()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+        self.accepted = 0
+        self.rejected = 0
+        self.flushed = 0
+        self.batches = 0
+        self.failures = 0
+        self.last_flush_lag = 0.0
+        self.max_flush_lag = 0.0
+
+    def add(self, user_id: int, post_id: int, dir: int) -> None:
+        """
+        Queues a vote, replacing any pending vote of the user on the post.
+
+        Raises:
+            BufferFull: If the buffer is full and the vote is for a new key.
+        """
+        key = (user_id, post_id)
+        with self._cond:
+            queued = self._pending.get(key)
+            if queued is None and len(self._pending) >= self.max_pending:
+                self.rejected += 1
+                raise BufferFull()
+            self._pending[key] = (dir, queued[1] if queued else self._clock())
+            self.accepted += 1
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+
+    def flush(self) -> int:
+        """
+        Writes all pending votes to the database in batches of `batch_size`.
+
+        Returns:
+            int: Number of votes written.
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._take()
+                if not batch:
+                    return written
+                try:
+                    self._write(batch)
+                except Exception:
+                    logger.exception("Flushing %d buffered votes failed", len(batch))
+                    self._requeue(batch)
+                    with self._cond:
+                        self.failures += 1
+                    return written
+                lag = self._clock() - min(queued_at for _, queued_at in batch.values())
+                with self._cond:
+                    self.flushed += len(batch)
+                    self.batches += 1
+                    self.last_flush_lag = lag
+                    self.max_flush_lag = max(self.max_flush_lag, lag)
+                written += len(batch)
+
+    def start(self) -> None:
+        """
+        Starts the background flush thread.
+        """
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="vote-buffer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the flush thread after a final flush of the pending votes.
+        """
+        with self._cond:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+            self._cond.notify()
+        if thread is not None:
+            thread.join()
+        self.flush()
+
+    def stats(self) -> dict:
+        """
+        Returns queue depth, throughput counters and flush lag as a dict.
+
+        `flush_lag_seconds` is how long the oldest vote of the last batch
+        waited before being committed.
+        """
+        with self._cond:
+            oldest = min((queued_at for _, queued_at in self._pending.values()), default=None)
+            return {
+                "pending": len(self._pending),
+                "max_pending": self.max_pending,
+                "oldest_pending_seconds": round(self._clock() - oldest, 3) if oldest is not None else 0.0,
+                "accepted": self.accepted,
+                "rejected": self.rejected,
+                "flushed": self.flushed,
+                "batches": self.batches,
+                "failures": self.failures,
+                "flush_lag_seconds": round(self.last_flush_lag, 3),
+                "max_flush_lag_seconds": round(self.max_flush_lag, 3),
+            }
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._stopping and len(self._pending) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                if self._stopping:
+                    return
+            self.flush()
+
+    def _take(self) -> Dict[Tuple[int, int], Tuple[int, float]]:
+        with self._cond:
+            batch = {}
+            while self._pending and len(batch) < self.batch_size:
+                key, queued = self._pending.popitem(last=False)
+                batch[key] = queued
+            return batch
+
+    def _requeue(self, batch: Dict[Tuple[int, int], Tuple[int, float]]) -> None:
+        with self._cond:
+            for key, queued in batch.items():
+                # A vote queued while the batch was in flight is newer; keep it
+                if key not in self._pending:
+                    self._pending[key] = queued
+                    self._pending.move_to_end(key, last=False)
+
+    def _write(self, batch: Dict[Tuple[int, int], Tuple[int, float]]) -> None:
+        upvotes = [(post_id, user_id) for (user_id, post_id), (dir, _) in batch.items() if dir == 1]
+        removals = [(post_id, user_id) for (user_id, post_id), (dir, _) in batch.items() if dir != 1]
+
+        db = self._session_factory()
+        try:
+            inserted = db.execute(votes.insert_votes_statement(upvotes)).scalars().all() if upvotes else []
+            deleted = db.execute(votes.delete_votes_statement(removals)).scalars().all() if removals else []
+            deltas = votes.vote_count_deltas(inserted, deleted)
+            counts = db.execute(votes.adjust_vote_counts_statement(deltas)).all() if deltas else []
+            db.commit()
+            post_cache.invalidate(post_id for post_id, _ in deltas)
+            vote_hub.publish_many(post_id for post_id, _ in counts)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+# Shared buffer; only started (and used by the routers) when enabled
+vote_buffer = VoteBuffer(
+    SessionLocal,
+    batch_size=settings.vote_buffer_batch_size,
+    flush_interval=settings.vote_buffer_flush_interval_seconds,
+    max_pending=settings.vote_buffer_max_pending,
+)
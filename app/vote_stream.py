@@ -0,0 +1,397 @@
+"""
+Live vote counts over Server-Sent Events.
+
+Vote writers call `vote_hub.publish(post_id)` after their commit.
+Publishing only marks the post as changed; every `vote_stream_tick_seconds`
+the hub's tick thread reads the current counts of the posts marked since
+the previous tick, in one query, and hands them to the backend as one
+batch, so a post voted on a hundred times within a tick produces a single
+update. Reading the counts after the commits, rather than taking the count
+each writer saw, keeps racing writers from publishing an older count after
+a newer one.
+
+The backend delivers batches back to the hub of every worker:
+
+* `LocalBackend`: straight back to this process' hub (single process);
+* `PostgresBackend`: one `NOTIFY` per batch on a channel that a listener
+  thread in every worker `LISTEN`s on, for multi-process deployments.
+
+Delivered counts are merged into the subscriptions watching those posts and
+their streams are woken up, so N subscribers of a post cost one dictionary
+update each instead of N database queries.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+from typing import Callable, Dict, Iterable, Optional, Set
+
+import psycopg2
+from sqlalchemy import func
+from sqlalchemy import select as sql_select
+
+from . import models
+from .config import settings
+from .database import SQLALCHEMY_DATABASE_URL, engine
+
+logger = logging.getLogger(__name__)
+
+# Response headers of the event streams; proxies must not buffer them
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+# NOTIFY payloads must stay below 8000 bytes
+NOTIFY_MAX_ITEMS = 250
+
+
+class Subscription:
+    """
+    One stream's view of the hub: the posts it watches and the counts
+    delivered for them since the stream last looked.
+    """
+
+    def __init__(self, post_ids: Iterable[int], loop: asyncio.AbstractEventLoop):
+        self.post_ids = frozenset(post_ids)
+        self.pending: Dict[int, int] = {}
+        self.loop = loop
+        self.event = asyncio.Event()
+
+    async def wait(self, timeout: float) -> bool:
+        """
+        Waits until counts are delivered or `timeout` passes.
+
+        Returns:
+            bool: Whether counts are waiting to be taken.
+        """
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self.event.clear()
+        return bool(self.pending)
+
+
+class LocalBackend:
+    """
+    In-process backend: batches go straight back to this process' hub.
+    """
+
+    def __init__(self):
+        self.deliver: Optional[Callable[[Dict[int, int]], None]] = None
+
+    def start(self, deliver: Callable[[Dict[int, int]], None]) -> None:
+        self.deliver = deliver
+
+    def stop(self) -> None:
+        pass
+
+    def send(self, counts: Dict[int, int]) -> None:
+        if self.deliver is not None:
+            self.deliver(counts)
+
+
+class PostgresBackend:
+    """
+    Cross-process backend over PostgreSQL `LISTEN` / `NOTIFY`.
+
+    Each batch is sent as JSON payloads (`{"post_id": count}`) on `channel`;
+    a listener thread with its own connection delivers the payloads of every
+    worker, this one included, to the local hub. When that connection drops,
+    the listener reconnects and `LISTEN`s again, waiting `reconnect_seconds`
+    after the first failure and twice as long after every further one, up
+    to `max_reconnect_seconds`. Batches sent while it is disconnected are
+    lost; the streams catch up with the next change of each post.
+    """
+
+    def __init__(self, engine, dsn: str, channel: str, poll_seconds: float = 1.0,
+                 reconnect_seconds: float = 0.5, max_reconnect_seconds: float = 30.0):
+        self.engine = engine
+        self.dsn = dsn
+        self.channel = channel
+        self.poll_seconds = poll_seconds
+        self.reconnect_seconds = reconnect_seconds
+        self.max_reconnect_seconds = max_reconnect_seconds
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, deliver: Callable[[Dict[int, int]], None]) -> None:
+        self._stop.clear()
+        connection = self._connect()
+        self._thread = threading.Thread(target=self._listen, args=(connection, deliver),
+                                        name="vote-stream-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        thread, self._thread = self._thread, None
+        self._stop.set()
+        if thread is not None:
+            thread.join()
+
+    def send(self, counts: Dict[int, int]) -> None:
+        items = list(counts.items())
+        with self.engine.begin() as connection:
+            for start in range(0, len(items), NOTIFY_MAX_ITEMS):
+                payload = json.dumps(dict(items[start:start + NOTIFY_MAX_ITEMS]), separators=(",", ":"))
+                connection.execute(sql_select(func.pg_notify(self.channel, payload)))
+
+    def _connect(self):
+        connection = psycopg2.connect(self.dsn)
+        try:
+            connection.autocommit = True
+            connection.cursor().execute(f'LISTEN "{self.channel}"')
+        except BaseException:
+            connection.close()
+            raise
+        return connection
+
+    def _listen(self, connection, deliver: Callable[[Dict[int, int]], None]) -> None:
+        delay = self.reconnect_seconds
+        while not self._stop.is_set():
+            try:
+                if connection is None:
+                    connection = self._connect()
+                    logger.info("Vote stream listener reconnected")
+                delay = self.reconnect_seconds
+                self._receive(connection, deliver)
+            except (psycopg2.Error, OSError) as error:
+                logger.warning("Vote stream listener disconnected, reconnecting in %.1f s: %s",
+                               delay, str(error).strip())
+            finally:
+                if connection is not None:
+                    connection.close()
+                    connection = None
+            if self._stop.wait(delay):
+                return
+            delay = min(delay * 2, self.max_reconnect_seconds)
+
+    def _receive(self, connection, deliver: Callable[[Dict[int, int]], None]) -> None:
+        """
+        Delivers the notifications arriving on `connection` until stopped.
+        """
+        while not self._stop.is_set():
+            if not select.select([connection], [], [], self.poll_seconds)[0]:
+                continue
+            connection.poll()
+            while connection.notifies:
+                notify = connection.notifies.pop(0)
+                try:
+                    deliver({int(post_id): count for post_id, count in json.loads(notify.payload).items()})
+                except Exception:
+                    logger.exception("Dropping malformed vote notification")
+
+
+class VoteHub:
+    """
+    Coalesces vote count changes and fans them out to the subscribed streams.
+    """
+
+    def __init__(self, backend, tick_seconds: float, read_counts: Callable[[Set[int]], Dict[int, int]]):
+        self.backend = backend
+        self.tick_seconds = tick_seconds
+        self.read_counts = read_counts
+        self._lock = threading.Lock()
+        self._published: Set[int] = set()
+        self._subscriptions: Dict[int, Set[Subscription]] = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self.published = 0
+        self.batches = 0
+        self.deliveries = 0
+
+    def publish(self, post_id: int) -> None:
+        """
+        Marks a post whose vote count changed (after the commit) for the next tick.
+
+        Args:
+            post_id (int): ID of the post.
+        """
+        # Without other workers, posts nobody watches can be dropped right away
+        if isinstance(self.backend, LocalBackend) and post_id not in self._subscriptions:
+            return
+        with self._lock:
+            self._published.add(post_id)
+            self.published += 1
+
+    def publish_many(self, post_ids: Iterable[int]) -> None:
+        """
+        Marks several posts; see `publish`.
+        """
+        for post_id in post_ids:
+            self.publish(post_id)
+
+    def tick(self) -> int:
+        """
+        Reads the current counts of the posts published since the previous
+        tick and sends them as one batch.
+
+        Returns:
+            int: Number of posts in the batch.
+        """
+        with self._lock:
+            post_ids, self._published = self._published, set()
+        try:
+            counts = self.read_counts(post_ids) if post_ids else {}
+        except Exception:
+            # Retried on the next tick
+            with self._lock:
+                self._published |= post_ids
+            raise
+        if counts:
+            self.backend.send(counts)
+            with self._lock:
+                self.batches += 1
+        return len(counts)
+
+    def deliver(self, counts: Dict[int, int]) -> None:
+        """
+        Merges a batch into the subscriptions watching its posts and wakes
+        their streams up. Called by the backend, from any thread.
+        """
+        woken = set()
+        with self._lock:
+            for post_id, count in counts.items():
+                for subscription in self._subscriptions.get(post_id, ()):
+                    subscription.pending[post_id] = count
+                    woken.add(subscription)
+            self.deliveries += len(woken)
+        for subscription in woken:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.event.set)
+            except RuntimeError:
+                # The stream's event loop is gone; it is unsubscribed when its generator is closed
+                pass
+
+    def subscribe(self, post_ids: Iterable[int]) -> Subscription:
+        """
+        Registers a stream for the given posts; call from the stream's event loop.
+        """
+        subscription = Subscription(post_ids, asyncio.get_running_loop())
+        with self._lock:
+            for post_id in subscription.post_ids:
+                self._subscriptions.setdefault(post_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            for post_id in subscription.post_ids:
+                watchers = self._subscriptions.get(post_id)
+                if watchers is not None:
+                    watchers.discard(subscription)
+                    if not watchers:
+                        del self._subscriptions[post_id]
+
+    def take(self, subscription: Subscription) -> Dict[int, int]:
+        """
+        Returns and clears the counts delivered to a subscription.
+        """
+        with self._lock:
+            pending, subscription.pending = subscription.pending, {}
+        return pending
+
+    def start(self) -> None:
+        """
+        Starts the backend and the tick thread.
+        """
+        if self._thread is not None:
+            return
+        self.backend.start(self.deliver)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="vote-stream", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the tick thread and the backend.
+        """
+        thread, self._thread = self._thread, None
+        self._stop.set()
+        if thread is not None:
+            thread.join()
+            self.backend.stop()
+
+    def stats(self) -> dict:
+        """
+        Returns subscriber and fan-out counters as a dict.
+        """
+        with self._lock:
+            return {
+                "subscriptions": len({s for watchers in self._subscriptions.values() for s in watchers}),
+                "watched_posts": len(self._subscriptions),
+                "published": self.published,
+                "batches": self.batches,
+                "deliveries": self.deliveries,
+            }
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.tick_seconds):
+            try:
+                self.tick()
+            except Exception:
+                logger.exception("Sending vote counts failed")
+
+
+def counts_statement(post_ids: Iterable[int]):
+    """
+    Query of the current (post_id, vote_count) of the existing posts among `post_ids`.
+    """
+    return sql_select(models.Post.id, models.Post.vote_count).where(models.Post.id.in_(set(post_ids)))
+
+
+def sse_event(counts: Dict[int, int]) -> bytes:
+    """
+    Formats vote counts as a `votes` Server-Sent Event.
+    """
+    data = json.dumps([{"post_id": post_id, "votes": votes} for post_id, votes in sorted(counts.items())],
+                      separators=(",", ":"))
+    return f"event: votes\ndata: {data}\n\n".encode()
+
+
+async def event_stream(request, hub: VoteHub, subscription: Subscription, initial: Dict[int, int]):
+    """
+    Streams the vote counts of a subscription's posts as Server-Sent Events.
+
+    The caller subscribes before reading `initial`, so a count published in
+    between is waiting in the subscription rather than lost. The current
+    counts are sent first, then every coalesced change. A comment is sent
+    when nothing happened for `vote_stream_keepalive_seconds` and the stream
+    ends after `vote_stream_max_seconds`; `EventSource` clients reconnect on
+    their own. The subscription is released when the stream ends.
+
+    Args:
+        request (Request): The streaming request, checked for disconnects.
+        hub (VoteHub): Hub the subscription belongs to.
+        subscription (Subscription): Subscription to the watched posts.
+        initial (Dict[int, int]): Vote counts read after subscribing.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.vote_stream_max_seconds
+    try:
+        yield sse_event(initial)
+        while not await request.is_disconnected():
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            if await subscription.wait(min(settings.vote_stream_keepalive_seconds, remaining)):
+                yield sse_event(hub.take(subscription))
+            elif loop.time() < deadline:
+                yield b": keepalive\n\n"
+    finally:
+        hub.unsubscribe(subscription)
+
+
+def read_counts(post_ids: Set[int]) -> Dict[int, int]:
+    """
+    Reads the current vote counts of `post_ids` from the primary.
+    """
+    with engine.connect() as connection:
+        return dict(connection.execute(counts_statement(post_ids)).all())
+
+
+def _make_backend():
+    if settings.vote_stream_backend == "postgres":
+        return PostgresBackend(engine, SQLALCHEMY_DATABASE_URL, settings.vote_stream_channel)
+    return LocalBackend()
+
+
+# Shared hub; ticks once started by the application
+vote_hub = VoteHub(_make_backend(), tick_seconds=settings.vote_stream_tick_seconds, read_counts=read_counts)
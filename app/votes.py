@@ -0,0 +1,169 @@
+"""
+Vote persistence shared by the sync and async vote routers.
+"""
+from collections import Counter
+from typing import Iterable, List, Set, Tuple
+
+from sqlalchemy import Integer, and_, column, delete, select, true, tuple_, update, values
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+
+from . import models, schemas
+
+# SQLSTATE of a foreign key violation (the voted post does not exist)
+FOREIGN_KEY_VIOLATION = "23503"
+
+
+def vote_statement(post_id: int, user_id: int, dir: int):
+    """
+    Builds the single statement that applies a vote and its counter update.
+
+    For an upvote the vote is inserted with `ON CONFLICT DO NOTHING`, for a
+    removal it is deleted; either way the affected row is returned from a CTE
+    that drives the `posts.vote_count` update, whose result is joined to the
+    voted post like `post_writes` does for post updates:
+
+        WITH changed_vote AS (INSERT ... ON CONFLICT DO NOTHING RETURNING post_id),
+             updated AS (UPDATE posts SET vote_count = vote_count + 1
+                         FROM changed_vote WHERE posts.id = changed_vote.post_id
+                         RETURNING posts.vote_count),
+             target AS (SELECT id FROM posts WHERE id = :post_id)
+        SELECT updated.vote_count FROM target LEFT JOIN updated ON true
+
+    The statement returns no row when the post does not exist, and otherwise
+    the post's new vote count, NULL when nothing changed (the vote already
+    existed / did not exist). An upvote on a missing post fails on the
+    foreign key instead.
+
+    Args:
+        post_id (int): ID of the voted post.
+        user_id (int): ID of the voting user.
+        dir (int): 1 to add the vote, 0 to remove it.
+
+    Returns:
+        Select: The statement to execute.
+    """
+    if dir == 1:
+        changed = postgresql.insert(models.Vote).values(
+            post_id=post_id, user_id=user_id).on_conflict_do_nothing().returning(models.Vote.post_id)
+        delta = 1
+    else:
+        changed = delete(models.Vote).where(
+            models.Vote.post_id == post_id, models.Vote.user_id == user_id).returning(models.Vote.post_id)
+        delta = -1
+
+    changed = changed.cte("changed_vote")
+    updated = update(models.Post).where(models.Post.id == changed.c.post_id).values(
+        vote_count=models.Post.vote_count + delta).returning(models.Post.vote_count).cte("updated")
+    target = select(models.Post.id).where(models.Post.id == post_id).cte("target")
+    return select(updated.c.vote_count).select_from(target.outerjoin(updated, true()))
+
+
+def is_foreign_key_violation(error: IntegrityError) -> bool:
+    """
+    Tells whether an IntegrityError was raised by a foreign key constraint.
+
+    Works for psycopg2 (`pgcode`) as well as asyncpg (`sqlstate`, possibly on
+    the driver exception wrapped by SQLAlchemy's adapter).
+    """
+    for candidate in (error.orig, getattr(error.orig, "__cause__", None)):
+        code = getattr(candidate, "pgcode", None) or getattr(candidate, "sqlstate", None)
+        if code:
+            return code == FOREIGN_KEY_VIOLATION
+    return False
+
+
+def insert_votes_statement(pairs: List[Tuple[int, int]]):
+    """
+    Builds a bulk insert of (post_id, user_id) votes.
+
+    Existing votes are skipped (`ON CONFLICT DO NOTHING`) and so are votes on
+    posts or by users that no longer exist, so that one stale entry cannot
+    fail the whole batch on a foreign key. The statement returns the post_id
+    of every vote actually inserted.
+    """
+    rows = values(column("post_id", Integer), column("user_id", Integer), name="new_votes").data(pairs)
+    existing = select(rows.c.post_id, rows.c.user_id).select_from(
+        rows.join(models.Post, models.Post.id == rows.c.post_id)
+            .join(models.Users, models.Users.id == rows.c.user_id))
+    return postgresql.insert(models.Vote).from_select(["post_id", "user_id"], existing) \
+        .on_conflict_do_nothing().returning(models.Vote.post_id)
+
+
+def delete_votes_statement(pairs: List[Tuple[int, int]]):
+    """
+    Builds a bulk delete of (post_id, user_id) votes, returning the post_id
+    of every vote actually deleted.
+    """
+    return delete(models.Vote).where(
+        tuple_(models.Vote.post_id, models.Vote.user_id).in_(pairs)).returning(models.Vote.post_id)
+
+
+def vote_count_deltas(inserted: Iterable[int], deleted: Iterable[int]) -> List[Tuple[int, int]]:
+    """
+    Nets the post ids returned by the bulk insert and delete into
+    (post_id, delta) pairs, leaving out posts whose count is unchanged.
+    """
+    deltas = Counter(inserted)
+    deltas.subtract(deleted)
+    return [(post_id, delta) for post_id, delta in deltas.items() if delta]
+
+
+def adjust_vote_counts_statement(deltas: List[Tuple[int, int]]):
+    """
+    Builds one update adding each (post_id, delta) to `posts.vote_count`,
+    returning the (id, vote_count) of every updated post.
+    """
+    counts = values(column("post_id", Integer), column("delta", Integer), name="vote_deltas").data(deltas)
+    return update(models.Post).where(models.Post.id == counts.c.post_id) \
+        .values(vote_count=models.Post.vote_count + counts.c.delta) \
+        .returning(models.Post.id, models.Post.vote_count) \
+        .execution_options(synchronize_session=False)
+
+
+def batch_state_statement(post_ids: Iterable[int], user_id: int):
+    """
+    Builds the query returning, for each of `post_ids` that exists, the post
+    id and the post id again if `user_id` has voted on it (NULL otherwise).
+    """
+    return select(models.Post.id, models.Vote.post_id).outerjoin(
+        models.Vote, and_(models.Vote.post_id == models.Post.id, models.Vote.user_id == user_id)
+    ).where(models.Post.id.in_(set(post_ids)))
+
+
+def plan_vote_batch(batch: List[schemas.Vote], user_id: int, existing_posts: Set[int], voted: Set[int]):
+    """
+    Resolves a batch of votes in order against the current state.
+
+    Each item is judged as if the previous items had already been applied,
+    with the same outcomes and details as the single vote endpoint (201,
+    404, 409).
+
+    Args:
+        batch (List[schemas.Vote]): Votes in request order.
+        user_id (int): ID of the voting user.
+        existing_posts (Set[int]): IDs of the batch's posts that exist.
+        voted (Set[int]): IDs of the posts the user has currently voted on.
+
+    Returns:
+        tuple: The per-item `schemas.VoteResult` list, the post ids to insert
+        votes for and the post ids to delete votes for.
+    """
+    wanted = set(voted)
+    results = []
+    for item in batch:
+        if item.post_id not in existing_posts:
+            status_code, detail = 404, f"Post with id {item.post_id} does not exist"
+        elif item.dir == 1 and item.post_id in wanted:
+            status_code, detail = 409, f"user {user_id} has already voted on post {item.post_id}"
+        elif item.dir == 1:
+            wanted.add(item.post_id)
+            status_code, detail = 201, "successfully added vote"
+        elif item.post_id not in wanted:
+            status_code, detail = 404, "Vote does not exist"
+        else:
+            wanted.discard(item.post_id)
+            status_code, detail = 201, "successfully deleted vote"
+        results.append(schemas.VoteResult(
+            post_id=item.post_id, dir=item.dir, status_code=status_code, detail=detail))
+    return results, sorted(wanted - voted), sorted(voted - wanted)
@@ -0,0 +1,78 @@
+"""
+Compares requests/sec of the sync and async routers.
+
+Each mode runs in its own uvicorn process (DATABASE_ASYNC=false/true) against
+the database configured in the environment, and `GET /posts/` is driven by
+50, 200 and 1000 concurrent keep-alive clients.
+
+Usage:
+    python -m benchmarks.bench_async [--duration 10] [--concurrency 50 200 1000]
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from .common import Connection, http_json, latency_summary, login, start_server
+
+
+async def drive(base_url: str, token: str, concurrency: int, duration: float):
+    """
+    Runs `concurrency` clients issuing `GET /posts/` back to back for `duration` seconds.
+    """
+    latencies, errors = [], 0
+    headers = {"Authorization": f"Bearer {token}"}
+    deadline = time.monotonic() + duration
+
+    async def client():
+        nonlocal errors
+        connection = Connection(base_url)
+        try:
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    status, _ = await connection.request("GET", "/posts/", headers=headers)
+                except (OSError, asyncio.IncompleteReadError):
+                    status = None
+                    connection.close()
+                if status == 200:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+        finally:
+            connection.close()
+
+    started = time.monotonic()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latency_summary(latencies, errors, time.monotonic() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200, 1000])
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    results = {}
+    for mode in ("sync", "async"):
+        server = start_server(args.port, env={"DATABASE_ASYNC": str(mode == "async").lower()})
+        try:
+            token = login(base_url, "bench-async@example.com", "password123")
+            for i in range(10):
+                http_json(base_url, "POST", "/posts/", token=token,
+                          payload={"title": f"bench {i}", "content": "content"})
+            results[mode] = {
+                str(concurrency): asyncio.run(drive(base_url, token, concurrency, args.duration))
+                for concurrency in args.concurrency
+            }
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
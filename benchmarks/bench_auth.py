@@ -0,0 +1,111 @@
+"""
+Measures `GET /posts/` latency while the server is flooded with logins.
+
+Two uvicorn processes are compared against the database configured in the
+environment:
+
+* inline: bcrypt runs in the request thread with no auth concurrency limit
+  (AUTH_POOL_WORKERS=0), i.e. the behaviour before the auth process pool;
+* pool:   bcrypt runs in the auth process pool with the configured limit.
+
+In each mode `--logins` clients post `/login` back to back while `--readers`
+clients read the feed; the p99 of the readers is the number to watch.
+
+Usage:
+    python -m benchmarks.bench_auth [--duration 10] [--logins 50] [--readers 10]
+"""
+import argparse
+import asyncio
+import json
+import time
+import urllib.parse
+
+from .common import Connection, http_json, latency_summary, login, start_server
+
+MODES = {
+    "inline": {"AUTH_POOL_WORKERS": "0", "AUTH_MAX_CONCURRENCY": "100000"},
+    "pool": {},
+}
+
+
+async def client_loop(base_url: str, method: str, path: str, deadline: float, latencies: list,
+                      statuses: dict, body: bytes = None, headers: dict = None):
+    """
+    Issues the same request back to back until `deadline`, recording the
+    latency of successful responses and a count per status code.
+    """
+    connection = Connection(base_url)
+    try:
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                status, _ = await connection.request(method, path, body=body, headers=headers)
+            except (OSError, asyncio.IncompleteReadError):
+                status = None
+                connection.close()
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                latencies.append(time.perf_counter() - started)
+    finally:
+        connection.close()
+
+
+async def flood(base_url: str, token: str, email: str, password: str,
+                logins: int, readers: int, duration: float):
+    """
+    Runs the login flood and the feed readers side by side for `duration` seconds.
+    """
+    deadline = time.monotonic() + duration
+    form = urllib.parse.urlencode({"username": email, "password": password}).encode()
+    login_headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    read_headers = {"Authorization": f"Bearer {token}"}
+    login_latencies, login_statuses = [], {}
+    read_latencies, read_statuses = [], {}
+
+    started = time.monotonic()
+    await asyncio.gather(
+        *(client_loop(base_url, "POST", "/login", deadline, login_latencies, login_statuses,
+                      body=form, headers=login_headers) for _ in range(logins)),
+        *(client_loop(base_url, "GET", "/posts/", deadline, read_latencies, read_statuses,
+                      headers=read_headers) for _ in range(readers)),
+    )
+    elapsed = time.monotonic() - started
+
+    def summary(latencies, statuses):
+        result = latency_summary(latencies, sum(n for s, n in statuses.items() if s != 200), elapsed)
+        result["statuses"] = {str(status): count for status, count in statuses.items()}
+        return result
+
+    return {"get_posts": summary(read_latencies, read_statuses),
+            "login": summary(login_latencies, login_statuses)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--readers", type=int, default=10)
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    email, password = "bench-auth@example.com", "password123"
+    results = {}
+    for mode, env in MODES.items():
+        server = start_server(args.port, env=env)
+        try:
+            token = login(base_url, email, password)
+            for i in range(10):
+                http_json(base_url, "POST", "/posts/", token=token,
+                          payload={"title": f"bench {i}", "content": "content"})
+            results[mode] = asyncio.run(flood(base_url, token, email, password,
+                                              args.logins, args.readers, args.duration))
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
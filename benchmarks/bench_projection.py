@@ -0,0 +1,126 @@
+"""
+Time and memory of building a 10k-row feed response.
+
+Seeds `--rows` posts for a dedicated benchmark user in the database
+configured in the environment, then builds the `GET /posts/?limit=<rows>`
+response body in-process three ways:
+
+* orm:        `Post` entities + `response_model` validation + stdlib json
+              (the default path);
+* orm_fast:   `Post` entities + `app.serializers` + orjson (FAST_JSON_RESPONSES);
+* projection: plain column rows streamed through `app.projections`
+              (FEED_PROJECTION).
+
+Time is the median over `--runs`; memory is the tracemalloc peak of one
+extra run.
+
+Usage:
+    python -m benchmarks.bench_projection [--rows 10000] [--runs 5] [--keep]
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import func, text
+from sqlalchemy.orm import joinedload
+
+from app import models, projections, schemas, serializers
+from app.database import SessionLocal
+
+BENCH_EMAIL = "bench-projection@example.com"
+
+
+def seed(db, count: int) -> int:
+    """
+    Creates the benchmark user and `count` posts.
+    """
+    user = db.query(models.Users).filter(models.Users.email == BENCH_EMAIL).first()
+    if user is None:
+        user = models.Users(email=BENCH_EMAIL, password="not-a-real-hash")
+        db.add(user)
+        db.commit()
+
+    existing = db.query(func.count(models.Post.id)).filter(models.Post.owner_id == user.id).scalar()
+    if existing < count:
+        db.execute(text("""
+            INSERT INTO posts (title, content, owner_id, vote_count)
+            SELECT 'title ' || i, repeat('content ', 20), :owner_id, i % 50
+            FROM generate_series(1, :count) AS i
+        """), {"owner_id": user.id, "count": count - existing})
+        db.commit()
+    return user.id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded posts afterwards")
+    args = parser.parse_args()
+
+    field = create_response_field(name="Response_get_posts", type_=List[schemas.PostOut])
+    loop = asyncio.new_event_loop()
+    db = SessionLocal()
+    user_id = seed(db, args.rows)
+
+    def orm_rows():
+        rows = db.query(models.Post, models.Post.vote_count.label("votes")).options(
+            joinedload(models.Post.owner)).filter(models.Post.owner_id == user_id).limit(args.rows).all()
+        return rows
+
+    def orm():
+        rows = orm_rows()
+        content = loop.run_until_complete(serialize_response(field=field, response_content=rows))
+        body = JSONResponse(content).body
+        db.expunge_all()
+        return body
+
+    def orm_fast():
+        body = serializers.feed_response(orm_rows()).body
+        db.expunge_all()
+        return body
+
+    def projection():
+        statement = projections.feed_statement().filter(models.Post.owner_id == user_id).limit(args.rows)
+        rows = db.execute(statement.execution_options(stream_results=True)).yield_per(
+            projections.STREAM_BATCH_SIZE)
+        # A real response is written chunk by chunk; only the total size is kept here
+        return sum(len(chunk) for chunk in projections.stream_feed(rows, None, args.rows))
+
+    results = {"rows": args.rows}
+    try:
+        for name, build in (("orm", orm), ("orm_fast", orm_fast), ("projection", projection)):
+            timings = []
+            for _ in range(args.runs):
+                started = time.perf_counter()
+                build()
+                timings.append(time.perf_counter() - started)
+            timings.sort()
+
+            tracemalloc.start()
+            build()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            results[name] = {
+                "median_ms": round(timings[len(timings) // 2] * 1000, 1),
+                "peak_memory_mb": round(peak / 2 ** 20, 1),
+            }
+        if not args.keep:
+            db.query(models.Users).filter(models.Users.id == user_id).delete()
+            db.commit()
+    finally:
+        db.close()
+        loop.close()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
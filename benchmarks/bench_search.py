@@ -0,0 +1,106 @@
+"""
+Search latency of the old `LIKE '%term%'` filter versus the full-text index.
+
+Seeds `--posts` synthetic posts (1M by default) for a dedicated benchmark
+user in the database configured in the environment, then times the feed
+query for a set of search terms both ways.
+
+Usage:
+    python -m benchmarks.bench_search [--posts 1000000] [--runs 20] [--keep]
+"""
+import argparse
+import json
+import time
+
+from sqlalchemy import func, text
+
+from app import models, search
+from app.database import SessionLocal
+
+from .common import latency_summary, percentile
+
+BENCH_EMAIL = "bench-search@example.com"
+# Words are "w<n>" drawn from a skewed distribution over VOCABULARY ids, so
+# low ids are common and high ids rare; the terms cover that whole range.
+VOCABULARY = 20000
+TERMS = ["w1", "w40", "w300 w301", "w2500", "w15000", "w99999"]
+
+
+def seed(db, count: int) -> int:
+    """
+    Creates the benchmark user and `count` posts with random titles/contents.
+    """
+    user = db.query(models.Users).filter(models.Users.email == BENCH_EMAIL).first()
+    if user is None:
+        user = models.Users(email=BENCH_EMAIL, password="not-a-real-hash")
+        db.add(user)
+        db.commit()
+
+    existing = db.query(func.count(models.Post.id)).filter(models.Post.owner_id == user.id).scalar()
+    if existing < count:
+        # `i` is referenced inside the word subqueries so they are re-evaluated per row
+        db.execute(text("""
+            INSERT INTO posts (title, content, owner_id)
+            SELECT
+                array_to_string(ARRAY(
+                    SELECT 'w' || floor(power(random(), 3) * :vocabulary)::int
+                    FROM generate_series(1, 3 + i % 1)), ' '),
+                array_to_string(ARRAY(
+                    SELECT 'w' || floor(power(random(), 3) * :vocabulary)::int
+                    FROM generate_series(1, 30 + i % 1)), ' '),
+                :owner_id
+            FROM generate_series(1, :count) AS i
+        """), {"vocabulary": VOCABULARY, "owner_id": user.id, "count": count - existing})
+        db.commit()
+        db.execute(text("ANALYZE posts"))
+    return user.id
+
+
+def time_queries(db, build_query, runs: int):
+    """
+    Runs the feed query for every term `runs` times; returns overall and per-term latency.
+    """
+    latencies, per_term = [], {term: [] for term in TERMS}
+    started = time.perf_counter()
+    for _ in range(runs):
+        for term in TERMS:
+            query_started = time.perf_counter()
+            build_query(term).limit(10).all()
+            elapsed = time.perf_counter() - query_started
+            latencies.append(elapsed)
+            per_term[term].append(elapsed)
+    summary = latency_summary(latencies, 0, time.perf_counter() - started)
+    summary["p50_ms_by_term"] = {
+        term: round(percentile(values, 50) * 1000, 2) for term, values in per_term.items()}
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded posts afterwards")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        user_id = seed(db, args.posts)
+        feed = db.query(models.Post, models.Post.vote_count.label("votes"))
+        results = {
+            "posts": args.posts,
+            "like_title": time_queries(
+                db, lambda term: feed.filter(models.Post.title.contains(term)), args.runs),
+            "full_text": time_queries(
+                db, lambda term: search.apply_search(feed, term, "postgresql"), args.runs),
+        }
+        if not args.keep:
+            db.query(models.Users).filter(models.Users.id == user_id).delete()
+            db.commit()
+    finally:
+        db.close()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Compares the cost of serializing feed pages.
+
+* response_model: what FastAPI does for `response_model=List[schemas.PostOut]`
+  (pydantic validation of the ORM rows, `jsonable_encoder`, stdlib `json`);
+* fast: `app.serializers` building the output from the rows plus `orjson`.
+
+The rows are in-memory ORM objects, so only serialization is measured (no
+database or HTTP). Pages of 10, 100 and 1000 posts are timed.
+
+Usage:
+    python -m benchmarks.bench_serialization [--sizes 10 100 1000] [--repeat 200]
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app import models, schemas, serializers
+
+# Stand-in for the SQLAlchemy Row returned by the feed query
+FeedRow = namedtuple("FeedRow", ["Post", "votes"])
+
+
+def make_rows(count: int):
+    """
+    Builds `count` (Post, votes) rows shaped like the feed query results.
+    """
+    now = datetime.now(timezone.utc)
+    owner = models.Users(id=1, email="bench@example.com", password="x", created_at=now)
+    return [
+        FeedRow(models.Post(id=i, title=f"title {i}", content="content " * 20, published=True,
+                            created_at=now, owner_id=owner.id, owner=owner), i % 50)
+        for i in range(count)
+    ]
+
+
+def time_per_page(render, repeat: int) -> float:
+    """
+    Median time in ms of `render()` over `repeat` runs.
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        render()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return round(timings[len(timings) // 2] * 1000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    field = create_response_field(name="Response_get_posts", type_=List[schemas.PostOut])
+    loop = asyncio.new_event_loop()
+
+    def response_model(rows):
+        content = loop.run_until_complete(serialize_response(field=field, response_content=rows))
+        return JSONResponse(content).body
+
+    def fast(rows):
+        return serializers.feed_response(rows).body
+
+    results = {}
+    for size in args.sizes:
+        rows = make_rows(size)
+        assert json.loads(response_model(rows)) == json.loads(fast(rows))
+        baseline = time_per_page(lambda: response_model(rows), args.repeat)
+        optimized = time_per_page(lambda: fast(rows), args.repeat)
+        results[str(size)] = {
+            "response_model_ms": baseline,
+            "fast_ms": optimized,
+            "speedup": round(baseline / optimized, 1) if optimized else None,
+        }
+    loop.close()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Shared helpers for the benchmark scripts.
+
+The scripts only depend on the standard library (plus the app's own
+requirements), so the HTTP client below is a minimal asyncio HTTP/1.1
+keep-alive client rather than an extra dependency.
+"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Connection:
+    """
+    A single keep-alive HTTP/1.1 connection.
+    """
+
+    def __init__(self, base_url: str):
+        parsed = urllib.parse.urlsplit(base_url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.reader = None
+        self.writer = None
+
+    async def _connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method: str, path: str, body: Optional[bytes] = None,
+                      headers: Optional[Dict[str, str]] = None) -> Tuple[int, bytes]:
+        """
+        Sends a request and reads the full response, reconnecting once if the
+        server closed the idle connection.
+
+        Returns:
+            Tuple[int, bytes]: Status code and response body.
+        """
+        for attempt in range(2):
+            if self.writer is None:
+                await self._connect()
+            try:
+                return await self._roundtrip(method, path, body, headers or {})
+            except (ConnectionError, asyncio.IncompleteReadError):
+                self.close()
+                if attempt:
+                    raise
+
+    async def _roundtrip(self, method, path, body, headers) -> Tuple[int, bytes]:
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        if body is not None:
+            lines.append(f"Content-Length: {len(body)}")
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + (body or b""))
+        await self.writer.drain()
+
+        status_line = await self.reader.readuntil(b"\r\n")
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = await self.reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get("transfer-encoding") == "chunked":
+            chunks = []
+            while True:
+                size = int((await self.reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                chunks.append(chunk[:-2])
+            content = b"".join(chunks)
+        else:
+            content = await self.reader.readexactly(int(response_headers.get("content-length", 0)))
+
+        if response_headers.get("connection") == "close":
+            self.close()
+        return status, content
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of `values` (0 for an empty list).
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def latency_summary(latencies: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    """
+    Summarizes request latencies (in seconds) as throughput and percentiles in ms.
+    """
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def http_json(base_url: str, method: str, path: str, payload=None, form=None, token=None):
+    """
+    Blocking one-off request used for setup (creating users, logging in, ...).
+    """
+    headers = {}
+    data = None
+    if payload is not None:
+        data = json.dumps(payload).encode()
+        headers["Content-Type"] = "application/json"
+    elif form is not None:
+        data = urllib.parse.urlencode(form).encode()
+        headers["Content-Type"] = "application/x-www-form-urlencoded"
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    request = urllib.request.Request(base_url + path, data=data, headers=headers, method=method)
+    try:
+        with urllib.request.urlopen(request) as response:
+            status, content = response.status, response.read()
+    except urllib.error.HTTPError as exc:
+        status, content = exc.code, exc.read()
+    try:
+        return status, json.loads(content or b"null")
+    except ValueError:
+        return status, content.decode(errors="replace")
+
+
+def login(base_url: str, email: str, password: str) -> str:
+    """
+    Creates the user if needed and returns a bearer token for it.
+    """
+    http_json(base_url, "POST", "/users/", payload={"email": email, "password": password})
+    status, body = http_json(base_url, "POST", "/login",
+                             form={"username": email, "password": password})
+    if status != 200:
+        raise RuntimeError(f"login failed with {status}: {body}")
+    return body["access_token"]
+
+
+def start_server(port: int, env: Optional[Dict[str, str]] = None,
+                 workers: int = 1) -> subprocess.Popen:
+    """
+    Starts `uvicorn app.main:app` on `port` and waits until it answers.
+    """
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=REPO_ROOT, env={**os.environ, **(env or {})})
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/")
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("server did not start")
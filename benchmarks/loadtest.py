@@ -0,0 +1,239 @@
+"""
+Mixed-workload load test producing comparable JSON baselines.
+
+Virtual users log in as the users created by `python -m app.cli seed`
+(`seed-user-<n>@example.com`) and loop over a weighted mix of operations:
+
+* `login`: `POST /login` (bcrypt verification);
+* `feed`: `GET /posts/` with a random sort, first page;
+* `post`: `GET /posts/{id}`, ids drawn Zipf-skewed from the most voted posts;
+* `vote`: `POST /votes/`, adding or removing the user's vote on such a post.
+
+Throughput and p50/p95/p99 latency per operation and overall are printed as
+JSON together with the commit and the parameters of the run, and written to
+`--output` to serve as a baseline. `--compare BASELINE` prints the change of
+every metric against an earlier run.
+
+Without `--base-url` a uvicorn server is started against the database
+configured in the environment (seed it first).
+
+Usage:
+    python -m app.cli seed --users 1000 --posts 100000 --votes 1000000
+    python -m benchmarks.loadtest [--duration 30] [--concurrency 50] [--mix login=1,feed=45,post=40,vote=14]
+                                  [--output baseline.json] [--compare baseline.json]
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import time
+import urllib.parse
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from app.seed import seed_email, zipf_cum_weights
+
+from .common import REPO_ROOT, Connection, http_json, latency_summary, start_server
+
+OPERATIONS = ("login", "feed", "post", "vote")
+# Statuses counted as successful; votes on posts already voted on (409) or
+# removing missing votes (404) are normal outcomes of the random mix
+EXPECTED_STATUSES = {
+    "login": {200},
+    "feed": {200},
+    "post": {200},
+    "vote": {201, 202, 404, 409},
+}
+FEED_SORTS = ("", "?sort=new", "?sort=top", "?sort=hot")
+# Metrics compared by --compare, and whether higher is better
+COMPARED_METRICS = {"requests_per_second": True, "p50_ms": False, "p95_ms": False, "p99_ms": False}
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """
+    Parses "login=1,feed=45,..." into operation weights.
+    """
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation {name!r}, expected one of {OPERATIONS}")
+        mix[name] = float(weight)
+    return mix
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def hot_post_ids(base_url: str, token: str, count: int) -> List[int]:
+    """
+    Ids of the `count` most voted posts, most voted first.
+    """
+    status, body = http_json(base_url, "GET", f"/posts/?sort=top&limit={count}", token=token)
+    if status != 200 or not body["items"]:
+        raise RuntimeError("no posts to load test; run `python -m app.cli seed` first")
+    return [item["Post"]["id"] for item in body["items"]]
+
+
+async def virtual_user(base_url: str, number: int, password: str, post_ids: List[int], cum_weights,
+                       mix: Dict[str, float], deadline: float, results: Dict[str, dict], rng: random.Random):
+    """
+    Logs in as seeded user `number` and runs the operation mix until `deadline`.
+    """
+    connection = Connection(base_url)
+    login_form = urllib.parse.urlencode({"username": seed_email(number), "password": password}).encode()
+    login_headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    headers = {}
+    operations, weights = list(mix), list(mix.values())
+
+    async def call(operation, method, path, body=None, extra_headers=None):
+        started = time.perf_counter()
+        try:
+            status, content = await connection.request(method, path, body, {**headers, **(extra_headers or {})})
+        except (OSError, asyncio.IncompleteReadError):
+            connection.close()
+            status, content = None, b""
+        result = results[operation]
+        if status in EXPECTED_STATUSES[operation]:
+            result["latencies"].append(time.perf_counter() - started)
+        else:
+            result["errors"] += 1
+            status_name = str(status) if status is not None else "connection"
+            result["error_statuses"][status_name] = result["error_statuses"].get(status_name, 0) + 1
+        return status, content
+
+    try:
+        status, content = await call("login", "POST", "/login", login_form, login_headers)
+        if status != 200:
+            return
+        headers["Authorization"] = f"Bearer {json.loads(content)['access_token']}"
+
+        while time.monotonic() < deadline:
+            operation = rng.choices(operations, weights)[0]
+            if operation == "login":
+                await call("login", "POST", "/login", login_form, login_headers)
+            elif operation == "feed":
+                await call("feed", "GET", "/posts/" + rng.choice(FEED_SORTS))
+            else:
+                post_id = rng.choices(post_ids, cum_weights=cum_weights)[0]
+                if operation == "post":
+                    await call("post", "GET", f"/posts/{post_id}")
+                else:
+                    body = json.dumps({"post_id": post_id, "dir": rng.choice((0, 1))}).encode()
+                    await call("vote", "POST", "/votes/", body, {"Content-Type": "application/json"})
+    finally:
+        connection.close()
+
+
+async def run(base_url: str, args, post_ids: List[int]) -> dict:
+    """
+    Runs `args.concurrency` virtual users for `args.duration` seconds.
+    """
+    results = {operation: {"latencies": [], "errors": 0, "error_statuses": {}} for operation in OPERATIONS}
+    cum_weights = zipf_cum_weights(len(post_ids), args.skew)
+    rng = random.Random(args.seed)
+    deadline = time.monotonic() + args.duration
+    started = time.monotonic()
+    await asyncio.gather(*(
+        virtual_user(base_url, number % args.users, args.password, post_ids, cum_weights, args.mix,
+                     deadline, results, random.Random(rng.random()))
+        for number in range(args.concurrency)))
+    elapsed = time.monotonic() - started
+
+    summary = {}
+    for operation, result in results.items():
+        if result["latencies"] or result["errors"]:
+            summary[operation] = latency_summary(result["latencies"], result["errors"], elapsed)
+            summary[operation]["error_statuses"] = result["error_statuses"]
+    summary["total"] = latency_summary(
+        [latency for result in results.values() for latency in result["latencies"]],
+        sum(result["errors"] for result in results.values()), elapsed)
+    return summary
+
+
+def compare(current: dict, baseline: dict) -> dict:
+    """
+    Relative change (%) of every compared metric against a baseline run,
+    with `regression` set when it moved the wrong way by more than 10%.
+    """
+    changes = {}
+    for operation, metrics in current["results"].items():
+        before = baseline["results"].get(operation)
+        if before is None:
+            continue
+        changes[operation] = {}
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            if not before[metric]:
+                continue
+            change = (metrics[metric] - before[metric]) / before[metric] * 100
+            changes[operation][metric] = {
+                "baseline": before[metric],
+                "current": metrics[metric],
+                "change_pct": round(change, 1),
+                "regression": (change < -10) if higher_is_better else (change > 10),
+            }
+    return {"baseline_commit": baseline["commit"], "changes": changes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", help="Server to load (default: start one on --port)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--concurrency", type=int, default=50, help="Virtual users")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("login=1,feed=45,post=40,vote=14"),
+                        help="Operation weights")
+    parser.add_argument("--users", type=int, default=1000, help="Seeded users to log in as")
+    parser.add_argument("--password", default="password123", help="Password of the seeded users")
+    parser.add_argument("--hot-posts", type=int, default=1000, help="Most voted posts read and voted on")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of the post choice")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON file to compare the results with")
+    args = parser.parse_args()
+
+    base_url = args.base_url or f"http://127.0.0.1:{args.port}"
+    started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    server = None if args.base_url else start_server(args.port)
+    try:
+        status, body = http_json(base_url, "POST", "/login",
+                                 form={"username": seed_email(0), "password": args.password})
+        if status != 200:
+            raise RuntimeError(f"cannot log in as {seed_email(0)}; run `python -m app.cli seed` first")
+        post_ids = hot_post_ids(base_url, body["access_token"], args.hot_posts)
+        results = asyncio.run(run(base_url, args, post_ids))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    report = {
+        "commit": git_commit(),
+        "started_at": started_at,
+        "parameters": {
+            "duration": args.duration,
+            "concurrency": args.concurrency,
+            "mix": args.mix,
+            "users": args.users,
+            "hot_posts": len(post_ids),
+            "skew": args.skew,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    if args.compare:
+        with open(args.compare) as baseline:
+            report["comparison"] = compare(report, json.load(baseline))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
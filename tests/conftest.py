@@ -1,20 +1,24 @@
 from fastapi.testclient import TestClient
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from app.main import app
 from app import models
 from app.config import settings
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.database import Base
 from alembic import command
-from app.oauth2 import create_access_token
+from app.oauth2 import create_access_token, token_cache
+from app.post_cache import post_cache
+from app.instrumentation import instrument_engine
 
 SQLALCHEMY_DATABASE_URL = f'postgresql://{settings.database_username}:{settings.database_password}@{settings.database_hostname}:{settings.database_port}/{settings.database_name}_test'
 
 
 engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# Time test statements like the application engine's
+instrument_engine(engine)
 
 TestingSessionLocal = sessionmaker( bind=engine)
 
@@ -23,6 +27,9 @@ TestingSessionLocal = sessionmaker( bind=engine)
 def session():
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    # User ids restart with the fresh schema, so cached users would be stale
+    token_cache.clear()
+    post_cache.clear()
     db = TestingSessionLocal()
     try:
         yield db
@@ -30,6 +37,23 @@ def session():
         db.close()
 
 
+@pytest.fixture()
+def query_counter():
+    """
+    Records the SQL statements sent to the test database while active.
+    """
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
 @pytest.fixture()
 def client(session):
     def override_get_db():
@@ -39,6 +63,7 @@ def client(session):
         finally:
             session.close()
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
     yield TestClient(app)
 
 
@@ -70,6 +95,12 @@ def authorized_client(client, token):
    return client
 
 
+@pytest.fixture
+def admin_client(authorized_client, test_user, monkeypatch):
+    monkeypatch.setattr(settings, "admin_emails", [test_user["email"]])
+    return authorized_client
+
+
 @pytest.fixture
 def test_posts(test_user, session):
     posts_data = [{
@@ -0,0 +1,106 @@
+import json
+import logging
+from sqlalchemy import create_engine
+from app.config import settings
+from app.instrumentation import query_stats
+from app.pool_metrics import TimedQueuePool, instrument
+from app.post_cache import post_cache
+from .conftest import SQLALCHEMY_DATABASE_URL
+
+
+def test_pool_metrics_requires_auth(client):
+    res = client.get("/admin/pool")
+    assert res.status_code == 401
+
+
+def test_admin_endpoints_require_admin(authorized_client, test_user, monkeypatch):
+    monkeypatch.setattr(settings, "admin_emails", [])
+    for path in ("/admin/pool", "/admin/caches", "/admin/queries", "/admin/replicas"):
+        res = authorized_client.get(path)
+        assert res.status_code == 403
+        assert res.json()["detail"] == "Not authorized to perform requested action"
+    monkeypatch.setattr(settings, "admin_emails", ["someone-else@example.com"])
+    assert authorized_client.get("/admin/pool").status_code == 403
+    monkeypatch.setattr(settings, "admin_emails", [test_user["email"].upper()])
+    assert authorized_client.get("/admin/pool").status_code == 200
+
+
+def test_pool_metrics_endpoint(admin_client):
+    res = admin_client.get("/admin/pool")
+    assert res.status_code == 200
+    assert set(res.json()) == {"sync", "async"}
+    assert res.json()["sync"]["pool_size"] == 5
+
+
+def test_pool_metrics_counts_checkouts():
+    engine = create_engine(SQLALCHEMY_DATABASE_URL, poolclass=TimedQueuePool,
+                           pool_size=1, max_overflow=1)
+    metrics = instrument(engine.pool)
+
+    first = engine.connect()
+    second = engine.connect()
+    snapshot = metrics.snapshot(engine.pool)
+    assert snapshot["checked_out"] == 2
+    assert snapshot["overflow"] == 1
+    assert snapshot["connects"] == 2
+
+    first.close()
+    second.close()
+    snapshot = metrics.snapshot(engine.pool)
+    assert snapshot["checked_out"] == 0
+    assert snapshot["checkout_wait"]["count"] == 2
+    engine.dispose()
+
+
+def test_cache_metrics_endpoint(admin_client, test_posts):
+    admin_client.get(f"/posts/{test_posts[0].id}")
+    res = admin_client.get("/admin/caches")
+    assert res.status_code == 200
+    assert set(res.json()) == {"auth_tokens", "posts", "feed_snapshot"}
+    assert res.json()["posts"]["misses"] >= 1
+
+
+def test_server_timing_header(authorized_client, test_posts):
+    post_id = test_posts[0].id
+    authorized_client.get(f"/posts/{post_id}")
+    post_cache.clear()
+    res = authorized_client.get(f"/posts/{post_id}")
+    timing = res.headers["server-timing"]
+    assert timing.startswith('db;desc="1 queries";dur=')
+    assert "db-slowest;dur=" in timing
+    # Served from the post cache: no statement at all
+    res = authorized_client.get(f"/posts/{post_id}")
+    assert res.headers["server-timing"].startswith('db;desc="0 queries";dur=0.000')
+
+
+def test_query_metrics_endpoint(admin_client, test_posts):
+    query_stats.clear()
+    for _ in range(3):
+        admin_client.get("/posts/")
+    admin_client.get(f"/posts/{test_posts[0].id}")
+    res = admin_client.get("/admin/queries")
+    assert res.status_code == 200
+    feed = res.json()["GET /posts/"]
+    assert feed["requests"] == 3
+    assert feed["queries"]["count"] == 3
+    assert sum(feed["db_time_ms"]["buckets"].values()) == 3
+    assert "FROM posts" in feed["slowest_statement"]
+    assert "GET /posts/{id}" in res.json()
+
+
+def test_slow_query_log(authorized_client, test_posts, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "slow_query_threshold_ms", 0)
+    with caplog.at_level(logging.WARNING, logger="app.slow_queries"):
+        authorized_client.get("/posts/")
+    entries = [json.loads(record.getMessage()) for record in caplog.records
+               if record.name == "app.slow_queries"]
+    assert entries
+    assert entries[-1]["event"] == "slow_query"
+    assert entries[-1]["request"] == "GET /posts/"
+    assert entries[-1]["statement"].startswith("SELECT")
+
+    caplog.clear()
+    monkeypatch.setattr(settings, "slow_query_threshold_ms", -1)
+    with caplog.at_level(logging.WARNING, logger="app.slow_queries"):
+        authorized_client.get("/posts/")
+    assert not [record for record in caplog.records if record.name == "app.slow_queries"]
@@ -0,0 +1,176 @@
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from app import schemas
+from app.config import settings
+from app.post_cache import post_cache
+from app.database import get_async_db, get_async_read_db
+from app.instrumentation import QueryStatsMiddleware, instrument_engine
+from app.routers.aio import post, user, auth, vote
+from .conftest import SQLALCHEMY_DATABASE_URL
+
+ASYNC_DATABASE_URL = SQLALCHEMY_DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
+
+
+@pytest.fixture
+def async_client(session):
+    # NullPool: asyncpg connections must not outlive the event loop of a request
+    engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+    instrument_engine(engine.sync_engine)
+    TestingAsyncSessionLocal = sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
+    async_app = FastAPI()
+    async_app.add_middleware(QueryStatsMiddleware)
+    for module in (post, user, auth, vote):
+        async_app.include_router(module.router)
+    async_app.dependency_overrides[get_async_db] = override_get_async_db
+    async_app.dependency_overrides[get_async_read_db] = override_get_async_db
+    yield TestClient(async_app)
+
+
+@pytest.fixture
+def async_authorized_client(async_client):
+    user_data = {"email": "async@gmail.com", "password": "password123"}
+    res = async_client.post("/users/", json=user_data)
+    assert res.status_code == 201
+
+    res = async_client.post(
+        "/login", data={"username": user_data["email"], "password": user_data["password"]})
+    token = schemas.Token(**res.json()).access_token
+    async_client.headers = {**async_client.headers, "Authorization": f"Bearer {token}"}
+    return async_client
+
+
+def test_async_get_user(async_client):
+    res = async_client.post("/users/", json={"email": "hello@gmail.com", "password": "pw"})
+    user_id = res.json()["id"]
+    res = async_client.get(f"/users/{user_id}")
+    assert res.status_code == 200
+    assert res.json()["email"] == "hello@gmail.com"
+
+
+def test_async_incorrect_login(async_client):
+    res = async_client.post("/login", data={"username": "nobody@gmail.com", "password": "pw"})
+    assert res.status_code == 403
+
+
+def test_async_post_crud(async_authorized_client):
+    res = async_authorized_client.post("/posts/", json={"title": "t", "content": "c"})
+    assert res.status_code == 201
+    created = schemas.Post(**res.json())
+    assert created.owner.email == "async@gmail.com"
+
+    res = async_authorized_client.put(
+        f"/posts/{created.id}", json={"title": "updated", "content": "c"})
+    assert res.status_code == 200
+    assert res.json()["title"] == "updated"
+    assert res.json()["owner"]["email"] == "async@gmail.com"
+    res = async_authorized_client.put("/posts/88888", json={"title": "updated", "content": "c"})
+    assert res.status_code == 404
+
+    res = async_authorized_client.get("/posts/")
+    assert [p["Post"]["title"] for p in res.json()] == ["updated"]
+    res = async_authorized_client.get("/posts/?sort=new")
+    assert [p["Post"]["title"] for p in res.json()["items"]] == ["updated"]
+
+    res = async_authorized_client.delete(f"/posts/{created.id}")
+    assert res.status_code == 204
+    res = async_authorized_client.get(f"/posts/{created.id}")
+    assert res.status_code == 404
+    res = async_authorized_client.delete(f"/posts/{created.id}")
+    assert res.status_code == 404
+
+
+def test_async_vote(async_authorized_client):
+    post_id = async_authorized_client.post(
+        "/posts/", json={"title": "t", "content": "c"}).json()["id"]
+
+    res = async_authorized_client.post("/votes/", json={"post_id": post_id, "dir": 1})
+    assert res.status_code == 201
+    res = async_authorized_client.post("/votes/", json={"post_id": post_id, "dir": 1})
+    assert res.status_code == 409
+    assert async_authorized_client.get(f"/posts/{post_id}").json()["votes"] == 1
+
+    res = async_authorized_client.post("/votes/", json={"post_id": post_id, "dir": 0})
+    assert res.status_code == 201
+    res = async_authorized_client.post("/votes/", json={"post_id": post_id, "dir": 0})
+    assert res.json()["detail"] == "Vote does not exist"
+    for dir in (1, 0):
+        res = async_authorized_client.post("/votes/", json={"post_id": 88888, "dir": dir})
+        assert res.status_code == 404
+        assert res.json()["detail"] == "Post with id 88888 does not exist"
+
+
+def test_async_vote_batch(async_authorized_client):
+    post_id = async_authorized_client.post(
+        "/posts/", json={"title": "t", "content": "c"}).json()["id"]
+
+    res = async_authorized_client.post("/votes/batch", json=[
+        {"post_id": post_id, "dir": 1},
+        {"post_id": post_id, "dir": 1},
+        {"post_id": 88888, "dir": 1},
+    ])
+    assert res.status_code == 200
+    assert [result["status_code"] for result in res.json()] == [201, 409, 404]
+    assert async_authorized_client.get(f"/posts/{post_id}").json()["votes"] == 1
+
+
+def test_async_projected_feed(async_authorized_client, monkeypatch):
+    for title in ("a", "b", "c"):
+        async_authorized_client.post("/posts/", json={"title": title, "content": "c"})
+    expected = async_authorized_client.get("/posts/?sort=new&limit=2").json()
+
+    monkeypatch.setattr(settings, "feed_projection", True)
+    res = async_authorized_client.get("/posts/?sort=new&limit=2")
+    assert res.json() == expected
+    assert [p["Post"]["title"] for p in res.json()["items"]] == ["c", "b"]
+
+
+def test_async_export_posts(async_authorized_client):
+    for title in ("a", "b", "c"):
+        async_authorized_client.post("/posts/", json={"title": title, "content": "c"})
+
+    res = async_authorized_client.get("/posts/export?limit=2")
+    assert res.status_code == 200
+    assert [json.loads(line)["title"] for line in res.text.splitlines()] == ["a", "b"]
+
+
+def test_async_bulk_create_posts(async_authorized_client):
+    body = "\n".join(json.dumps({"title": title, "content": "c"}) for title in ("a", "b", "c"))
+    res = async_authorized_client.post("/posts/bulk", data=body)
+    assert res.status_code == 201
+    assert res.json()["imported"] == 3
+
+    res = async_authorized_client.post("/posts/bulk", data='[{"title": "d"}]')
+    assert res.status_code == 422
+    export = async_authorized_client.get("/posts/export").text.splitlines()
+    assert [json.loads(line)["title"] for line in export] == ["a", "b", "c"]
+
+
+def test_async_server_timing(async_authorized_client):
+    post_id = async_authorized_client.post(
+        "/posts/", json={"title": "t", "content": "c"}).json()["id"]
+    post_cache.clear()
+    res = async_authorized_client.get(f"/posts/{post_id}")
+    assert 'db;desc="1 queries"' in res.headers["server-timing"]
+
+
+def test_async_stream_post_votes(async_authorized_client, monkeypatch):
+    monkeypatch.setattr(settings, "vote_stream_max_seconds", 0.2)
+    post_id = async_authorized_client.post(
+        "/posts/", json={"title": "t", "content": "c"}).json()["id"]
+    async_authorized_client.post("/votes/", json={"post_id": post_id, "dir": 1})
+
+    res = async_authorized_client.get(f"/posts/{post_id}/stream")
+    assert res.status_code == 200
+    assert f'data: [{{"post_id":{post_id},"votes":1}}]' in res.text
+    assert async_authorized_client.get("/posts/88888/stream").status_code == 404
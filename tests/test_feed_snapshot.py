@@ -0,0 +1,55 @@
+import pytest
+from app.config import settings
+from app.feed_snapshot import FeedSnapshot, feed_snapshot
+from .conftest import TestingSessionLocal
+
+
+@pytest.fixture
+def snapshot(monkeypatch):
+    monkeypatch.setattr(settings, "feed_snapshot_enabled", True)
+    monkeypatch.setattr(feed_snapshot, "_session_factory", TestingSessionLocal)
+    monkeypatch.setattr(feed_snapshot, "size", 2)
+    yield feed_snapshot
+    feed_snapshot.clear()
+
+
+def test_first_page_served_from_snapshot(authorized_client, test_posts, snapshot, query_counter):
+    live = authorized_client.get("/posts/?sort=new&limit=2").json()
+    snapshot.refresh()
+    query_counter.clear()
+
+    res = authorized_client.get("/posts/?sort=new&limit=2")
+    assert res.status_code == 200
+    assert res.json() == live
+    assert query_counter == []
+
+    # The cursor handed out from the snapshot continues on the live feed
+    res = authorized_client.get(f"/posts/?cursor={res.json()['next_cursor']}&limit=2")
+    assert [p["Post"]["id"] for p in res.json()["items"]] == [test_posts[0].id]
+
+
+def test_outside_snapshot_uses_live_query(authorized_client, test_posts, snapshot, query_counter):
+    snapshot.refresh()
+    query_counter.clear()
+
+    res = authorized_client.get("/posts/?limit=3")
+    assert len(res.json()) == 3
+    res = authorized_client.get("/posts/?limit=2&search=first")
+    assert [p["Post"]["title"] for p in res.json()] == ["first title"]
+    assert len([statement for statement in query_counter if "FROM posts" in statement]) == 2
+
+
+def test_stale_snapshot_is_not_served(test_posts):
+    now = [0.0]
+    snapshot = FeedSnapshot(TestingSessionLocal, size=10, refresh_interval=1,
+                            max_staleness=5, clock=lambda: now[0])
+    assert snapshot.page(None, 0, 10) is None
+
+    snapshot.refresh()
+    assert len(snapshot.page(None, 0, 10)) == 3
+    # Fewer posts than the snapshot size: any page can be answered
+    assert snapshot.page(None, 5, 10) == []
+
+    now[0] = 6
+    assert snapshot.page(None, 0, 10) is None
+    assert snapshot.stats()["fallbacks"] == 2
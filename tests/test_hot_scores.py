@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from app import models
+from app.hot_scores import HotScoreRefresher, pending_filter
+from .conftest import TestingSessionLocal
+
+
+@pytest.fixture
+def refresher():
+    return HotScoreRefresher(TestingSessionLocal, refresh_interval=60, batch_size=2)
+
+
+def make_posts(session, user_id, specs):
+    now = datetime.now(timezone.utc)
+    posts = [models.Post(title=title, content="content", owner_id=user_id, vote_count=votes,
+                         created_at=now - timedelta(hours=age_hours))
+             for title, votes, age_hours in specs]
+    session.add_all(posts)
+    session.commit()
+    return posts
+
+
+def test_hot_feed_ranks_votes_against_age(authorized_client, test_user, session, refresher):
+    make_posts(session, test_user["id"], [
+        ("old popular", 1000, 48),
+        ("fresh", 0, 0),
+        ("recent liked", 50, 3),
+        ("old", 5, 48),
+    ])
+    # Four posts pending, two per batch: three committed batches
+    assert refresher.refresh() == 4
+    assert session.query(models.Post).filter(pending_filter()).count() == 0
+
+    res = authorized_client.get("/posts/?sort=hot&limit=2")
+    assert res.status_code == 200
+    assert [p["Post"]["title"] for p in res.json()["items"]] == ["recent liked", "fresh"]
+    res = authorized_client.get(f"/posts/?cursor={res.json()['next_cursor']}&limit=2")
+    assert [p["Post"]["title"] for p in res.json()["items"]] == ["old popular", "old"]
+
+
+def test_refresh_only_rescores_changed_posts(authorized_client, test_user, session, refresher):
+    posts = make_posts(session, test_user["id"], [("a", 0, 10), ("b", 0, 1)])
+    post_ids = [post.id for post in posts]
+    refresher.refresh()
+    assert refresher.refresh() == 0
+
+    scores = dict(session.query(models.Post.id, models.Post.hot_score).all())
+    res = authorized_client.post("/votes/", json={"post_id": post_ids[0], "dir": 1})
+    assert res.status_code == 201
+    assert session.query(models.Post.id).filter(pending_filter()).all() == [(post_ids[0],)]
+
+    assert refresher.refresh() == 1
+    # log10 of one vote is still 0; the second vote raises the score
+    session.query(models.Post).filter(models.Post.id == post_ids[0]).update({"vote_count": 2})
+    session.commit()
+    assert refresher.refresh() == 1
+    session.expire_all()
+    rescored = dict(session.query(models.Post.id, models.Post.hot_score).all())
+    assert rescored[post_ids[0]] > scores[post_ids[0]]
+    assert rescored[post_ids[1]] == scores[post_ids[1]]
+    assert refresher.stats() == {"runs": 4, "failures": 0, "rescored": 4}
+
+
+def test_hot_feed_uses_score_index(authorized_client, session):
+    plan = session.execute(
+        "EXPLAIN SELECT id FROM posts ORDER BY hot_score DESC, id DESC LIMIT 10").scalars().all()
+    assert "ix_posts_hot_score_id" in "\n".join(plan)
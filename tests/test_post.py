@@ -1,5 +1,9 @@
+import json
 from typing import List
-from app import schemas, models
+from pydantic import ValidationError
+from app import cli, schemas, models, post_import
+from app.config import Settings, settings
+from app.post_cache import post_cache
 import pytest
 
 def test_get_all_posts(authorized_client, test_posts):
@@ -107,3 +111,211 @@ def test_update_post_non_exist(authorized_client, test_user, test_posts):
     }
     res = authorized_client.put(f"/posts/88888", json=data)
     assert res.status_code == 404
+
+def test_get_posts_cursor_pagination(authorized_client, test_posts):
+    expected_ids = sorted((post.id for post in test_posts), reverse=True)
+    res = authorized_client.get("/posts/?sort=new&limit=2")
+    assert res.status_code == 200
+    page = schemas.PostPage(**res.json())
+    assert [p.Post.id for p in page.items] == expected_ids[:2]
+
+    res = authorized_client.get(f"/posts/?limit=2&cursor={page.next_cursor}")
+    page = schemas.PostPage(**res.json())
+    assert [p.Post.id for p in page.items] == expected_ids[2:]
+    assert page.next_cursor is None
+
+def test_get_posts_sorted_by_votes(authorized_client, test_posts, session):
+    test_posts[1].vote_count = 3
+    test_posts[2].vote_count = 1
+    session.commit()
+    expected_ids = [test_posts[1].id, test_posts[2].id, test_posts[0].id]
+
+    res = authorized_client.get("/posts/?sort=top&limit=1")
+    page = schemas.PostPage(**res.json())
+    ids = [p.Post.id for p in page.items]
+    while page.next_cursor:
+        res = authorized_client.get(f"/posts/?sort=top&limit=1&cursor={page.next_cursor}")
+        page = schemas.PostPage(**res.json())
+        ids += [p.Post.id for p in page.items]
+    assert ids == expected_ids
+
+def test_get_posts_invalid_cursor(authorized_client, test_posts):
+    res = authorized_client.get("/posts/?cursor=garbage")
+    assert res.status_code == 400
+    assert res.json()["detail"] == "invalid cursor: 'garbage'"
+
+    cursor = authorized_client.get("/posts/?sort=top&limit=1").json()["next_cursor"]
+    res = authorized_client.get(f"/posts/?sort=new&cursor={cursor}")
+    assert res.status_code == 400
+    assert res.json()["detail"] == "cursor was issued for a different sort order"
+
+def test_get_posts_invalid_sort(authorized_client, test_posts):
+    res = authorized_client.get("/posts/?sort=sideways")
+    assert res.status_code == 422
+
+@pytest.mark.parametrize("search, titles", [
+    ("first", ["first title"]),
+    ("3rd content", ["3rd title"]),
+    ("contents", ["first title", "2nd title", "3rd title"]),
+    ("missing", []),
+])
+def test_search_posts(authorized_client, test_posts, search, titles):
+    res = authorized_client.get("/posts/", params={"search": search})
+    assert res.status_code == 200
+    assert sorted(p["Post"]["title"] for p in res.json()) == sorted(titles)
+
+def test_search_posts_ranked(authorized_client, test_user, session):
+    session.add_all([
+        models.Post(title="python", content="something else", owner_id=test_user['id']),
+        models.Post(title="python tips", content="python python python", owner_id=test_user['id']),
+    ])
+    session.commit()
+    res = authorized_client.get("/posts/", params={"search": "python"})
+    assert [p["Post"]["title"] for p in res.json()] == ["python tips", "python"]
+
+@pytest.mark.parametrize("query", ["", "sort=new&"])
+def test_get_posts_constant_queries(authorized_client, session, query_counter, query):
+    owners = [models.Users(email=f"owner{i}@gmail.com", password="x") for i in range(10)]
+    session.add_all(owners)
+    session.flush()
+    session.add_all([models.Post(title=f"title {i}", content="content", owner_id=owner.id)
+                     for i, owner in enumerate(owners)])
+    session.commit()
+    # Warm up the token cache so both measured requests do the same work
+    authorized_client.get("/posts/?limit=1")
+
+    def selects(limit):
+        query_counter.clear()
+        res = authorized_client.get(f"/posts/?{query}limit={limit}")
+        assert res.status_code == 200
+        return len([statement for statement in query_counter if statement.lstrip().startswith("SELECT")])
+
+    assert selects(1) == selects(10) == 1
+
+def test_get_one_post_single_query(authorized_client, test_posts, query_counter):
+    post_id = test_posts[0].id
+    authorized_client.get(f"/posts/{post_id}")
+    # Measure the database path, not the post cache
+    post_cache.clear()
+    query_counter.clear()
+    res = authorized_client.get(f"/posts/{post_id}")
+    assert res.status_code == 200
+    assert len(query_counter) == 1
+
+@pytest.mark.parametrize("method", ["put", "delete"])
+def test_write_post_single_statement(authorized_client, test_user, test_user2, test_posts, session,
+                                     query_counter, method):
+    own_id = test_posts[0].id
+    other = models.Post(title="title", content="content", owner_id=test_user2['id'])
+    session.add(other)
+    session.commit()
+    other_id = other.id
+    data = {"title": "updated title", "content": "updated content"}
+    # Warm up the token cache so only the write itself is counted
+    authorized_client.get("/posts/?limit=1")
+
+    for post_id, status_code in ((88888, 404), (other_id, 403), (own_id, None)):
+        query_counter.clear()
+        res = authorized_client.request(method.upper(), f"/posts/{post_id}",
+                                        json=data if method == "put" else None)
+        assert res.status_code == (status_code or (200 if method == "put" else 204))
+        assert len(query_counter) == 1
+
+    if method == "put":
+        assert res.json()["owner"]["email"] == test_user["email"]
+        assert res.json()["title"] == "updated title"
+    assert session.query(models.Post).filter(models.Post.id == other_id).one().title == "title"
+
+@pytest.mark.parametrize("query", ["", "?sort=top&limit=2", "?search=first"])
+def test_fast_json_feed_matches_schema(authorized_client, test_posts, monkeypatch, query):
+    expected = authorized_client.get(f"/posts/{query}").json()
+    monkeypatch.setattr(settings, "fast_json_responses", True)
+    res = authorized_client.get(f"/posts/{query}")
+    assert res.status_code == 200
+    assert res.json() == expected
+
+@pytest.mark.parametrize("query", ["", "?sort=top&limit=2", "?sort=new&limit=5", "?search=first"])
+def test_projected_feed_matches_schema(authorized_client, test_posts, monkeypatch, query):
+    expected = authorized_client.get(f"/posts/{query}").json()
+    monkeypatch.setattr(settings, "feed_projection", True)
+    res = authorized_client.get(f"/posts/{query}")
+    assert res.status_code == 200
+    assert res.json() == expected
+
+def test_projected_feed_invalid_cursor(authorized_client, test_posts, monkeypatch):
+    monkeypatch.setattr(settings, "feed_projection", True)
+    res = authorized_client.get("/posts/?cursor=garbage")
+    assert res.status_code == 400
+    assert res.json()["detail"] == "invalid cursor: 'garbage'"
+
+def test_export_posts(authorized_client, test_posts):
+    res = authorized_client.get("/posts/export")
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in res.text.splitlines()]
+    assert [line["id"] for line in lines] == sorted(post.id for post in test_posts)
+    assert lines[0] == {
+        "id": test_posts[0].id, "title": test_posts[0].title, "content": test_posts[0].content,
+        "published": True, "created_at": lines[0]["created_at"],
+        "owner_id": test_posts[0].owner_id, "votes": 0,
+    }
+
+@pytest.mark.parametrize("query, titles", [
+    ("search=first", ["first title"]),
+    ("sort=new&limit=2", ["3rd title", "2nd title"]),
+])
+def test_export_posts_filters(authorized_client, test_posts, query, titles):
+    res = authorized_client.get(f"/posts/export?{query}")
+    assert [json.loads(line)["title"] for line in res.text.splitlines()] == titles
+
+def test_unauthorized_user_export_posts(client, test_posts):
+    res = client.get("/posts/export")
+    assert res.status_code == 401
+
+@pytest.mark.parametrize("body", [
+    json.dumps([{"title": f"title {i}", "content": "content"} for i in range(5)]),
+    "\n".join(json.dumps({"title": f"title {i}", "content": "content"}) for i in range(5)) + "\n",
+])
+def test_bulk_create_posts(authorized_client, test_user, monkeypatch, query_counter, body):
+    monkeypatch.setattr(settings, "post_import_chunk_size", 2)
+    query_counter.clear()
+    res = authorized_client.post("/posts/bulk", data=body)
+    assert res.status_code == 201
+    result = schemas.PostImportResult(**res.json())
+    assert result.imported == 5
+    assert [chunk.rows for chunk in result.chunks] == [2, 2, 1]
+    # One multi-row INSERT per chunk
+    assert len([statement for statement in query_counter if statement.startswith("INSERT")]) == 3
+
+    posts = authorized_client.get("/posts/export").text.splitlines()
+    assert [json.loads(post)["title"] for post in posts] == [f"title {i}" for i in range(5)]
+    assert {json.loads(post)["owner_id"] for post in posts} == {test_user["id"]}
+
+@pytest.mark.parametrize("body", [
+    '[{"title": "ok", "content": "c"}, {"title": "no content"}]',
+    '{"title": "ok", "content": "c"}\n{"title": ',
+    '[{"title": "ok", "content": "c"}, ',
+    '"just a string"',
+])
+def test_bulk_create_posts_invalid(authorized_client, test_user, monkeypatch, body):
+    monkeypatch.setattr(settings, "post_import_chunk_size", 1)
+    res = authorized_client.post("/posts/bulk", data=body)
+    assert res.status_code == 422
+    # The chunks inserted before the bad item are rolled back
+    assert authorized_client.get("/posts/export").text == ""
+
+def test_import_posts_split_pieces(test_user, session):
+    body = b'{"title": "a", "content": "c"}\n{"title": "b", "content": "c", "published": false}\n'
+    pieces = [body[i:i + 7] for i in range(0, len(body), 7)]
+    result = post_import.import_posts(session, test_user["id"], pieces, chunk_size=10)
+    assert result["imported"] == 2
+    posts = session.query(models.Post).order_by(models.Post.id).all()
+    assert [(post.title, post.published) for post in posts] == [("a", True), ("b", False)]
+
+@pytest.mark.parametrize("size", [0, -1])
+def test_import_chunk_size_must_be_positive(size, capsys):
+    with pytest.raises(ValidationError):
+        Settings(post_import_chunk_size=size)
+    with pytest.raises(SystemExit):
+        cli.main(["import-posts", "-", "--owner-email", "a@b.com", "--chunk-size", str(size)])
+    assert "must be a positive integer" in capsys.readouterr().err
@@ -0,0 +1,148 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from app.post_cache import ExternalBackend, MemoryBackend, PostCache, post_cache
+
+
+class FakeStore:
+    """
+    Local stand-in for a Redis client (get / set with ex and nx / delete).
+    """
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+def test_get_post_served_from_cache(authorized_client, test_posts, query_counter):
+    post_id = test_posts[0].id
+    authorized_client.get(f"/posts/{post_id}")
+    query_counter.clear()
+
+    res = authorized_client.get(f"/posts/{post_id}")
+    assert res.status_code == 200
+    assert res.json()["Post"]["title"] == "first title"
+    assert query_counter == []
+    assert post_cache.stats()["hits"] >= 1
+
+
+def test_update_and_delete_invalidate(authorized_client, test_posts):
+    post_id = test_posts[0].id
+    authorized_client.get(f"/posts/{post_id}")
+
+    authorized_client.put(f"/posts/{post_id}", json={"title": "new title", "content": "c"})
+    assert authorized_client.get(f"/posts/{post_id}").json()["Post"]["title"] == "new title"
+
+    authorized_client.delete(f"/posts/{post_id}")
+    assert authorized_client.get(f"/posts/{post_id}").status_code == 404
+
+
+def test_vote_invalidates_cached_count(authorized_client, test_posts):
+    post_id = test_posts[0].id
+    authorized_client.get(f"/posts/{post_id}")
+
+    authorized_client.post("/votes/", json={"post_id": post_id, "dir": 1})
+    assert authorized_client.get(f"/posts/{post_id}").json()["votes"] == 1
+
+    authorized_client.post("/votes/batch", json=[{"post_id": post_id, "dir": 0}])
+    assert authorized_client.get(f"/posts/{post_id}").json()["votes"] == 0
+
+
+def test_votes_reaching_the_cache_out_of_order():
+    cache = PostCache(MemoryBackend(maxsize=10, ttl=60))
+    row = {"votes": 4}
+    assert cache.get_or_load(1, lambda: dict(row)) == {"votes": 4}
+
+    # Two votes commit 5 then 6, but their writers reach the cache as 6 then 5
+    row["votes"] = 5
+    row["votes"] = 6
+    cache.invalidate([1])
+    cache.invalidate([1])
+    assert cache.get_or_load(1, lambda: dict(row)) == {"votes": 6}
+
+
+@pytest.mark.parametrize("backend", [
+    lambda: MemoryBackend(maxsize=10, ttl=60),
+    lambda: ExternalBackend(FakeStore(), ttl=60),
+])
+def test_single_flight(backend):
+    cache = PostCache(backend())
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return {"votes": 3}
+
+    threads = [threading.Thread(target=cache.get_or_load, args=(1, loader)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert cache.get_or_load(1, loader) == {"votes": 3}
+    assert cache.stats()["coalesced"] == 4
+
+
+def test_load_started_before_invalidation_is_not_stored():
+    cache = PostCache(MemoryBackend(maxsize=10, ttl=60))
+
+    def stale_loader():
+        cache.invalidate([1])
+        return {"votes": 1}
+
+    assert cache.get_or_load(1, stale_loader) == {"votes": 1}
+    assert cache.get_or_load(1, lambda: {"votes": 2}) == {"votes": 2}
+
+
+def test_external_lock_held_by_other_process():
+    store = FakeStore()
+    cache = PostCache(ExternalBackend(store, ttl=60), lock_timeout=0.05)
+    store.set("post:1:lock", "1")
+
+    # The other process never fills the entry: load after the lock timeout
+    assert cache.get_or_load(1, lambda: {"votes": 1}) == {"votes": 1}
+    assert "post:1:lock" in store.data
+
+
+def test_async_external_calls_leave_the_event_loop_and_the_lock():
+    cache = PostCache(ExternalBackend(FakeStore(), ttl=60))
+    calls = []
+
+    class RecordingStore(FakeStore):
+        def get(self, key):
+            calls.append((threading.get_ident(), cache._lock.locked()))
+            return super().get(key)
+
+        def set(self, key, value, ex=None, nx=False):
+            calls.append((threading.get_ident(), cache._lock.locked()))
+            return super().set(key, value, ex, nx)
+
+    cache.backend.client = RecordingStore()
+
+    async def scenario():
+        async def loader():
+            return {"votes": 1}
+        assert await cache.get_or_load_async(1, loader) == {"votes": 1}
+        await cache.invalidate_async([1])
+        assert await cache.get_or_load_async(1, loader) == {"votes": 1}
+
+    asyncio.run(scenario())
+    assert calls
+    assert all(thread != threading.get_ident() for thread, _ in calls)
+    assert not any(locked for _, locked in calls)
+
@@ -0,0 +1,114 @@
+import json
+import pytest
+from sqlalchemy import event
+from app.seed import seed_dataset
+from .conftest import engine
+
+# Tables that grow with usage; a full scan of one of them does not scale
+LARGE_TABLES = {"posts", "votes", "users"}
+# Plan nodes that read their whole input before returning a row
+BLOCKING_NODES = {"Sort", "Aggregate", "Hash", "Materialize", "WindowAgg", "SetOp"}
+# What PostgreSQL runs for the ON DELETE CASCADE foreign keys, which EXPLAIN
+# of the DELETE itself does not show
+CASCADE_STATEMENTS = [
+    ("DELETE FROM ONLY votes WHERE post_id = %(id)s", {"id": 1}),
+    ("DELETE FROM ONLY votes WHERE user_id = %(id)s", {"id": 1}),
+    ("DELETE FROM ONLY posts WHERE owner_id = %(id)s", {"id": 1}),
+]
+
+
+def sequential_scans(node, limited=False):
+    """
+    Large tables read by a sequential scan in a JSON plan.
+
+    A scan feeding a LIMIT without a blocking node in between stops after a
+    few rows (e.g. an unordered first page), so it is not reported.
+    """
+    if node["Node Type"] == "Limit":
+        limited = True
+    elif node["Node Type"] in BLOCKING_NODES:
+        limited = False
+    found = []
+    if node["Node Type"] == "Seq Scan" and node["Relation Name"] in LARGE_TABLES and not limited:
+        found.append(node["Relation Name"])
+    for child in node.get("Plans", ()):
+        # The inner side of a join and subplans are run over and over
+        child_limited = limited and child.get("Parent Relationship") not in ("Inner", "SubPlan", "InitPlan")
+        found += sequential_scans(child, child_limited)
+    return found
+
+
+@pytest.fixture
+def statement_log():
+    """
+    Records the SQL statements, with their parameters, sent to the test database.
+    """
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def test_router_queries_avoid_sequential_scans(authorized_client, test_user, session, statement_log):
+    seed_dataset(session, users=20000, posts=10000, votes=30000, password_hash="not-a-hash")
+    statement_log.clear()
+
+    def call(method, path, expected, **kwargs):
+        res = authorized_client.request(method, path, **kwargs)
+        assert res.status_code == expected, (path, res.text)
+        return res.json() if res.headers.get("content-type") == "application/json" else None
+
+    post = call("POST", "/posts/", 201, json={"title": "plan", "content": "check"})
+    call("GET", "/posts/", 200)
+    # Seeded posts share a small vocabulary; search a term only this post has
+    call("GET", "/posts/?search=check", 200)
+    for sort in ("new", "top", "hot"):
+        page = call("GET", f"/posts/?sort={sort}", 200)
+        call("GET", f"/posts/?cursor={page['next_cursor']}", 200)
+    call("GET", f"/posts/{post['id']}", 200)
+    call("GET", "/posts/export?sort=top&limit=50", 200)
+    call("GET", f"/users/{test_user['id']}", 200)
+    call("PUT", f"/posts/{post['id']}", 200, json={"title": "plan", "content": "updated"})
+    call("POST", "/votes/", 201, json={"post_id": post["id"], "dir": 1})
+    call("POST", "/votes/", 201, json={"post_id": post["id"], "dir": 0})
+    call("POST", "/votes/batch", 200, json=[{"post_id": post["id"], "dir": 1}, {"post_id": 5, "dir": 1}])
+    call("DELETE", f"/posts/{post['id']}", 204)
+    call("POST", "/login", 200, data={"username": test_user["email"], "password": test_user["password"]})
+
+    connection = session.connection()
+    checked, failures = 0, []
+    for statement, parameters in statement_log + CASCADE_STATEMENTS:
+        if not statement.lstrip().upper().startswith(("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")):
+            continue
+        plan = connection.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        checked += 1
+        scanned = sequential_scans(plan[0]["Plan"])
+        if scanned:
+            failures.append(f"sequential scan of {', '.join(scanned)} in: {' '.join(statement.split())}")
+
+    assert checked > len(CASCADE_STATEMENTS)
+    assert not failures, "\n".join(failures)
+
+
+def test_sequential_scans():
+    scan = {"Node Type": "Seq Scan", "Relation Name": "posts"}
+    assert sequential_scans(scan) == ["posts"]
+    assert sequential_scans({"Node Type": "Seq Scan", "Relation Name": "alembic_version"}) == []
+    # Unordered first page: stops after LIMIT rows
+    assert sequential_scans({"Node Type": "Limit", "Plans": [scan]}) == []
+    # Sorted page: reads the whole table first
+    assert sequential_scans({"Node Type": "Limit", "Plans": [{"Node Type": "Sort", "Plans": [scan]}]}) == ["posts"]
+    nested_loop = {"Node Type": "Nested Loop", "Plans": [
+        {**scan, "Parent Relationship": "Outer"},
+        {"Node Type": "Seq Scan", "Relation Name": "users", "Parent Relationship": "Inner"},
+    ]}
+    assert sequential_scans({"Node Type": "Limit", "Plans": [nested_loop]}) == ["users"]
@@ -0,0 +1,36 @@
+import random
+from collections import Counter
+from app import models
+from app.cli import reconcile_vote_counts
+from app.seed import draw_votes, seed_dataset, seed_email
+
+
+def test_seed_dataset(session, test_user):
+    result = seed_dataset(session, users=20, posts=50, votes=300, password_hash="hash", seed=1)
+    assert (result["users"], result["posts"], result["votes"]) == (20, 50, 300)
+
+    assert session.query(models.Users).count() == 21
+    assert session.query(models.Users).filter(models.Users.email == seed_email(19)).one().password == "hash"
+    assert session.query(models.Vote).count() == 300
+    # Posts are inserted with the vote counts of the votes drawn for them
+    assert reconcile_vote_counts(session) == []
+
+    # Numbering continues on the next run
+    seed_dataset(session, users=1, posts=0, votes=0, password_hash="hash")
+    assert session.query(models.Users).filter(models.Users.email == seed_email(20)).count() == 1
+
+
+def test_draw_votes_skew():
+    uniform = draw_votes(random.Random(0), users=1000, posts=1000, votes=20000, skew=0)
+    skewed = draw_votes(random.Random(0), users=1000, posts=1000, votes=20000, skew=1.1)
+    assert len(uniform) == len(set(uniform)) == 20000
+    assert len(skewed) == len(set(skewed)) == 20000
+
+    def top_share(pairs):
+        # Share of the votes held by the top 1% of the posts
+        return sum(count for _, count in Counter(post for _, post in pairs).most_common(10)) / len(pairs)
+
+    assert top_share(uniform) < 0.05
+    assert top_share(skewed) > 0.25
+    assert draw_votes(random.Random(0), users=1000, posts=1000, votes=20000, skew=1.1) == skewed
+
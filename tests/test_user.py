@@ -1,8 +1,11 @@
+import threading
 import pytest
 from jose import jwt
-from app import schemas
+from app import schemas, models, utils
 
 from app.config import settings
+from app.cli import calibrate_bcrypt_rounds
+from app.oauth2 import token_cache
 
 
 
@@ -38,3 +41,89 @@ def test_incorrect_login( client, email, password, status_code):
         "/login", data={"username": email, "password": password})
     assert res.status_code == status_code
     # assert res.json().get('detail') == 'Invalid Credentials'
+
+def test_token_cache_hit(authorized_client, test_posts):
+    before = token_cache.stats()
+    authorized_client.get("/posts/")
+    authorized_client.get("/posts/")
+    after = token_cache.stats()
+    assert after["hits"] == before["hits"] + 1
+    assert after["misses"] == before["misses"] + 1
+
+def test_token_cache_invalidated_on_delete(authorized_client, test_user, session):
+    assert authorized_client.get("/posts/").status_code == 200
+    user = session.query(models.Users).filter(models.Users.id == test_user['id']).first()
+    session.delete(user)
+    session.commit()
+    assert authorized_client.get("/posts/").status_code == 401
+
+
+@pytest.fixture
+def fresh_auth_pool():
+    """
+    Runs a test on an auth pool built from its settings, not left over from
+    earlier tests, and leaves none behind for later ones.
+    """
+    utils.shutdown_pool()
+    yield
+    utils.shutdown_pool()
+
+
+@pytest.mark.parametrize("workers", [0, 1])
+def test_password_hashing(monkeypatch, workers, fresh_auth_pool):
+    monkeypatch.setattr(settings, "auth_pool_workers", workers)
+    hashed = utils.hash("password123")
+    assert utils.verify("password123", hashed)
+    assert not utils.verify("wrong", hashed)
+
+
+def test_login_burst_within_default_auth_limits(fresh_auth_pool):
+    hashed = utils.hash("password123")
+    results = []
+    # A small burst: a few logins queued per pool worker
+    threads = [threading.Thread(target=lambda: results.append(utils.verify("password123", hashed)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [True] * len(threads)
+
+
+def test_login_rejected_when_auth_busy(test_user, client, monkeypatch):
+    monkeypatch.setattr(settings, "auth_wait_timeout_seconds", 0)
+    for _ in range(settings.auth_max_concurrency):
+        utils._auth_slots.acquire()
+    try:
+        res = client.post(
+            "/login", data={"username": test_user['email'], "password": test_user['password']})
+    finally:
+        for _ in range(settings.auth_max_concurrency):
+            utils._auth_slots.release()
+    assert res.status_code == 503
+    assert res.headers["Retry-After"] == "1"
+
+
+@pytest.mark.parametrize("old_context", [
+    utils.make_context(["bcrypt"], 4),
+    utils.make_context(["pbkdf2_sha256"], 4),
+])
+def test_login_rehashes_outdated_password(client, session, monkeypatch, old_context):
+    monkeypatch.setattr(settings, "auth_pool_workers", 0)
+    monkeypatch.setattr(utils, "pwd_context", utils.make_context(["bcrypt", "pbkdf2_sha256"], 5))
+    session.add(models.Users(email="old@gmail.com", password=old_context.hash("password123")))
+    session.commit()
+
+    res = client.post("/login", data={"username": "old@gmail.com", "password": "password123"})
+    assert res.status_code == 200
+    user = session.query(models.Users).filter(models.Users.email == "old@gmail.com").first()
+    assert user.password.startswith("$2b$05$")
+
+    res = client.post("/login", data={"username": "old@gmail.com", "password": "password123"})
+    assert res.status_code == 200
+
+
+def test_calibrate_bcrypt_rounds():
+    rounds, measured = calibrate_bcrypt_rounds(target_seconds=0, samples=1)
+    assert rounds == 4
+    assert [r for r, _ in measured] == [4]
@@ -1,10 +1,13 @@
 import pytest
 from app import models
+from app.cli import reconcile_vote_counts
+from app.config import settings
 
 @pytest.fixture
 def test_vote(test_posts, session, test_user):
     new_vote = models.Vote(post_id=test_posts[2].id, user_id=test_user['id'])
     session.add(new_vote)
+    test_posts[2].vote_count = 1
     session.commit()
 
 def test_vote_on_post(authorized_client, test_posts):
@@ -26,13 +29,71 @@ def test_delete_vote_non_exist(authorized_client, test_posts):
     res = authorized_client.post(
         "/votes/", json={"post_id": test_posts[2].id, "dir": 0})
     assert res.status_code == 404
+    assert res.json()["detail"] == "Vote does not exist"
 
-def test_vote_post_non_exist(authorized_client, test_posts):
+@pytest.mark.parametrize("dir", [1, 0])
+def test_vote_post_non_exist(authorized_client, test_posts, dir):
     res = authorized_client.post(
-        "/votes/", json={"post_id": 88888, "dir": 1})
+        "/votes/", json={"post_id": 88888, "dir": dir})
     assert res.status_code == 404
+    assert res.json()["detail"] == "Post with id 88888 does not exist"
 
 def test_vote_unauthorized_user(client, test_posts):
     res = client.post(
         "/votes/", json={"post_id": test_posts[2].id, "dir": 1})
     assert res.status_code == 401
+
+def test_vote_updates_vote_count(authorized_client, test_posts):
+    post_id = test_posts[0].id
+    authorized_client.post("/votes/", json={"post_id": post_id, "dir": 1})
+    res = authorized_client.get(f"/posts/{post_id}")
+    assert res.json()["votes"] == 1
+
+    authorized_client.post("/votes/", json={"post_id": post_id, "dir": 0})
+    res = authorized_client.get(f"/posts/{post_id}")
+    assert res.json()["votes"] == 0
+
+@pytest.mark.parametrize("dir", [1, 0])
+def test_vote_is_single_statement(authorized_client, test_posts, test_vote, query_counter, dir):
+    res = authorized_client.post(
+        "/votes/", json={"post_id": test_posts[2].id, "dir": dir})
+    assert res.status_code == (409 if dir == 1 else 201)
+    assert len([statement for statement in query_counter if "votes" in statement]) == 1
+
+def test_reconcile_vote_counts(test_posts, test_vote, session):
+    assert reconcile_vote_counts(session) == []
+
+    test_posts[0].vote_count = 5
+    session.commit()
+    assert reconcile_vote_counts(session, repair=True) == [(test_posts[0].id, 5, 0)]
+    assert reconcile_vote_counts(session) == []
+
+def test_vote_batch(authorized_client, test_user, test_posts, test_vote, session):
+    post_ids = [post.id for post in test_posts]
+    res = authorized_client.post("/votes/batch", json=[
+        {"post_id": post_ids[0], "dir": 1},
+        {"post_id": post_ids[0], "dir": 1},
+        {"post_id": post_ids[2], "dir": 0},
+        {"post_id": post_ids[1], "dir": 0},
+        {"post_id": 88888, "dir": 1},
+        {"post_id": post_ids[1], "dir": 1},
+    ])
+    assert res.status_code == 200
+    assert [result["status_code"] for result in res.json()] == [201, 409, 201, 404, 404, 201]
+    assert res.json()[1]["detail"] == f"user {test_user['id']} has already voted on post {post_ids[0]}"
+
+    session.expire_all()
+    assert {vote.post_id for vote in session.query(models.Vote)} == {post_ids[0], post_ids[1]}
+    assert reconcile_vote_counts(session) == []
+
+def test_vote_batch_too_large(authorized_client, test_posts, monkeypatch):
+    monkeypatch.setattr(settings, "vote_batch_max_items", 1)
+    res = authorized_client.post("/votes/batch", json=[
+        {"post_id": test_posts[0].id, "dir": 1},
+        {"post_id": test_posts[1].id, "dir": 1},
+    ])
+    assert res.status_code == 413
+
+def test_vote_batch_unauthorized_user(client, test_posts):
+    res = client.post("/votes/batch", json=[{"post_id": test_posts[0].id, "dir": 1}])
+    assert res.status_code == 401
@@ -0,0 +1,103 @@
+import pytest
+from app import models
+from app.config import settings
+from app.vote_buffer import BufferFull, VoteBuffer, vote_buffer
+from .conftest import TestingSessionLocal
+
+
+@pytest.fixture
+def buffer():
+    return VoteBuffer(TestingSessionLocal, batch_size=2, flush_interval=60, max_pending=3)
+
+
+def vote_counts(session):
+    session.expire_all()
+    return {post.id: post.vote_count for post in session.query(models.Post)}
+
+
+def test_flush_writes_votes_and_counts(buffer, test_posts, test_user, session):
+    for post in test_posts:
+        buffer.add(test_user['id'], post.id, 1)
+    assert buffer.flush() == 3
+
+    assert session.query(models.Vote).count() == 3
+    assert set(vote_counts(session).values()) == {1}
+    stats = buffer.stats()
+    assert stats["pending"] == 0
+    assert stats["flushed"] == 3
+    assert stats["batches"] == 2
+
+
+def test_toggled_vote_is_deduplicated(buffer, test_posts, test_user, session):
+    post_id = test_posts[0].id
+    buffer.add(test_user['id'], post_id, 1)
+    buffer.add(test_user['id'], post_id, 0)
+    buffer.add(test_user['id'], post_id, 1)
+    assert buffer.stats()["pending"] == 1
+    buffer.flush()
+
+    buffer.add(test_user['id'], post_id, 1)
+    buffer.flush()
+    assert session.query(models.Vote).count() == 1
+    assert vote_counts(session)[post_id] == 1
+
+    buffer.add(test_user['id'], post_id, 0)
+    buffer.flush()
+    assert session.query(models.Vote).count() == 0
+    assert vote_counts(session)[post_id] == 0
+
+
+def test_vote_on_missing_post_is_dropped(buffer, test_posts, test_user, session):
+    buffer.add(test_user['id'], 88888, 1)
+    buffer.add(test_user['id'], test_posts[0].id, 1)
+    assert buffer.flush() == 2
+    assert session.query(models.Vote).count() == 1
+    assert buffer.stats()["failures"] == 0
+
+
+def test_buffer_full(buffer, test_user):
+    for post_id in range(3):
+        buffer.add(test_user['id'], post_id, 1)
+    # Updating an already pending vote is still accepted
+    buffer.add(test_user['id'], 0, 0)
+    with pytest.raises(BufferFull):
+        buffer.add(test_user['id'], 3, 1)
+    assert buffer.stats()["rejected"] == 1
+
+
+def test_buffered_vote_endpoint(authorized_client, test_posts, session, monkeypatch):
+    monkeypatch.setattr(settings, "vote_buffer_enabled", True)
+    monkeypatch.setattr(vote_buffer, "_session_factory", TestingSessionLocal)
+    post_id = test_posts[0].id
+
+    res = authorized_client.post("/votes/", json={"post_id": post_id, "dir": 1})
+    assert res.status_code == 202
+    assert session.query(models.Vote).count() == 0
+
+    vote_buffer.flush()
+    assert vote_counts(session)[post_id] == 1
+
+    monkeypatch.setattr(vote_buffer, "max_pending", 0)
+    res = authorized_client.post("/votes/", json={"post_id": post_id, "dir": 0})
+    assert res.status_code == 503
+    assert res.headers["Retry-After"] == "1"
+
+
+def test_flush_lag(test_posts, test_user):
+    now = [100.0]
+    buffer = VoteBuffer(TestingSessionLocal, batch_size=10, flush_interval=60,
+                        max_pending=10, clock=lambda: now[0])
+    buffer.add(test_user['id'], test_posts[0].id, 1)
+    now[0] += 2
+    buffer.add(test_user['id'], test_posts[1].id, 1)
+    now[0] += 1
+    assert buffer.stats()["oldest_pending_seconds"] == 3
+    buffer.flush()
+    assert buffer.stats()["flush_lag_seconds"] == 3
+
+
+def test_stop_flushes_pending_votes(buffer, test_posts, test_user, session):
+    buffer.start()
+    buffer.add(test_user['id'], test_posts[0].id, 1)
+    buffer.stop()
+    assert session.query(models.Vote).count() == 1
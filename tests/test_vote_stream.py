@@ -0,0 +1,209 @@
+import asyncio
+import json
+import threading
+import time
+import pytest
+from sqlalchemy import text
+from app.config import settings
+from app import vote_stream
+from app.vote_stream import LocalBackend, PostgresBackend, VoteHub, sse_event, vote_hub
+from .conftest import SQLALCHEMY_DATABASE_URL, engine
+
+
+def events(body: str):
+    return [json.loads(line[len("data: "):]) for line in body.splitlines() if line.startswith("data: ")]
+
+
+@pytest.fixture
+def counts():
+    """
+    Committed vote counts read by the `hub` fixture's ticks.
+    """
+    return {}
+
+
+@pytest.fixture
+def hub(counts):
+    hub = VoteHub(LocalBackend(), tick_seconds=60,
+                  read_counts=lambda post_ids: {post_id: counts[post_id] for post_id in post_ids if post_id in counts})
+    hub.backend.start(hub.deliver)
+    return hub
+
+
+def test_sse_event_format():
+    assert sse_event({2: 5, 1: 0}) == b'event: votes\ndata: [{"post_id":1,"votes":0},{"post_id":2,"votes":5}]\n\n'
+
+
+def test_hub_coalesces_and_fans_out(hub, counts):
+    async def scenario():
+        watchers = [hub.subscribe([1, 2]) for _ in range(3)]
+        other = hub.subscribe([3])
+
+        # Published from another thread, like the sync vote router
+        def vote():
+            for count in range(1, 11):
+                counts[1] = count
+                hub.publish(1)
+            counts[2] = 7
+            hub.publish(2)
+        thread = threading.Thread(target=vote)
+        thread.start()
+        thread.join()
+        assert hub.tick() == 2
+
+        for watcher in watchers:
+            assert await watcher.wait(1)
+            assert hub.take(watcher) == {1: 10, 2: 7}
+        assert not await other.wait(0.01)
+        for subscription in watchers + [other]:
+            hub.unsubscribe(subscription)
+
+    asyncio.run(scenario())
+    assert hub.stats() == {"subscriptions": 0, "watched_posts": 0, "published": 11,
+                           "batches": 1, "deliveries": 3}
+
+
+def test_unwatched_posts_are_not_published(hub, counts):
+    counts[1] = 3
+    hub.publish(1)
+    assert hub.tick() == 0
+
+
+def test_hub_sends_the_latest_committed_count(hub, counts):
+    async def scenario():
+        watcher = hub.subscribe([1])
+        # Two votes commit 5 then 6, and their writers publish in the order 6, 5
+        counts[1] = 6
+        hub.publish(1)
+        hub.publish(1)
+        assert hub.tick() == 1
+        assert await watcher.wait(1)
+        assert hub.take(watcher) == {1: 6}
+        hub.unsubscribe(watcher)
+
+    asyncio.run(scenario())
+
+
+def test_hub_retries_counts_it_could_not_read(hub, counts):
+    async def scenario():
+        watcher = hub.subscribe([1])
+        hub.publish(1)
+        read_counts, hub.read_counts = hub.read_counts, lambda post_ids: 1 / 0
+        with pytest.raises(ZeroDivisionError):
+            hub.tick()
+        hub.read_counts = read_counts
+        counts[1] = 2
+        assert hub.tick() == 1
+        assert hub.take(watcher) == {1: 2}
+        hub.unsubscribe(watcher)
+
+    asyncio.run(scenario())
+
+
+def test_postgres_backend_round_trip():
+    received = []
+    done = threading.Event()
+    backend = PostgresBackend(engine, SQLALCHEMY_DATABASE_URL, "test_post_votes", poll_seconds=0.05)
+    backend.start(lambda counts: (received.append(counts), done.set()))
+    try:
+        backend.send({1: 4, 2: 9})
+        assert done.wait(5)
+    finally:
+        backend.stop()
+    assert received == [{1: 4, 2: 9}]
+
+
+def test_postgres_backend_reconnects(caplog):
+    received = []
+    backend = PostgresBackend(engine, SQLALCHEMY_DATABASE_URL, "test_post_votes_reconnect", poll_seconds=0.05,
+                              reconnect_seconds=0.05)
+    backend.start(received.append)
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+                                    "WHERE query = 'LISTEN \"test_post_votes_reconnect\"'"))
+        # Sent until the listener is back; batches sent while it is down are lost
+        deadline = time.monotonic() + 5
+        while not received and time.monotonic() < deadline:
+            backend.send({1: 4})
+            time.sleep(0.1)
+    finally:
+        backend.stop()
+    assert received and received[-1] == {1: 4}
+    assert "Vote stream listener disconnected" in caplog.text
+
+
+@pytest.fixture
+def short_streams(monkeypatch):
+    monkeypatch.setattr(settings, "vote_stream_max_seconds", 0.3)
+    monkeypatch.setattr(settings, "vote_stream_keepalive_seconds", 0.1)
+    vote_hub.backend.start(vote_hub.deliver)
+
+
+def test_stream_post_votes(authorized_client, test_posts, short_streams):
+    post_id = test_posts[0].id
+    authorized_client.post("/votes/", json={"post_id": post_id, "dir": 1})
+    res = authorized_client.get(f"/posts/{post_id}/stream")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/event-stream")
+    assert events(res.text) == [[{"post_id": post_id, "votes": 1}]]
+    assert ": keepalive" in res.text
+
+
+def test_stream_receives_votes(authorized_client, test_posts, short_streams, monkeypatch):
+    post_id = test_posts[0].id
+
+    def vote_while_streaming():
+        # Wait for the stream's subscription, then vote and tick
+        while not vote_hub.stats()["subscriptions"]:
+            time.sleep(0.01)
+        monkeypatch.setattr(vote_hub, "read_counts", lambda post_ids: {post_id: 5})
+        vote_hub.publish(post_id)
+        vote_hub.tick()
+
+    thread = threading.Thread(target=vote_while_streaming)
+    thread.start()
+    res = authorized_client.get("/posts/stream", params={"ids": [post_id, test_posts[1].id, 88888]})
+    thread.join()
+    assert events(res.text) == [
+        [{"post_id": post_id, "votes": 0}, {"post_id": test_posts[1].id, "votes": 0}],
+        [{"post_id": post_id, "votes": 5}],
+    ]
+    assert vote_hub.stats()["subscriptions"] == 0
+
+
+def test_stream_keeps_votes_published_while_opening(authorized_client, test_posts, short_streams, monkeypatch):
+    post_id = test_posts[0].id
+    open_stream = vote_stream.event_stream
+
+    def vote_then_stream(request, hub, subscription, initial):
+        # A vote landing after the counts were read, before the first event
+        monkeypatch.setattr(hub, "read_counts", lambda post_ids: {post_id: 5})
+        hub.publish(post_id)
+        hub.tick()
+        return open_stream(request, hub, subscription, initial)
+
+    monkeypatch.setattr(vote_stream, "event_stream", vote_then_stream)
+    res = authorized_client.get(f"/posts/{post_id}/stream")
+    assert events(res.text) == [[{"post_id": post_id, "votes": 0}], [{"post_id": post_id, "votes": 5}]]
+    assert vote_hub.stats()["subscriptions"] == 0
+
+
+def test_stream_votes_errors(authorized_client, test_posts, monkeypatch):
+    res = authorized_client.get("/posts/88888/stream")
+    assert res.status_code == 404
+    assert vote_hub.stats()["subscriptions"] == 0
+    monkeypatch.setattr(settings, "vote_stream_max_posts", 1)
+    res = authorized_client.get("/posts/stream", params={"ids": [1, 2]})
+    assert res.status_code == 400
+
+
+def test_votes_are_published(authorized_client, test_posts, monkeypatch):
+    published = []
+    monkeypatch.setattr(vote_hub, "publish", published.append)
+    first, second = test_posts[0].id, test_posts[1].id
+
+    authorized_client.post("/votes/", json={"post_id": first, "dir": 1})
+    authorized_client.post("/votes/", json={"post_id": first, "dir": 1})
+    authorized_client.post("/votes/batch", json=[{"post_id": second, "dir": 1}, {"post_id": first, "dir": 0}])
+    assert sorted(published) == sorted([first, first, second])